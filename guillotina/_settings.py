@@ -93,10 +93,20 @@ app_settings: Dict[str, Any] = {
     "search_parser": "default",
     "object_reader": "guillotina.db.reader.reader",
     "thread_pool_workers": 32,
+    "serialize_executor_threshold": 0,
+    "children_batch_size": 15,
+    "children_max_batch_size": 1000,
     "server_settings": {"uvicorn": {"timeout_keep_alive": 5, "http": "h11"}},
     "valid_id_characters": string.digits + string.ascii_lowercase + ".-_@$^()+ =",
     "load_catalog": True,
     "catalog_max_results": 50,
+    "catalog_count": "exact",
+    "catalog_reindex_batch_size": 200,
+    "catalog_reindex_workers": 1,
+    "catalog_columns": [],
+    "catalog_fulltext": {},
+    "catalog_stream_batch_size": 500,
+    "security_cache_size": 10000,
     "managers_roles": {
         "guillotina.ContainerAdmin": 1,
         "guillotina.ContainerDeleter": 1,
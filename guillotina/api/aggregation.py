@@ -32,6 +32,10 @@ async def aggregation_get(context, request):
     if search is None:
         raise HTTPServiceUnavailable()
 
+    if "_facets" in query:
+        # counted by the catalog
+        return await search.query_facets(context, query)
+
     fields = request.query.get("_metadata", "").split(",")
     result = await search.query_aggregation(context, query)
     if "items" in result:
@@ -692,15 +692,21 @@ async def items(context, request):
     if request.query.get("omit"):
         omit = request.query.get("omit").split(",")
 
-    results = []
+    obs = []
     for key in await txn.get_page_of_keys(context.__uuid__, page=page, page_size=page_size):
         ob = await context.async_get(key)
+        # None when removed since the keys were listed
+        if ob is not None:
+            obs.append(ob)
+    results = []
+    for ob in get_security_policy().filter_allowed("guillotina.AccessContent", obs):
         serializer = get_multi_adapter((ob, request), IResourceSerializeToJson)
         try:
             results.append(await serializer(include=include, omit=omit))
         except TypeError:
             results.append(await serializer())
 
+    # total of children, including the ones not allowed to the user
     return {"items": results, "total": await context.async_len(), "page": page, "page_size": page_size}
 
 
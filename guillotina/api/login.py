@@ -7,6 +7,7 @@ from guillotina.api.service import Service
 from guillotina.auth import authenticate_user
 from guillotina.auth.recaptcha import RecaptchaValidator
 from guillotina.auth.utils import find_user
+from guillotina.auth.validators import forget_session
 from guillotina.component import get_utility
 from guillotina.component import query_utility
 from guillotina.event import notify
@@ -139,6 +140,7 @@ class Logout(Service):
         if session_manager is not None:
             try:
                 await session_manager.drop_session(user.id, user._v_session)
+                forget_session(user.id, user._v_session)
             except AttributeError:
                 raise HTTPPreconditionFailed("Session manager configured but no session on jwt")
         else:
@@ -1,16 +1,25 @@
+from guillotina import app_settings
 from guillotina import configure
 from guillotina.api.service import Service
 from guillotina.catalog.utils import reindex_in_future
 from guillotina.component import query_utility
+from guillotina.contentnegotiation import get_acceptable_content_types
 from guillotina.interfaces import ICatalogUtility
 from guillotina.interfaces import IResource
+from guillotina.renderers import guillotina_json_default
+from guillotina.response import HTTPClientClosedRequest
 from guillotina.response import HTTPServiceUnavailable
+from guillotina.response import Response
 
 import logging
+import orjson
 
 
 logger = logging.getLogger("guillotina")
 
+# bytes of results buffered before writing them to the response
+STREAM_CHUNK_SIZE = 16 * 1024
+
 QUERY_PARAMETERS = [
     {
         "in": "query",
@@ -61,6 +70,20 @@ QUERY_PARAMETERS = [
         "description": "list of metadata fields to exclude",
         "schema": {"type": "string"},
     },
+    {
+        "in": "query",
+        "required": False,
+        "name": "_facets",
+        "description": "list of fields to count results by value",
+        "schema": {"type": "string"},
+    },
+    {
+        "in": "query",
+        "required": False,
+        "name": "_facets_size",
+        "description": "Maximum number of values counted for each facet",
+        "schema": {"type": "string"},
+    },
     {"in": "query", "required": False, "name": "__eq", "schema": {"type": "string"}},
     {"in": "query", "required": False, "name": "__not", "schema": {"type": "string"}},
     {"in": "query", "required": False, "name": "__gt", "schema": {"type": "string"}},
@@ -85,7 +108,8 @@ QUERY_PARAMETERS = [
             "content": {
                 "application/json": {
                     "schema": {"type": "object", "$ref": "#/components/schemas/SearchResults"}
-                }
+                },
+                "application/x-ndjson": {"schema": {"type": "string"}},
             },
         }
     },
@@ -95,9 +119,39 @@ async def search_get(context, request):
     if search is None:
         raise HTTPServiceUnavailable()
 
+    if "application/x-ndjson" in get_acceptable_content_types(request):
+        return await stream_search(context, request, search)
     return await search.search(context, dict(request.query))
 
 
+async def stream_search(context, request, search) -> Response:
+    """
+    Write all the results of the search as newline delimited json while
+    they are read from the catalog
+    """
+    cors_renderer = app_settings["cors_renderer"](request)
+    headers = await cors_renderer.get_headers()
+    resp = Response(status=200, headers=headers, content_type="application/x-ndjson")
+    results = search.stream(context, dict(request.query))
+    buffer = bytearray()
+    try:
+        async for item in results:
+            buffer += orjson.dumps(item, default=guillotina_json_default) + b"\n"
+            if len(buffer) >= STREAM_CHUNK_SIZE:
+                # errors before the first chunk still get an error response
+                await resp.prepare(request)
+                await resp.write(bytes(buffer))
+                buffer.clear()
+        await resp.prepare(request)
+        await resp.write(bytes(buffer), eof=True)
+    except (ConnectionRefusedError, ConnectionResetError):  # pragma: no cover
+        logger.info(f"Search stream cancelled: {request}")
+        raise HTTPClientClosedRequest()
+    finally:
+        await results.aclose()
+    return resp
+
+
 @configure.service(
     context=IResource,
     method="POST",
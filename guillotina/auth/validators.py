@@ -11,17 +11,43 @@ from guillotina.interfaces import IPasswordHasher
 from guillotina.interfaces import ISessionManagerUtility
 from guillotina.utils import strings_differ
 from lru import LRU
+from typing import Any
+from typing import Dict
 
 import argon2
 import asyncio
 import hashlib
 import jwt
 import logging
+import time
 import uuid
 
 
+try:
+    import prometheus_client
+
+    AUTH_CACHE_OPS = prometheus_client.Counter(
+        "guillotina_auth_cache_ops_total",
+        "Total count of lookups of the verified jwt and session caches by cache and result",
+        labelnames=["type", "result"],
+    )
+
+    def record_auth_cache_metric(type_: str, result: str) -> None:
+        AUTH_CACHE_OPS.labels(type=type_, result=result).inc()
+
+
+except ImportError:
+
+    def record_auth_cache_metric(type_: str, result: str) -> None:
+        ...
+
+
 ph = argon2.PasswordHasher()
 _pw_auth_validator = LRU(100)
+# verified jwts by hash of the token and the settings used to verify them
+_jwt_cache = LRU(1000)
+# expiration of the sessions known to exist
+_session_cache = LRU(1000)
 
 logger = logging.getLogger("guillotina")
 
@@ -95,6 +121,60 @@ def check_password(token, password):
     return decision
 
 
+def decode_jwt(token: str) -> Dict[str, Any]:
+    """
+    Decode and verify a jwt. Tokens already verified are not verified
+    again until they expire.
+    """
+    settings = app_settings["jwt"]
+    cache_key = hashlib.sha256(
+        "{}:{}:{}".format(settings["algorithm"], settings["secret"], token).encode("utf-8")
+    ).hexdigest()
+    cached = _jwt_cache.get(cache_key)
+    if cached is not None:
+        decoded, expires = cached
+        if expires is None or expires > time.time():
+            record_auth_cache_metric("jwt", "hit")
+            return dict(decoded)
+        # decoding raises the expiration error
+        del _jwt_cache[cache_key]
+    record_auth_cache_metric("jwt", "miss")
+    decoded = jwt.decode(token, settings["secret"], algorithms=[settings["algorithm"]])
+    expires = decoded.get("exp")
+    _jwt_cache[cache_key] = (decoded, expires if isinstance(expires, (int, float)) else None)
+    return dict(decoded)
+
+
+async def exist_session(session_manager: ISessionManagerUtility, ident: str, session: str) -> bool:
+    """
+    Check the session exists, existing sessions are not checked again for
+    `session_cache_ttl` seconds of the jwt settings when it is set
+    """
+    ttl = app_settings["jwt"].get("session_cache_ttl")
+    if not ttl:
+        return await session_manager.exist_session(ident, session)
+    cache_key = (ident, session)
+    expires = _session_cache.get(cache_key)
+    if expires is not None and expires > time.time():
+        record_auth_cache_metric("session", "hit")
+        return True
+    record_auth_cache_metric("session", "miss")
+    valid = await session_manager.exist_session(ident, session)
+    if valid:
+        _session_cache[cache_key] = time.time() + ttl
+    elif expires is not None:
+        del _session_cache[cache_key]
+    return valid
+
+
+def forget_session(ident: str, session: str) -> None:
+    """
+    Remove a dropped session from the sessions known to exist
+    """
+    if (ident, session) in _session_cache:
+        del _session_cache[(ident, session)]
+
+
 class SaltedHashPasswordValidator:
     for_validators = ("basic", "wstoken")
 
@@ -127,9 +207,7 @@ class JWTValidator:
             return
 
         try:
-            validated_jwt = jwt.decode(
-                token["token"], app_settings["jwt"]["secret"], algorithms=[app_settings["jwt"]["algorithm"]]
-            )
+            validated_jwt = decode_jwt(token["token"])
             token["id"] = validated_jwt.get("id", validated_jwt.get("sub"))
             token["decoded"] = validated_jwt
             user = await find_user(token)
@@ -153,14 +231,12 @@ class JWTSessionValidator:
             return
 
         try:
-            validated_jwt = jwt.decode(
-                token["token"], app_settings["jwt"]["secret"], algorithms=[app_settings["jwt"]["algorithm"]]
-            )
+            validated_jwt = decode_jwt(token["token"])
 
             session_manager = query_utility(ISessionManagerUtility)
             if session_manager is not None:
                 session = validated_jwt.get("session", None)
-                valid_session = await session_manager.exist_session(validated_jwt["id"], session)
+                valid_session = await exist_session(session_manager, validated_jwt["id"], session)
                 if valid_session:
                     token["id"] = validated_jwt["id"]
                     token["decoded"] = validated_jwt
@@ -67,6 +67,26 @@ class DefaultSearchUtility:
         parsed_query = parse_query(context, query, self)
         return await self.aggregation(context, parsed_query)
 
+    async def facets(self, context: IBaseObject, parsed_query: typing.Any):
+        """
+        Number of results by value of the facet fields
+        """
+        return {}
+
+    async def query_facets(self, context: IBaseObject, query: typing.Any):
+        """
+        Facets query, uses parser to transform query
+        """
+        parsed_query = parse_query(context, query, self)
+        return await self.facets(context, parsed_query)
+
+    async def stream(self, context: IBaseObject, query: typing.Any) -> typing.AsyncIterator[typing.Dict]:
+        """
+        Iterate over the results of a search query
+        """
+        for item in (await self.search(context, query))["items"]:
+            yield item
+
     async def index(self, container: IContainer, datas):
         """
         {uid: <dict>}
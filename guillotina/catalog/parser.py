@@ -109,6 +109,26 @@ class BaseParser:
         if params.get("_metadata_not"):
             excluded_metadata = to_list(params.pop("_metadata_not"))
 
+        # Count
+        count = params.pop("_count", None) or app_settings.get("catalog_count", "exact")
+        if count not in ("exact", "estimate", "none"):
+            count = "exact"
+
+        # Keyset pagination
+        after = params.pop("_after", None) or None
+
+        # Facets
+        facets = None
+        if params.get("_facets"):
+            facets = to_list(params["_facets"])
+        params.pop("_facets", None)
+        facets_size = 10
+        if "_facets_size" in params:
+            try:
+                facets_size = int(params.pop("_facets_size"))
+            except ValueError:
+                pass
+
         return {
             "_from": _from,
             "size": size,
@@ -117,5 +137,9 @@ class BaseParser:
             "metadata": metadata,
             "fullobjects": fullobjects,
             "excluded_metadata": excluded_metadata,
+            "count": count,
+            "after": after,
+            "facets": facets,
+            "facets_size": facets_size,
             "params": params,
         }
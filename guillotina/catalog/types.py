@@ -11,4 +11,8 @@ class BasicParsedQueryInfo(TypedDict):
     fullobjects: bool
     metadata: typing.Optional[typing.List[str]]
     excluded_metadata: typing.Optional[typing.List[str]]
+    count: str
+    after: typing.Optional[str]
+    facets: typing.Optional[typing.List[str]]
+    facets_size: int
     params: typing.Dict[str, typing.Any]
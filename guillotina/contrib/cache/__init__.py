@@ -7,10 +7,20 @@ app_settings = {
     "cache": {
         "driver": None,  # to use redis 'guillotina.contrib.redis', empty memory
         "updates_channel": None,  # to use pubsub invalidation you need a id for the channel
-        "memory_cache_size": 209715200,
+        "memory_cache_size": 209715200,  # bytes of memory for the in-memory cache of each process
         "strategy": "basic",
         "ttl": 3600,
         "push": True,  # push out object data to fill other guillotina caches with changes
+        # additional keys of a value only store a reference to the first key in the network cache
+        "reference_keys": False,
+        # dotted name of the codec used for network cache values
+        "codec": "guillotina.contrib.cache.serialize.PickleCodec",
+        # with the compact codec, compress object state larger than this number of bytes
+        "compress_threshold": None,
+        # seconds to wait for other transactions to publish their invalidations together
+        "invalidation_delay": 0,
+        # publish invalidations right away once this number of keys and pushed objects are queued
+        "invalidation_batch_size": 500,
     },
     "load_utilities": {
         "guillotina_cache": {
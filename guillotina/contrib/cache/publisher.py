@@ -0,0 +1,107 @@
+from guillotina import app_settings
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import asyncio
+import logging
+import time
+
+
+try:
+    import prometheus_client
+    from prometheus_client.utils import INF
+
+    INVALIDATION_BATCH_SIZE = prometheus_client.Histogram(
+        "guillotina_cache_invalidation_batch_size",
+        "Histogram of number of keys and pushed objects published at each invalidation message",
+        buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, INF),
+    )
+    INVALIDATION_BATCH_TRANSACTIONS = prometheus_client.Histogram(
+        "guillotina_cache_invalidation_batch_transactions",
+        "Histogram of number of transactions coalesced at each invalidation message",
+        buckets=(1, 2, 5, 10, 20, 50, 100, INF),
+    )
+    INVALIDATION_DELAY = prometheus_client.Histogram(
+        "guillotina_cache_invalidation_delay_seconds",
+        "Histogram of time between queuing invalidations and publishing them (in seconds)",
+    )
+
+    def record_invalidation_batch(size: int, transactions: int, delay: float) -> None:
+        INVALIDATION_BATCH_SIZE.observe(size)
+        INVALIDATION_BATCH_TRANSACTIONS.observe(transactions)
+        INVALIDATION_DELAY.observe(delay)
+
+
+except ImportError:
+
+    def record_invalidation_batch(size: int, transactions: int, delay: float) -> None:
+        ...
+
+
+logger = logging.getLogger("guillotina.contrib.cache")
+
+
+class InvalidationPublisher:
+    """
+    Coalesce the invalidations of the transactions committed by this
+    process during `invalidation_delay` seconds into one pubsub message.
+
+    Keys are deduplicated and pushed objects invalidated by a later
+    transaction are dropped. Messages are published right away once they
+    hold `invalidation_batch_size` keys and pushed objects.
+    """
+
+    def __init__(self, utility):
+        self._utility = utility
+        self._keys: Dict[str, None] = {}
+        self._push: Dict[str, Any] = {}
+        self._tid = None
+        self._transactions = 0
+        self._queued_at = 0.0
+        self._task: Optional[asyncio.Future] = None
+
+    @property
+    def size(self) -> int:
+        return len(self._keys) + len(self._push)
+
+    def queue(self, tid, keys: List[str], push: Dict[str, Any]) -> None:
+        if self.size == 0:
+            self._queued_at = time.time()
+        for key in keys:
+            self._keys[key] = None
+            if key not in push:
+                # stale data pushed by a previous transaction
+                self._push.pop(key, None)
+        self._push.update(push)
+        self._tid = tid
+        self._transactions += 1
+
+        if self.size >= app_settings["cache"].get("invalidation_batch_size", 500):
+            asyncio.ensure_future(self.flush())
+        elif self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._flush_later())
+
+    async def _flush_later(self):
+        delay = app_settings["cache"].get("invalidation_delay", 0)
+        if delay:
+            await asyncio.sleep(delay)
+        await self.flush()
+
+    async def flush(self) -> None:
+        if self.size == 0:
+            return
+        keys, push, tid = list(self._keys), self._push, self._tid
+        record_invalidation_batch(self.size, self._transactions, time.time() - self._queued_at)
+        self._keys = {}
+        self._push = {}
+        self._transactions = 0
+        try:
+            await self._utility._subscriber.publish(
+                app_settings["cache"]["updates_channel"],
+                self._utility._uid,
+                {"tid": tid, "keys": keys, "push": push},
+            )
+        except Exception:
+            logger.warning("Error publishing cache invalidations", exc_info=True)
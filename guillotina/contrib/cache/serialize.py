@@ -1,8 +1,12 @@
+from guillotina import app_settings
 from guillotina.profile import profilable
 
 import asyncpg
+import marshal
 import pickle
+import struct
 import typing
+import zlib
 
 
 @profilable
@@ -29,3 +33,84 @@ def loads(value: bytes) -> typing.Any:
     if value is None:
         return None
     return pickle.loads(value)
+
+
+class PickleCodec:
+    """
+    Cache codec pickling whole values
+    """
+
+    def dumps(self, value: typing.Any) -> bytes:
+        return dumps(value)
+
+    def loads(self, value: bytes) -> typing.Any:
+        return loads(value)
+
+
+_MAGIC = b"\xfegc"
+_COMPRESSED = 1
+_HEADER = struct.Struct(">BI")
+
+
+class CompactCodec(PickleCodec):
+    """
+    Cache codec storing object records with large states as:
+
+        magic | flags | fields length | marshaled fields | state
+
+    The pickled `state` is written as is instead of being pickled again and
+    is compressed with zlib when it is larger than `compress_threshold`.
+    Pickle is faster for smaller states so other values are pickled.
+    """
+
+    compress_level = 1
+    # from this state size, copying the raw state is faster than pickling it
+    raw_state_size = 256 * 1024
+
+    def __init__(self, compress_threshold: typing.Optional[int] = None):
+        if compress_threshold is None:
+            compress_threshold = app_settings["cache"].get("compress_threshold")
+        self.compress_threshold = compress_threshold
+
+    def dumps(self, value: typing.Any) -> bytes:
+        if isinstance(value, asyncpg.Record):
+            value = dict(value)
+        if isinstance(value, dict) and isinstance(value.get("state"), bytes):
+            size = len(value["state"])
+            compress = bool(self.compress_threshold) and size >= self.compress_threshold
+            if compress or size >= self.raw_state_size:
+                data = self._dump_record(value, compress)
+                if data is not None:
+                    return data
+        return dumps(value)
+
+    def _dump_record(self, value: dict, compress: bool) -> typing.Optional[bytes]:
+        fields = dict(value)
+        state = fields.pop("state")
+        try:
+            header = marshal.dumps(fields, 4)
+        except ValueError:
+            # not only basic types
+            return None
+        flags = 0
+        if compress:
+            compressed = zlib.compress(state, self.compress_level)
+            if len(compressed) < len(state):
+                state = compressed
+                flags |= _COMPRESSED
+        return b"".join((_MAGIC, _HEADER.pack(flags, len(header)), header, state))
+
+    def loads(self, value: bytes) -> typing.Any:
+        if value is None:
+            return None
+        if value[: len(_MAGIC)] != _MAGIC:
+            return loads(value)
+        flags, size = _HEADER.unpack_from(value, len(_MAGIC))
+        offset = len(_MAGIC) + _HEADER.size
+        record = marshal.loads(value[offset : offset + size])
+        offset += size
+        if flags & _COMPRESSED:
+            record["state"] = zlib.decompress(value[offset:])
+        else:
+            record["state"] = value[offset:]
+        return record
@@ -11,8 +11,8 @@ from guillotina.profile import profilable
 from typing import Any
 from typing import Dict
 from typing import List
+from typing import Tuple
 
-import asyncio
 import logging
 
 
@@ -50,6 +50,18 @@ class BasicCache(BaseCache):
             self._misses += 1
         return obj
 
+    @profilable
+    async def get_many(self, keyset: List[Dict[str, Any]]) -> List[Any]:
+        if self._utility is None:
+            return [None] * len(keyset)
+        values = await self._utility.get_many([self.get_key(**opts) for opts in keyset])
+        for value in values:
+            if value is not None:
+                self._hits += 1
+            else:
+                self._misses += 1
+        return values
+
     @profilable
     async def set(self, value, keyset: List[Dict[str, Any]] = None, **kwargs):
         if self._utility is None:
@@ -59,6 +71,16 @@ class BasicCache(BaseCache):
         await self._utility.set([self.get_key(**opts) for opts in keyset], value)
         self._stored += 1
 
+    @profilable
+    async def set_many(self, items: List[Tuple[Any, List[Dict[str, Any]]]]):
+        if self._utility is None:
+            return
+        await self._utility.set_many(
+            [([self.get_key(**opts) for opts in keyset], value) for value, keyset in items]
+        )
+        for _ in items:
+            self._stored += 1
+
     @profilable
     async def clear(self):
         if self._utility is None:
@@ -128,8 +150,7 @@ class BasicCache(BaseCache):
                 if publish:
                     await self.fill_cache()
                     if len(self._keys_to_publish) > 0 and self._utility._subscriber is not None:
-                        keys = self._keys_to_publish
-                        asyncio.ensure_future(self.synchronize(keys))
+                        await self.synchronize(self._keys_to_publish)
                     else:
                         self._stored_objects.clear()
             else:
@@ -158,7 +179,7 @@ class BasicCache(BaseCache):
     @profilable
     async def synchronize(self, keys_to_publish):
         """
-        publish cache changes on redis
+        queue cache changes to be published on redis
         """
         if self._utility._subscriber is None:  # pragma: no cover
             raise NoPubSubUtility()
@@ -178,9 +199,4 @@ class BasicCache(BaseCache):
                 push[ob_key] = val
 
         self._stored_objects.clear()
-        self._utility.ignore_tid(self._transaction._tid)
-        await self._utility._subscriber.publish(
-            app_settings["cache"]["updates_channel"],
-            self._transaction._tid,
-            {"tid": self._transaction._tid, "keys": keys_to_publish, "push": push},
-        )
+        self._utility.publish_invalidation(self._transaction._tid, keys_to_publish, push)
@@ -4,24 +4,43 @@ from guillotina.contrib.cache import CACHE_PREFIX
 from guillotina.contrib.cache import memcache
 from guillotina.contrib.cache import serialize
 from guillotina.contrib.cache.lru import LRU
+from guillotina.contrib.cache.publisher import InvalidationPublisher
 from guillotina.exceptions import NoPubSubUtility
 from guillotina.interfaces import IPubSubUtility
 from guillotina.profile import profilable
 from guillotina.utils import resolve_dotted_name
 from sys import getsizeof
+from typing import Any
+from typing import Dict
 from typing import List
 from typing import Optional
+from typing import Tuple
+from typing import Union
 
 import asyncio
 import asyncpg
 import logging
+import orjson
 import pickle
 import uuid
 
 
 logger = logging.getLogger("guillotina.contrib.cache")
-_default_size = 1024
-_basic_types = (bytes, str, int, float)
+# memory used by the lru node and the dict entry holding every key
+_entry_size = 112
+# values shared by every reference to them
+_shared_types = (bool, type(None))
+# nested containers deeper than this are accounted by their own size only
+_max_size_depth = 4
+# network cache values starting with this prefix point to the key holding the
+# data of an object, followed by the oid of the object and the key
+_REFERENCE_PREFIX = b"gcache-ref:"
+
+
+def _get_oid(value: Any) -> Optional[str]:
+    if isinstance(value, (dict, asyncpg.Record)):
+        return value.get("zoid")
+    return None
 
 
 class CacheUtility:
@@ -36,6 +55,8 @@ class CacheUtility:
         self._ignored_tids = []
         self._subscriber = None
         self._obj_driver = None  # driver for obj cache
+        self._codec = serialize.PickleCodec()
+        self._publisher = InvalidationPublisher(self)
         self._uid = uuid.uuid4().hex
         self.initialized = False
 
@@ -43,6 +64,8 @@ class CacheUtility:
     async def initialize(self, app=None):
         self._memory_cache = memcache.get_memory_cache()
         settings = app_settings["cache"]
+        if settings.get("codec"):
+            self._codec = resolve_dotted_name(settings["codec"])()
         if settings["driver"]:
             klass = resolve_dotted_name(settings["driver"])
             if klass is not None:
@@ -59,6 +82,7 @@ class CacheUtility:
     async def finalize(self, app):
         settings = app_settings["cache"]
         if self._subscriber is not None:
+            await self._publisher.flush()
             try:
                 await self._subscriber.unsubscribe(settings["updates_channel"], self._uid)
             except (asyncio.CancelledError, RuntimeError):
@@ -76,44 +100,169 @@ class CacheUtility:
                 return self._memory_cache[key]
             if self._obj_driver is not None:
                 val = await self._obj_driver.get(CACHE_PREFIX + key)
+                oid = None
+                if val is not None and val.startswith(_REFERENCE_PREFIX):
+                    reference = self._get_reference(val)
+                    val = None
+                    if reference is not None:
+                        oid, primary_key = reference
+                        val = await self._obj_driver.get(CACHE_PREFIX + primary_key)
+                        if val is not None and val.startswith(_REFERENCE_PREFIX):
+                            val = None
                 if val is not None:
+                    val = self._codec.loads(val)
+                    if oid is not None and _get_oid(val) != oid:
+                        # the key referenced now holds the data of another object
+                        return None
                     logger.debug("Retrieved {} from redis cache".format(key))
-                    val = serialize.loads(val)
-                    size = self.get_size(val)
-                    self._memory_cache.set(key, val, size)
+                    self._set_memory(key, val, self.get_size(val))
                     return val
         except Exception:
             logger.warning("Error getting cache value", exc_info=True)
 
-    def get_size(self, value):
-        if isinstance(value, (dict, asyncpg.Record)):
-            if "state" in value:
-                return len(value["state"])
-        if isinstance(value, list) and len(value) > 0:
-            # if its a list, guesss from first gey the length, and
-            # estimate it from the total lenghts on the list..
-            return getsizeof(value[0]) * len(value)
-        if isinstance(value, _basic_types):
-            return getsizeof(value)
-        return _default_size
+    async def get_many(self, keys: List[str]) -> List[Any]:
+        """
+        Get values for a list of keys. Keys not found in memory are
+        fetched from the driver with one multi-get.
+        """
+        values: List[Any] = []
+        missing = []
+        for idx, key in enumerate(keys):
+            if key in self._memory_cache:
+                values.append(self._memory_cache[key])
+            else:
+                values.append(None)
+                missing.append(idx)
+        if len(missing) > 0 and self._obj_driver is not None:
+            try:
+                stored = await self._obj_driver.get_many([CACHE_PREFIX + keys[idx] for idx in missing])
+                stored, oids = await self._resolve_references(stored)
+                for stored_idx, (idx, val) in enumerate(zip(missing, stored)):
+                    if val is not None:
+                        val = self._codec.loads(val)
+                        if stored_idx in oids and _get_oid(val) != oids[stored_idx]:
+                            # the key referenced now holds the data of another object
+                            continue
+                        self._set_memory(keys[idx], val, self.get_size(val))
+                        values[idx] = val
+            except Exception:
+                logger.warning("Error getting cache values", exc_info=True)
+        return values
+
+    def _get_reference(self, value: bytes) -> Optional[Tuple[str, str]]:
+        """
+        Oid of the object and key holding its data of a reference value
+        """
+        try:
+            oid, key = orjson.loads(value[len(_REFERENCE_PREFIX) :])
+        except (ValueError, TypeError):
+            return None
+        return oid, key
+
+    async def _resolve_references(
+        self, stored: List[Optional[bytes]]
+    ) -> Tuple[List[Optional[bytes]], Dict[int, str]]:
+        """
+        Replace reference values with the data of the keys they point to,
+        fetched with one multi-get, with the oids the data must belong to
+        by index.
+        """
+        references = {}
+        for idx, val in enumerate(stored):
+            if val is not None and val.startswith(_REFERENCE_PREFIX):
+                references[idx] = self._get_reference(val)
+        if len(references) == 0:
+            return stored, {}
+        primary_keys = list({reference[1] for reference in references.values() if reference is not None})
+        primaries = dict(
+            zip(primary_keys, await self._obj_driver.get_many([CACHE_PREFIX + key for key in primary_keys]))
+        )
+        stored = list(stored)
+        oids = {}
+        for idx, reference in references.items():
+            val = None
+            if reference is not None:
+                oids[idx], primary_key = reference
+                val = primaries[primary_key]
+                if val is not None and val.startswith(_REFERENCE_PREFIX):
+                    val = None
+            stored[idx] = val
+        return stored, oids
+
+    def get_size(self, value, _depth=0) -> int:
+        """
+        Bytes used in memory by a cached value: records, lists of keys,
+        lengths and annotations, including the containers holding them.
+        """
+        if isinstance(value, _shared_types):
+            return 0
+        size = getsizeof(value)
+        if _depth >= _max_size_depth or isinstance(value, (bytes, str, int, float)):
+            return size
+        if isinstance(value, asyncpg.Record):
+            # field names are shared by all the records of a query
+            return size + sum(self.get_size(val, _depth + 1) for val in value.values())
+        if isinstance(value, dict):
+            return size + sum(
+                self.get_size(key, _depth + 1) + self.get_size(val, _depth + 1) for key, val in value.items()
+            )
+        if isinstance(value, (list, tuple, set, frozenset)):
+            return size + sum(self.get_size(val, _depth + 1) for val in value)
+        if hasattr(value, "__dict__"):
+            return size + self.get_size(vars(value), _depth + 1)
+        return size
+
+    def _set_memory(self, key: str, value: Any, size: int) -> None:
+        """
+        Store a value in the memory cache accounting for the key and the
+        entry holding it, so the cache never grows past its byte budget
+        """
+        size += _entry_size + getsizeof(key)
+        if size > self._memory_cache.get_size():
+            # too big to be cached, but never keep a stale value around
+            if key in self._memory_cache:
+                del self._memory_cache[key]
+            return
+        self._memory_cache.set(key, value, size)
 
     # Set a object from cache
     async def set(self, keys, value, ttl=None):
-        if not isinstance(keys, list):
-            keys = [keys]
-        size = self.get_size(value)
-        for key in keys:
+        await self.set_many([(keys, value)], ttl=ttl)
+
+    async def set_many(self, items: List[Tuple[Union[str, List[str]], Any]], ttl=None):
+        """
+        Set a list of (keys, value) items. Values are serialized once
+        and all keys are sent to the driver with one pipelined call.
+        """
+        if ttl is None:
+            ttl = self._settings.get("ttl", 3600)
+        reference_keys = app_settings["cache"].get("reference_keys", False)
+        to_store = []
+        for keys, value in items:
+            if not isinstance(keys, list):
+                keys = [keys]
+            size = self.get_size(value)
+            stored_value = None
+            oid = _get_oid(value) if reference_keys else None
+            for key in keys:
+                try:
+                    self._set_memory(key, value, size)
+                    if self._obj_driver is not None:
+                        if stored_value is None:
+                            stored_value = self._codec.dumps(value)
+                        elif oid is not None:
+                            # additional keys of objects only point to the first one
+                            stored_value = _REFERENCE_PREFIX + orjson.dumps([oid, keys[0]])
+                        to_store.append((CACHE_PREFIX + key, stored_value))
+                    logger.debug("set {} in cache".format(key))
+                except Exception:
+                    logger.warning("Error setting cache value", exc_info=True)
+                size = 0  # additional keys share the value of the first one
+        if len(to_store) > 0:
             try:
-                self._memory_cache.set(key, value, size)
-                if ttl is None:
-                    ttl = self._settings.get("ttl", 3600)
-                if self._obj_driver is not None:
-                    stored_value = serialize.dumps(value)
-                    await self._obj_driver.set(CACHE_PREFIX + key, stored_value, expire=ttl)
-                logger.debug("set {} in cache".format(key))
+                await self._obj_driver.set_many(to_store, expire=ttl)
             except Exception:
-                logger.warning("Error setting cache value", exc_info=True)
-            size = 0  # additional keys to set have 0 size in cache
+                logger.warning("Error setting cache values", exc_info=True)
 
     @profilable
     # Delete a set of objects from cache
@@ -170,7 +319,7 @@ class CacheUtility:
         push = data.get("push", {})
         if isinstance(push, dict):
             for cache_key, ob in push.items():
-                self._memory_cache.set(cache_key, ob, self.get_size(ob))
+                self._set_memory(cache_key, ob, self.get_size(ob))
 
         # clean up possible memory leak
         while len(self._ignored_tids) > 100:
@@ -180,6 +329,13 @@ class CacheUtility:
         # so we don't invalidate twice...
         self._ignored_tids.append(tid)
 
+    def publish_invalidation(self, tid, keys_to_publish, push=None):
+        """
+        Queue invalidations of a transaction to be published with the
+        ones of other transactions committed shortly after
+        """
+        self._publisher.queue(tid, keys_to_publish, push or {})
+
     async def send_invalidation(self, keys_to_publish, push=None):
         if self._subscriber:
             await self._subscriber.publish(
@@ -189,7 +345,18 @@ class CacheUtility:
             )
 
     async def get_stats(self):
-        result = {"in-memory": {"size": len(self._memory_cache), "stats": self._memory_cache.get_stats()}}
+        hits, misses, evictions = self._memory_cache.get_stats()
+        result = {
+            "in-memory": {
+                "size": len(self._memory_cache),
+                "stats": (hits, misses, evictions),
+                "hits": hits,
+                "misses": misses,
+                "evictions": evictions,
+                "memory": self._memory_cache.get_memory(),
+                "max_memory": self._memory_cache.get_size(),
+            }
+        }
         if self._obj_driver is not None:
             result["network"]: self.driver.info()
         return result
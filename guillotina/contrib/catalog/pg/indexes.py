@@ -1,3 +1,4 @@
+from guillotina import app_settings
 from guillotina.catalog.utils import iter_indexes
 from guillotina.contrib.catalog.pg.utils import sqlq
 from guillotina.db.interfaces import IPostgresStorage
@@ -7,14 +8,55 @@ import typing
 
 class BasicJsonIndex:
     operators: typing.List[str] = ["=", "!=", "?", "?|"]
+    # type of the column the index can be stored in, see `catalog_columns`
+    column_type: typing.Optional[str] = "text"
+    column_index = "btree"
 
-    def __init__(self, name: str):
+    def __init__(self, name: str, column: bool = False):
         self.name = name
+        self.column = column and self.column_type is not None
 
     @property
     def idx_name(self) -> str:
         return "idx_objects_{}".format(self.name)
 
+    @property
+    def column_name(self) -> str:
+        return "catalog_{}".format(self.name)
+
+    @property
+    def sort_type(self) -> str:
+        return typing.cast(str, self.column_type) if self.column else "text"
+
+    def json_expression(self) -> str:
+        return f"json->>'{sqlq(self.name)}'"
+
+    def column_expression(self) -> str:
+        return self.json_expression()
+
+    def expression(self) -> str:
+        """
+        Value of the index in queries: its column or the expression
+        extracting it from the json
+        """
+        if self.column:
+            return sqlq(self.column_name)
+        return self.json_expression()
+
+    def get_column_sql(self, storage: IPostgresStorage) -> typing.List[str]:
+        """
+        Generated column storing the value of the index and its index.
+        Adding the column rewrites the objects table.
+        """
+        table_name = sqlq(storage.objects_table_name)
+        return [
+            f"""ALTER TABLE {table_name}
+                ADD COLUMN IF NOT EXISTS {sqlq(self.column_name)} {sqlq(self.column_type)}
+                GENERATED ALWAYS AS ({self.column_expression()}) STORED;""",
+            f"""CREATE INDEX CONCURRENTLY IF NOT EXISTS {sqlq(self.idx_name)}_{table_name.replace('.', '_')}_column
+                ON {table_name} USING {sqlq(self.column_index)} ({sqlq(self.column_name)});""",
+        ]
+
     def get_index_sql(self, storage: IPostgresStorage) -> typing.List[str]:
         return [
             f"""CREATE INDEX CONCURRENTLY IF NOT EXISTS {sqlq(self.idx_name)}_{sqlq(storage.objects_table_name.replace('.', '_'))}
@@ -28,16 +70,35 @@ class BasicJsonIndex:
         if operator in ("?", "?|"):
             return f"""json->'{sqlq(self.name)}' {sqlq(operator)} ${{arg}} """
         else:
-            return f"""json->>'{sqlq(self.name)}' {sqlq(operator)} ${{arg}} """
+            return f"""{self.expression()} {sqlq(operator)} ${{arg}} """
+
+    def sort_expression(self) -> str:
+        return self.expression()
 
     def order_by(self, direction="ASC") -> str:
-        return f"order by json->>'{sqlq(self.name)}' {sqlq(direction)}"
+        return f"order by {self.sort_expression()} {sqlq(direction)}"
 
     def select(self) -> typing.List[typing.Any]:
         return []
 
+    def facet_expression(self) -> str:
+        """
+        Text values of the index to count results by
+        """
+        return f"unnest(f_jsonb_text_array(json->'{sqlq(self.name)}'))"
+
 
 class BooleanIndex(BasicJsonIndex):
+    column_type = "boolean"
+
+    @property
+    def sort_type(self) -> str:
+        # the json expression is cast to the type of the column too
+        return self.column_type
+
+    def json_expression(self) -> str:
+        return f"(json->>'{sqlq(self.name)}')::boolean"
+
     def get_index_sql(self, storage: IPostgresStorage):
         return [
             f"""
@@ -47,11 +108,21 @@ ON {sqlq(storage.objects_table_name)} (((json->>'{sqlq(self.name)}')::boolean));
 
     def where(self, value, operator="="):
         assert operator in self.operators
-        return f"""(json->>'{sqlq(self.name)}')::boolean {sqlq(operator)} ${{arg}}::boolean """
+        return f"""{self.expression()} {sqlq(operator)} ${{arg}}::boolean """
 
 
 class KeywordIndex(BasicJsonIndex):
     operators = ["?", "?|", "NOT ?"]
+    column_type = "text[]"
+    column_index = "gin"
+
+    def column_expression(self) -> str:
+        return f"f_jsonb_text_array(json->'{sqlq(self.name)}')"
+
+    def facet_expression(self) -> str:
+        if self.column:
+            return f"unnest({self.expression()})"
+        return super().facet_expression()
 
     def get_index_sql(self, storage: IPostgresStorage):
         return [
@@ -66,6 +137,10 @@ ON {sqlq(storage.objects_table_name)} USING gin ((json->'{sqlq(self.name)}'))"""
         if "NOT" in operator:
             operator = operator.split()[1]
             not_value = "NOT"
+        if self.column:
+            if operator == "?|":
+                return f"""{not_value} {self.expression()} && ${{arg}}::text[] """
+            return f"""{not_value} {self.expression()} @> ARRAY[${{arg}}::text] """
         return f"""{not_value} json->'{sqlq(self.name)}' {sqlq(operator)} ${{arg}} """
 
 
@@ -75,13 +150,22 @@ class PathIndex(BasicJsonIndex):
     def where(self, value, operator="="):
         assert operator in self.operators
         return f"""
-substring(json->>'{sqlq(self.name)}', 0, {len(value) + 1}) {sqlq(operator)} ${{arg}}::text """
+substring({self.expression()}, 0, char_length(${{arg}}::text) + 1) {sqlq(operator)} ${{arg}}::text """
 
 
 class CastIntIndex(BasicJsonIndex):
     cast_type = "integer"
+    column_type = "integer"
     operators = ["=", "!=", ">", "<", ">=", "<="]
 
+    @property
+    def sort_type(self) -> str:
+        # the json expression is cast to the type of the column too
+        return self.column_type
+
+    def json_expression(self) -> str:
+        return f"CAST(json->>'{sqlq(self.name)}' AS {sqlq(self.cast_type)})"
+
     def get_index_sql(self, storage: IPostgresStorage):
         return [
             f"""
@@ -96,15 +180,20 @@ using btree(CAST(json->>'{sqlq(self.name)}' AS {sqlq(self.cast_type)}))"""
         """
         assert operator in self.operators
         return f"""
-CAST(json->>'{sqlq(self.name)}' AS {sqlq(self.cast_type)}) {sqlq(operator)} ${{arg}}::{sqlq(self.cast_type)}"""  # noqa
+{self.expression()} {sqlq(operator)} ${{arg}}::{sqlq(self.cast_type)}"""
 
 
 class CastFloatIndex(CastIntIndex):
     cast_type = "float"
+    column_type = "float"
 
 
 class CastDateIndex(CastIntIndex):
     cast_type = "timestamp"
+    column_type = "timestamptz"
+
+    def json_expression(self) -> str:
+        return f"f_cast_isots(json->>'{sqlq(self.name)}')"
 
     def get_index_sql(self, storage: IPostgresStorage):
         return [
@@ -119,21 +208,49 @@ ON {sqlq(storage.objects_table_name)} (f_cast_isots(json->>'{sqlq(self.name)}'))
         """
         assert operator in self.operators
         return f"""
-f_cast_isots(json->>'{sqlq(self.name)}') {sqlq(operator)} ${{arg}}::{sqlq(self.cast_type)}"""
+{self.expression()} {sqlq(operator)} ${{arg}}::{sqlq(self.cast_type)}"""
 
     def order_by_score(self, direction="ASC"):
-        return f"order by json->>'{sqlq(self.name)}' {sqlq(direction)}"
+        return f"order by {self.sort_expression()} {sqlq(direction)}"
 
 
 class FullTextIndex(BasicJsonIndex):
+    """
+    Text search configuration and weighted json fields of the vector are
+    set per index with the `catalog_fulltext` setting, vectors are stored
+    with `catalog_columns`.
+    """
+
     operators = ["?", "?|", "="]
+    column_type = "tsvector"
+    column_index = "gin"
+
+    @property
+    def config(self) -> str:
+        return sqlq(app_settings.get("catalog_fulltext", {}).get(self.name, {}).get("config", "simple"))
+
+    @property
+    def sort_type(self) -> str:
+        return "text"
+
+    def json_expression(self) -> str:
+        weights = app_settings.get("catalog_fulltext", {}).get(self.name, {}).get("weights")
+        if not weights:
+            return f"to_tsvector('{self.config}', json->>'{sqlq(self.name)}')"
+        # one operand for the operators applied to it in queries and indexes
+        return "({})".format(
+            " || ".join(
+                f"setweight(to_tsvector('{self.config}', coalesce(json->>'{sqlq(field)}', '')), '{sqlq(weight)}')"
+                for field, weight in weights.items()
+            )
+        )
 
     def get_index_sql(self, storage: IPostgresStorage):
         return [
             f"""
 CREATE INDEX CONCURRENTLY IF NOT EXISTS {sqlq(self.idx_name)}_{sqlq(storage.objects_table_name.replace('.', '_'))}
 ON {sqlq(storage.objects_table_name)}
-using gin(to_tsvector('simple', json->>'{sqlq(self.name)}'));"""
+using gin(({self.json_expression()}));"""
         ]
 
     def where(self, value, operator=""):
@@ -143,18 +260,21 @@ using gin(to_tsvector('simple', json->>'{sqlq(self.name)}'));"""
         """
         if operator == "phrase":
             return f"""
-    to_tsvector('simple', json->>'{sqlq(self.name)}') @@ phraseto_tsquery('simple', ${{arg}}::text)"""
+    {self.expression()} @@ phraseto_tsquery('{self.config}', ${{arg}}::text)"""
         else:
             return f"""
-    to_tsvector('simple', json->>'{sqlq(self.name)}') @@ to_tsquery('simple', ${{arg}}::text)"""
+    {self.expression()} @@ to_tsquery('{self.config}', ${{arg}}::text)"""
+
+    def sort_expression(self) -> str:
+        return f"json->>'{sqlq(self.name)}'"
 
     def order_by_score(self, direction="ASC"):
         return f"order by {sqlq(self.name)}_score {sqlq(direction)}"
 
     def select(self):
         return [
-            f"""ts_rank_cd(to_tsvector('simple', json->>'{sqlq(self.name)}'),
-                    plainto_tsquery('simple', ${{arg}}::text)) AS {sqlq(self.name)}_score"""
+            f"""ts_rank_cd({self.expression()},
+                    plainto_tsquery('{self.config}', ${{arg}}::text)) AS {sqlq(self.name)}_score"""
         ]
 
 
@@ -176,15 +296,18 @@ _cached_indexes: typing.Dict[str, BasicJsonIndex] = {}
 
 
 def get_pg_indexes(invalidate=False):
+    if invalidate:
+        _cached_indexes.clear()
     if len(_cached_indexes) > 0:
         return _cached_indexes
 
+    columns = app_settings.get("catalog_columns", None) or []
     for field_name, catalog_info in iter_indexes():
         catalog_type = catalog_info.get("type", "text")
         if catalog_type not in index_mappings:
-            index = index_mappings["*"](field_name)
+            index = index_mappings["*"](field_name, field_name in columns)
         else:
-            index = index_mappings[catalog_type](field_name)
+            index = index_mappings[catalog_type](field_name, field_name in columns)
         _cached_indexes[field_name] = index
     return _cached_indexes
 
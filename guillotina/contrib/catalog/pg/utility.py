@@ -1,14 +1,19 @@
+from guillotina import app_settings
+from guillotina import metrics
 from guillotina.api.content import DefaultGET
 from guillotina.auth.users import AnonymousUser
 from guillotina.catalog.catalog import DefaultSearchUtility
 from guillotina.catalog.utils import parse_query
 from guillotina.component import get_utility
+from guillotina.component import query_adapter
 from guillotina.const import TRASHED_ID
 from guillotina.contrib.catalog.pg import logger
 from guillotina.contrib.catalog.pg.indexes import BasicJsonIndex
 from guillotina.contrib.catalog.pg.indexes import get_pg_index
 from guillotina.contrib.catalog.pg.indexes import get_pg_indexes
 from guillotina.contrib.catalog.pg.parser import ParsedQueryInfo
+from guillotina.contrib.catalog.pg.utils import load_json
+from guillotina.contrib.catalog.pg.utils import query_shape
 from guillotina.contrib.catalog.pg.utils import sqlq
 from guillotina.db.interfaces import IPostgresStorage
 from guillotina.db.interfaces import ITransaction
@@ -23,25 +28,49 @@ from guillotina.interfaces import IDatabase
 from guillotina.interfaces import IFolder
 from guillotina.interfaces import IPGCatalogUtility
 from guillotina.interfaces import IResource
+from guillotina.interfaces import ISecurityInfo
 from guillotina.interfaces.content import IApplication
 from guillotina.response import HTTPNotImplemented
 from guillotina.transactions import get_transaction
+from guillotina.utils import apply_coroutine
 from guillotina.utils import find_container
 from guillotina.utils import get_authenticated_user
 from guillotina.utils import get_content_path
 from guillotina.utils import get_current_request
 from guillotina.utils import get_current_transaction
+from guillotina.utils import get_object_by_uid
 from guillotina.utils import get_object_url
 from guillotina.utils import get_roles_principal
+from guillotina.utils import get_security_policy
 from zope.interface import implementer
 
+import asyncio
 import asyncpg.exceptions
-import json
+import base64
+import binascii
 import orjson
 import os
+import time
 import typing
 
 
+try:
+    import prometheus_client
+
+    PG_CATALOG_QUERY_TIME = prometheus_client.Histogram(
+        "guillotina_catalog_pg_query_time_seconds",
+        "Histogram of catalog queries time by type and shape of query (in seconds)",
+        labelnames=["type", "shape"],
+    )
+except ImportError:
+    PG_CATALOG_QUERY_TIME = None
+
+
+class watch(metrics.watch):
+    def __init__(self, operation: str, shape: str):
+        super().__init__(histogram=PG_CATALOG_QUERY_TIME, labels={"type": operation, "shape": shape})
+
+
 # 2019-06-15T18:37:31.008359+00:00
 PG_FUNCTIONS = [
     """CREATE OR REPLACE FUNCTION f_cast_isots(text) RETURNS timestamptz AS $$
@@ -54,7 +83,20 @@ exception
         return CAST('1970-01-01T00:00:00Z' AS timestamptz);
 end;
 $$ language plpgsql immutable;
-"""
+""",
+    # text values of a keyword for its generated column
+    """CREATE OR REPLACE FUNCTION f_jsonb_text_array(jsonb) RETURNS text[] AS $$
+begin
+    if $1 is null or jsonb_typeof($1) = 'null' then
+        return null;
+    end if;
+    if jsonb_typeof($1) = 'array' then
+        return array(select jsonb_array_elements_text($1));
+    end if;
+    return array[$1 #>> '{}'];
+end;
+$$ language plpgsql immutable;
+""",
 ]
 
 # Reindex logic
@@ -63,11 +105,87 @@ register_sql(
     f"""
 UPDATE {{table_name}}
 SET
-    json = $2::json
+    json = $2::jsonb
 WHERE
     zoid = $1::varchar({MAX_UID_LENGTH})""",
 )
 
+register_sql(
+    "JSONB_UPDATE_MANY",
+    f"""
+UPDATE {{table_name}} AS o
+SET
+    json = convert_from(v.json, 'UTF8')::jsonb
+FROM unnest($1::varchar({MAX_UID_LENGTH})[], $2::bytea[]) AS v(zoid, json)
+WHERE
+    o.zoid = v.zoid""",
+)
+
+register_sql(
+    "JSONB_MERGE_MANY",
+    f"""
+UPDATE {{table_name}} AS o
+SET
+    json = o.json || convert_from(v.data, 'UTF8')::jsonb
+FROM unnest($1::varchar({MAX_UID_LENGTH})[], $2::bytea[]) AS v(zoid, data)
+WHERE
+    o.zoid = v.zoid AND o.json IS NOT NULL""",
+)
+
+# descendants deeper than this are loaded with following queries
+MAX_SUBTREE_DEPTH = 100
+
+# only what is needed to walk the tree, states are loaded per batch, rows are
+# sorted one level after the other, parents before their children
+register_sql(
+    "GET_SUBTREE",
+    f"""
+WITH RECURSIVE subtree AS (
+    SELECT zoid, id, parent_id, 1 AS depth
+    FROM {{table_name}}
+    WHERE parent_id = $1::varchar({MAX_UID_LENGTH}) AND parent_id != '{TRASHED_ID}'
+  UNION ALL
+    SELECT o.zoid, o.id, o.parent_id, s.depth + 1
+    FROM {{table_name}} o
+    JOIN subtree s ON o.parent_id = s.zoid
+    WHERE s.depth < {MAX_SUBTREE_DEPTH}
+)
+SELECT zoid, id, parent_id, depth
+FROM subtree
+ORDER BY depth""",
+)
+
+# pages on the (parent_id, id) unique index
+register_sql(
+    "REINDEX_CHILDREN_PAGE",
+    f"""
+SELECT zoid, tid, state_size, resource, type, state, id, parent_id, of
+FROM {{table_name}}
+WHERE
+    parent_id = $1::varchar({MAX_UID_LENGTH})
+    AND parent_id != '{TRASHED_ID}'
+    AND id > $2::text
+ORDER BY id
+LIMIT $3::int""",
+)
+
+
+def _encode_after(sort_value: typing.Optional[str], zoid: str) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps([sort_value, zoid])).decode("utf-8")
+
+
+def _decode_after(value: typing.Optional[str]) -> typing.Optional[typing.Tuple]:
+    if not value:
+        return None
+    try:
+        sort_value, zoid = orjson.loads(base64.urlsafe_b64decode(value))
+    except (ValueError, TypeError, binascii.Error):
+        logger.warning(f"Invalid search cursor: {value}")
+        return None
+    if not isinstance(zoid, str) or not isinstance(sort_value, (str, type(None))):
+        return None
+    return sort_value, zoid
+
 
 @implementer(IPGCatalogUtility)
 class PGSearchUtility(DefaultSearchUtility):
@@ -101,7 +219,10 @@ class PGSearchUtility(DefaultSearchUtility):
                     for func in PG_FUNCTIONS:
                         await conn.execute(func)
                     for index in [BasicJsonIndex("container_id")] + [v for v in get_pg_indexes().values()]:
-                        sqls = index.get_index_sql(tm.storage)
+                        if index.column:
+                            sqls = index.get_column_sql(tm.storage)
+                        else:
+                            sqls = index.get_index_sql(tm.storage)
                         for sql in sqls:
                             logger.debug(f"Creating index:\n {sql}")
                             await conn.execute(sql)
@@ -114,7 +235,9 @@ class PGSearchUtility(DefaultSearchUtility):
                     return
                 raise
 
-    def get_default_where_clauses(self, context: IBaseObject) -> typing.List[str]:
+    def _get_principal_users_roles(
+        self, context: IBaseObject
+    ) -> typing.Tuple[typing.List[str], typing.List[str]]:
         users = []
         principal = get_authenticated_user()
         if principal is None:
@@ -123,8 +246,15 @@ class PGSearchUtility(DefaultSearchUtility):
 
         users.append(principal.id)
         users.extend(principal.groups)
-        roles = get_roles_principal(context)
+        return users, list(get_roles_principal(context))
 
+    def get_default_where_clauses(self, context: IBaseObject) -> typing.List[str]:
+        """
+        Security and container conditions of every query with their values
+        inlined. Subclasses overriding it are still used by
+        `get_default_wheres`, at the cost of not sharing the sql of queries.
+        """
+        users, roles = self._get_principal_users_roles(context)
         clauses = [
             "json->'access_users' ?| array['{}']".format("','".join([sqlq(u) for u in users])),
             "json->'access_roles' ?| array['{}']".format("','".join([sqlq(r) for r in roles])),
@@ -139,6 +269,82 @@ class PGSearchUtility(DefaultSearchUtility):
         sql_wheres.append(f"""parent_id != '{sqlq(TRASHED_ID)}'""")
         return sql_wheres
 
+    def get_default_wheres(
+        self, context: IBaseObject, arg_index: int = 1
+    ) -> typing.Tuple[typing.List[str], typing.List[typing.Any]]:
+        """
+        Security and container conditions of every query. Values are passed
+        as arguments so all the queries of the same shape share their sql.
+        """
+        if type(self).get_default_where_clauses is not PGSearchUtility.get_default_where_clauses:
+            return self.get_default_where_clauses(context), []
+
+        users, roles = self._get_principal_users_roles(context)
+        container = find_container(context)
+        if container is None:
+            raise ContainerNotFound()
+
+        sql_wheres = [
+            f"(json->'access_users' ?| ${arg_index}::text[] OR json->'access_roles' ?| ${arg_index + 1}::text[])",
+            f"json->>'container_id' = ${arg_index + 2}::text",
+            "type != 'Container'",
+            f"parent_id != '{sqlq(TRASHED_ID)}'",
+        ]
+        return sql_wheres, [users, roles, container.id]
+
+    def build_wheres(
+        self, query: ParsedQueryInfo, arg_index: int = 1
+    ) -> typing.Tuple[typing.List[str], typing.List[typing.Any]]:
+        sql_arguments = []
+        sql_wheres = []
+        where_arg_index = 0
+        for where in query["wheres"]:
+            if isinstance(where, tuple):
+                operator, sub_wheres = where
+                sub_result = []
+                for sub_where in sub_wheres:
+                    sub_result.append(sub_where.format(arg=arg_index + where_arg_index))
+                    sql_arguments.append(query["wheres_arguments"][where_arg_index])
+                    where_arg_index += 1
+                sql_wheres.append("(" + operator.join(sub_result) + ")")
+            else:
+                sql_wheres.append(where.format(arg=arg_index + where_arg_index))
+                sql_arguments.append(query["wheres_arguments"][where_arg_index])
+                where_arg_index += 1
+        return sql_wheres, sql_arguments
+
+    def build_after_where(
+        self,
+        sort_expression: str,
+        sort_dir: typing.Optional[str],
+        after: typing.Tuple,
+        arg_index: int,
+        sort_type: str = "text",
+    ) -> typing.Tuple[str, typing.List[typing.Any]]:
+        """
+        Keyset condition to get the results sorted after a cursor.
+        Results are ordered by the sort expression and zoid; nulls go last
+        on ascending order and first on descending order.
+        """
+        sort_value, zoid = after
+        value = f"${arg_index}::text" if sort_type == "text" else f"${arg_index}::text::{sqlq(sort_type)}"
+        if sort_dir == "DESC":
+            if sort_value is None:
+                return f"({sort_expression} IS NOT NULL OR zoid < ${arg_index})", [zoid]
+            return (
+                f"({sort_expression} < {value} OR "
+                f"({sort_expression} = {value} AND zoid < ${arg_index + 1}))",
+                [sort_value, zoid],
+            )
+        if sort_value is None:
+            return f"({sort_expression} IS NULL AND zoid > ${arg_index})", [zoid]
+        return (
+            f"({sort_expression} > {value} OR "
+            f"({sort_expression} = {value} AND zoid > ${arg_index + 1}) OR "
+            f"{sort_expression} IS NULL)",
+            [sort_value, zoid],
+        )
+
     def build_query(
         self,
         context: IBaseObject,
@@ -153,7 +359,6 @@ class PGSearchUtility(DefaultSearchUtility):
             order_by_index = get_pg_index(query["sort_on"]) or BasicJsonIndex(query["sort_on"])
 
         sql_arguments = []
-        sql_wheres = []
         arg_index = 1
 
         for idx, select in enumerate(query["selects"]):
@@ -161,25 +366,42 @@ class PGSearchUtility(DefaultSearchUtility):
             sql_arguments.append(query["selects_arguments"][idx])
             arg_index += 1
 
-        where_arg_index = 0
-        for where in query["wheres"]:
-            if isinstance(where, tuple):
-                operator, sub_wheres = where
-                sub_result = []
-                for sub_where in sub_wheres:
-                    sub_result.append(sub_where.format(arg=arg_index + where_arg_index))
-                    sql_arguments.append(query["wheres_arguments"][where_arg_index])
-                    where_arg_index += 1
-                sql_wheres.append("(" + operator.join(sub_result) + ")")
-            else:
-                sql_wheres.append(where.format(arg=arg_index + where_arg_index))
-                sql_arguments.append(query["wheres_arguments"][where_arg_index])
-                where_arg_index += 1
+        sql_wheres, where_arguments = self.build_wheres(query, arg_index)
+        sql_arguments.extend(where_arguments)
+        arg_index += len(where_arguments)
 
         txn = get_transaction()
         if txn is None:
             raise TransactionNotFound()
-        sql_wheres.extend(self.get_default_where_clauses(context))
+        default_wheres, default_arguments = self.get_default_wheres(context, arg_index)
+        sql_wheres.extend(default_wheres)
+        sql_arguments.extend(default_arguments)
+        arg_index += len(default_arguments)
+
+        offset = query["_from"]
+        keyset = not distinct and not query["sort_on_fields"]
+        if keyset:
+            # cursors keep the sort value as text
+            sort_value = order_by_index.sort_expression()
+            if order_by_index.sort_type != "text":
+                sort_value = f"({sort_value})::text"
+            select_fields.append(f"{sort_value} AS sort_value")
+        after = _decode_after(query.get("after")) if keyset else None
+        if after is not None:
+            where, after_arguments = self.build_after_where(
+                order_by_index.sort_expression(),
+                query["sort_dir"],
+                after,
+                arg_index,
+                order_by_index.sort_type,
+            )
+            sql_wheres.append(where)
+            sql_arguments.extend(after_arguments)
+            arg_index += len(after_arguments)
+            offset = 0
+        elif query.get("count", "exact") == "exact":
+            # count all the results with the same query
+            select_fields.append("count(*) OVER() AS full_count")
 
         order = (
             order_by_index.order_by_score(query["sort_dir"])
@@ -190,41 +412,133 @@ class PGSearchUtility(DefaultSearchUtility):
                  from {}
                  where {}
                  {}
-                 limit {} offset {}""".format(
+                 limit ${}::int offset ${}::int""".format(
             "distinct" if distinct else "",
             ",".join(select_fields),
             sqlq(txn.storage.objects_table_name),
             " AND ".join(sql_wheres),
-            "" if distinct else order,
-            sqlq(query["size"]),
-            sqlq(query["_from"]),
+            "" if distinct else f"{order}, zoid {sqlq(query['sort_dir'])}",
+            arg_index,
+            arg_index + 1,
         )
+        sql_arguments.extend([query["size"], offset])
         return sql, sql_arguments
 
     def build_count_query(
-        self, context, query: ParsedQueryInfo
+        self, context, query: ParsedQueryInfo, estimate: bool = False
     ) -> typing.Tuple[str, typing.List[typing.Any]]:
-        sql_arguments = []
-        sql_wheres = []
-        select_fields = ["count(*)"]
-        arg_index = 1
-        for idx, where in enumerate(query["wheres"]):
-            sql_wheres.append(where.format(arg=arg_index))
-            sql_arguments.append(query["wheres_arguments"][idx])
-            arg_index += 1
-
-        sql_wheres.extend(self.get_default_where_clauses(context))
+        """
+        Query counting all the results, or getting the planner estimate of
+        the number of results with `estimate`
+        """
+        sql_wheres, sql_arguments = self.build_wheres(query)
+        default_wheres, default_arguments = self.get_default_wheres(context, len(sql_arguments) + 1)
+        sql_wheres.extend(default_wheres)
+        sql_arguments.extend(default_arguments)
 
         txn = get_transaction()
         if txn is None:
             raise TransactionNotFound()
-        sql = """select {}
+        sql = """{}select {}
                  from {}
                  where {}""".format(
-            ",".join(select_fields), sqlq(txn.storage.objects_table_name), " AND ".join(sql_wheres)
+            "EXPLAIN (FORMAT JSON) " if estimate else "",
+            "zoid" if estimate else "count(*)",
+            sqlq(txn.storage.objects_table_name),
+            " AND ".join(sql_wheres),
         )
         return sql, sql_arguments
 
+    def build_facets_query(
+        self, context: IBaseObject, query: ParsedQueryInfo
+    ) -> typing.Tuple[str, typing.List[typing.Any]]:
+        """
+        Count the results of a query by value of every facet and keep the
+        `facets_size` most common values of each one, in one statement
+        """
+        sql_wheres, sql_arguments = self.build_wheres(query)
+        default_wheres, default_arguments = self.get_default_wheres(context, len(sql_arguments) + 1)
+        sql_wheres.extend(default_wheres)
+        sql_arguments.extend(default_arguments)
+
+        txn = get_transaction()
+        if txn is None:
+            raise TransactionNotFound()
+        # only the values the facets are counted by, not the whole rows
+        columns = ["json"]
+        facet_values = []
+        for facet in query["facets"] or []:
+            index = get_pg_index(facet) or BasicJsonIndex(facet)
+            if index.column and sqlq(index.column_name) not in columns:
+                columns.append(sqlq(index.column_name))
+            facet_values.append(
+                f"SELECT '{sqlq(facet)}'::text AS facet, {index.facet_expression()} AS value FROM results"
+            )
+        sql = """WITH results AS (
+                     select {} from {}
+                     where {}
+                 )
+                 select facet, value, count, total from (
+                     select facet, value, count(*) AS count,
+                            count(*) OVER(PARTITION BY facet) AS total,
+                            row_number() OVER(PARTITION BY facet ORDER BY count(*) DESC, value) AS rank
+                     from ({}) AS facet_values
+                     where value IS NOT NULL
+                     group by facet, value
+                 ) AS counts
+                 where rank <= ${}::int
+                 order by facet, rank""".format(
+            ", ".join(columns),
+            sqlq(txn.storage.objects_table_name),
+            " AND ".join(sql_wheres),
+            " UNION ALL ".join(facet_values),
+            len(sql_arguments) + 1,
+        )
+        sql_arguments.append(query["facets_size"])
+        return sql, sql_arguments
+
+    async def facets(self, context: IBaseObject, query: ParsedQueryInfo):
+        if not query.get("facets"):
+            return {}
+        sql, arguments = self.build_facets_query(context, query)
+        txn = get_transaction()
+        if txn is None:
+            raise TransactionNotFound()
+        result: typing.Dict[str, typing.Any] = {
+            facet: {"items": {}, "total": 0} for facet in query["facets"] or []
+        }
+        for record in await self._fetch(txn, sql, arguments, "facets"):
+            result[record["facet"]]["items"][record["value"]] = record["count"]
+            result[record["facet"]]["total"] = record["total"]
+        return result
+
+    async def get_total(
+        self, context, query: ParsedQueryInfo, records: typing.List[typing.Any], total: int
+    ) -> typing.Optional[int]:
+        """
+        Number of results of a query for its count mode: `exact`, `estimate`
+        or `none`
+        """
+        count = query.get("count", "exact")
+        if count == "none":
+            return None
+        if len(records) > 0 and "full_count" in records[0].keys():
+            return records[0]["full_count"]
+        if total < query["size"] and query["_from"] == 0 and not query.get("after"):
+            return total
+
+        sql, arguments = self.build_count_query(context, query, estimate=count == "estimate")
+        txn = get_transaction()
+        if txn is None:
+            raise TransactionNotFound()
+        records = await self._fetch(txn, sql, arguments, "estimate" if count == "estimate" else "count")
+        if count == "estimate":
+            plan = records[0][0]
+            if isinstance(plan, str):
+                plan = orjson.loads(plan)
+            return int(plan[0]["Plan"]["Plan Rows"])
+        return records[0]["count"]
+
     def load_meatdata(self, query: ParsedQueryInfo, data: typing.Dict[str, typing.Any]):
         metadata: typing.Dict[str, typing.Any] = {}
         if query["metadata"] is None:
@@ -248,23 +562,32 @@ class PGSearchUtility(DefaultSearchUtility):
         txn = get_transaction()
         if txn is None:
             raise TransactionNotFound()
-        conn = await txn.get_connection()
 
         results = []
-        logger.debug(f"Running search:\n{sql}\n{arguments}")
-        async with txn.lock:
-            records = await conn.fetch(sql, *arguments)
+        records = await self._fetch(txn, sql, arguments, "aggregation")
         for record in records:
-            results.append([json.loads(record[field]) for field in query["metadata"] or []])
+            results.append([load_json(record[field]) for field in query["metadata"] or []])
 
-        total = len(results)
-        if total >= query["size"] or query["_from"] != 0:
-            sql, arguments = self.build_count_query(context, query)
-            logger.debug(f"Running search:\n{sql}\n{arguments}")
-            async with txn.lock:
-                records = await conn.fetch(sql, *arguments)
-            total = records[0]["count"]
-        return {"items": results, "items_total": total}
+        result: typing.Dict[str, typing.Any] = {"items": results}
+        total = await self.get_total(context, query, records, len(results))
+        if total is not None:
+            result["items_total"] = total
+        return result
+
+    async def _fetch(
+        self, txn: ITransaction, sql: str, arguments: typing.List[typing.Any], operation: str
+    ) -> typing.List[typing.Any]:
+        """
+        Run a catalog query, timed by type and shape of query. Queries are
+        built with arguments for all their values so their statements are
+        reused from the connection statement cache.
+        """
+        shape = query_shape(sql)
+        logger.debug(f"Running search ({shape}):\n{sql}\n{arguments}")
+        conn = await txn.get_connection()
+        async with txn.lock:
+            with watch(operation, shape):
+                return await conn.fetch(sql, *arguments)
 
     async def search_raw(self, context: IBaseObject, query: typing.Any):
         """
@@ -279,12 +602,104 @@ class PGSearchUtility(DefaultSearchUtility):
         parsed_query = parse_query(context, query, self)
         return await self._query(context, parsed_query)  # type: ignore
 
+    async def _load_results(
+        self,
+        txn: typing.Optional[ITransaction],
+        query: ParsedQueryInfo,
+        records: typing.List[typing.Any],
+        context_url: typing.Optional[str],
+        request,
+    ) -> typing.List[typing.Dict[str, typing.Any]]:
+        results = []
+        fullobjects = query["fullobjects"] and request is not None
+        if fullobjects and txn is not None:
+            # Get all the objects with one query
+            objects = {ob.__uuid__: ob for ob in await txn.get_many([record["zoid"] for record in records])}
+            # and their parents, shared by siblings, to check permissions
+            parents: typing.Dict[str, typing.Optional[IBaseObject]] = {}
+            for record in records:
+                obj = objects.get(record["zoid"])
+                if obj is None or obj.__parent__ is not None:
+                    continue
+                parent_id = record["parent_id"]
+                if parent_id not in parents:
+                    try:
+                        parents[parent_id] = await get_object_by_uid(parent_id, txn)
+                    except KeyError:
+                        parents[parent_id] = None
+                if parents[parent_id] is None:
+                    del objects[record["zoid"]]
+                else:
+                    obj.__parent__ = parents[parent_id]
+            policy = get_security_policy()
+            objects = {
+                ob.__uuid__: ob for ob in policy.filter_allowed("guillotina.AccessContent", objects.values())
+            }
+        for record in records:
+            data = load_json(record["json"])
+            if fullobjects and txn is not None:
+                obj = objects.get(record["zoid"])
+                if obj is None:
+                    # removed after the search was run
+                    continue
+                # Serialize object
+                view = DefaultGET(obj, request)
+                result = await view()
+            else:
+                result = self.load_meatdata(query, data)
+                result["@name"] = record["id"]
+                result["@uid"] = record["zoid"]
+                result["@id"] = data["@absolute_url"] = context_url + data["path"]
+            results.append(result)
+        return results
+
+    async def stream(self, context: IBaseObject, query: typing.Any) -> typing.AsyncIterator[typing.Dict]:
+        """
+        Iterate over the results of a search query, read from a server
+        side cursor in batches of `catalog_stream_batch_size` so memory
+        does not grow with the number of results. Results are not limited
+        to a page unless `_size` is set.
+        """
+        limited = "_size" in query
+        parsed_query = typing.cast(ParsedQueryInfo, parse_query(context, query, self))
+        if not limited:
+            # limit NULL, all the results
+            parsed_query["size"] = typing.cast(int, None)
+        parsed_query["count"] = "none"
+        sql, arguments = self.build_query(context, parsed_query, ["id", "zoid", "json", "parent_id"])
+
+        txn = get_transaction()
+        if txn is None:
+            raise TransactionNotFound()
+        container = find_container(context)
+        if container is None:
+            raise ContainerNotFound()
+        try:
+            context_url = get_object_url(container)
+            request = get_current_request()
+        except RequestNotFound:
+            context_url = get_content_path(container)
+            request = None
+
+        shape = query_shape(sql)
+        logger.debug(f"Running search stream ({shape}):\n{sql}\n{arguments}")
+        batch_size = app_settings.get("catalog_stream_batch_size", 500)
+        conn = await txn.get_connection()
+        async with conn.transaction():
+            async with txn.lock:
+                cursor = await conn.cursor(sql, *arguments)
+            while True:
+                async with txn.lock:
+                    with watch("stream", shape):
+                        records = await cursor.fetch(batch_size)
+                for result in await self._load_results(txn, parsed_query, records, context_url, request):
+                    yield result
+                if len(records) < batch_size:
+                    break
+
     async def _query(self, context: IResource, query: ParsedQueryInfo):
-        sql, arguments = self.build_query(context, query, ["id", "zoid", "json"])
+        sql, arguments = self.build_query(context, query, ["id", "zoid", "json", "parent_id"])
         txn = get_current_transaction()
-        conn = await txn.get_connection()
-        results = []
-        fullobjects = query["fullobjects"]
         container = find_container(context)
         if container is None:
             raise ContainerNotFound()
@@ -296,34 +711,19 @@ class PGSearchUtility(DefaultSearchUtility):
             context_url = get_content_path(container)
             request = None
 
-        logger.debug(f"Running search:\n{sql}\n{arguments}")
+        records = await self._fetch(txn, sql, arguments, "search")
+        results = await self._load_results(txn, query, records, context_url, request)
 
-        async with txn.lock:
-            records = await conn.fetch(sql, *arguments)
-        for record in records:
-            data = json.loads(record["json"])
-            if fullobjects and request is not None and txn is not None:
-                # Get Object
-                obj = await txn.get(data["uuid"])
-                # Serialize object
-                view = DefaultGET(obj, request)
-                result = await view()
-            else:
-                result = self.load_meatdata(query, data)
-                result["@name"] = record["id"]
-                result["@uid"] = record["zoid"]
-                result["@id"] = data["@absolute_url"] = context_url + data["path"]
-            results.append(result)
-
-        # also do count...
-        total = len(results)
-        if total >= query["size"] or query["_from"] != 0:
-            sql, arguments = self.build_count_query(context, query)
-            logger.debug(f"Running search:\n{sql}\n{arguments}")
-            async with txn.lock:
-                records = await conn.fetch(sql, *arguments)
-            total = records[0]["count"]
-        return {"items": results, "items_total": total}
+        response: typing.Dict[str, typing.Any] = {"items": results}
+        total = await self.get_total(context, query, records, len(results))
+        if total is not None:
+            response["items_total"] = total
+        if query.get("facets"):
+            response["facets"] = await self.facets(context, query)
+        if 0 < query["size"] <= len(records) and "sort_value" in records[-1].keys():
+            # cursor to get the next results with `_after`
+            response["_after"] = _encode_after(records[-1]["sort_value"], records[-1]["zoid"])
+        return response
 
     async def index(self, container, datas):
         """
@@ -337,55 +737,221 @@ class PGSearchUtility(DefaultSearchUtility):
 
     async def reindex_all_content(self, container, security=False):
         """
-        recursively go through all content to reindex jsonb...
-        """
+        Recompute the jsonb catalog data of the container and all its content.
 
-        data = {"count": 0, "transaction": None, "transactions": 0, "tm": get_current_transaction()._manager}
+        Children are paged per folder in `catalog_reindex_batch_size` rows and
+        their catalog json is written back with one statement per batch, each
+        batch in its own transaction. `catalog_reindex_workers` folders are
+        processed concurrently, every worker with its own connection.
 
+        With `security`, only the security information (`ISecurityInfo`) of
+        the catalog json is updated, see `_reindex_security`.
+        """
+        tm = get_current_transaction()._manager
         try:
-            data["table_name"] = data["tm"]._storage._objects_table_name
+            table_name = tm._storage._objects_table_name
         except AttributeError:
             # Not supported DB
             return
 
-        data["transaction"] = await data["tm"].begin()
-        container.__txn__ = data["transaction"]
-        await self._process_object(container, data)
-        if IFolder.providedBy(container):
-            await self._process_folder(container, data)
-        await data["tm"].commit(txn=data["transaction"])
-
-    async def _process_folder(self, obj, data):
-        for key in await obj.async_keys():
-            try:
-                item = await data["transaction"].get_child(obj, key)
-            except (KeyError, ModuleNotFoundError):
-                continue
-            if item is None:
-                continue
-            await self._process_object(item, data)
-
-    async def _process_object(self, obj, data):
+        data = {
+            "count": 0,
+            "tm": tm,
+            "table_name": table_name,
+            "batch_size": app_settings.get("catalog_reindex_batch_size", 200),
+            "start": time.time(),
+        }
+        if security:
+            await self._reindex_security(container, data)
+            return
 
-        if data["count"] % 200 == 0:
-            await data["tm"].commit(txn=data["transaction"])
-            data["transaction"] = await data["tm"].begin()
-            obj.__txn__ = data["transaction"]
+        folders: asyncio.Queue = asyncio.Queue()
+        if IFolder.providedBy(container):
+            folders.put_nowait(container)
+        workers = [
+            asyncio.ensure_future(self._reindex_worker(folders, data, [container] if idx == 0 else []))
+            for idx in range(max(app_settings.get("catalog_reindex_workers", 1), 1))
+        ]
+        join = asyncio.ensure_future(folders.join())
+        try:
+            await asyncio.wait([join] + workers, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            if join.done():
+                for _ in workers:
+                    folders.put_nowait(None)
+            else:
+                # a worker failed or we were cancelled
+                join.cancel()
+                for worker in workers:
+                    worker.cancel()
+        for result in await asyncio.gather(*workers, return_exceptions=True):
+            if isinstance(result, BaseException) and not isinstance(result, asyncio.CancelledError):
+                raise result
+        logger.info(f"Reindexed {data['count']} objects in {time.time() - data['start']:.2f}s")
+
+    async def _reindex_security(self, context, data):
+        """
+        Update the security information keys (path, access_roles, access_users...)
+        of the catalog json of the context and all its descendants.
 
-        uuid = obj.__uuid__
+        Descendants are walked with one recursive query every `MAX_SUBTREE_DEPTH`
+        levels, read from a cursor of a read only transaction. Their objects are
+        loaded and updated in batches, each batch in its own transaction.
+        """
+        tm = data["tm"]
+        walk_txn = await tm.begin(read_only=True)
+        data["transaction"] = await tm.begin()
+        try:
+            data["skipped"] = 0
+            await self._reindex_security_batch([context], data)
+            conn = await walk_txn.get_connection()
+            select_sql = walk_txn.storage._sql.get("GET_SUBTREE", data["table_name"])
+            # folders at the maximum depth of the query are the roots of following ones
+            roots = [context]
+            async with conn.transaction():
+                while len(roots) > 0:
+                    root = roots.pop()
+                    # only the objects of the previous level can be parents
+                    parents = {root.__uuid__: root}
+                    folders: typing.Dict[str, IBaseObject] = {}
+                    depth = 1
+                    async with walk_txn.lock:
+                        cursor = await conn.cursor(select_sql, root.__uuid__)
+                    while True:
+                        async with walk_txn.lock:
+                            records = await cursor.fetch(data["batch_size"])
+                        txn = data["transaction"]
+                        items = await txn._get_many([record["zoid"] for record in records])
+                        pending = []
+                        for record in records:
+                            if record["depth"] > depth:
+                                parents, folders, depth = folders, {}, record["depth"]
+                            parent = parents.get(record["parent_id"])
+                            if parent is None or record["zoid"] not in items:
+                                # its parent could not be loaded or is not a folder
+                                data["skipped"] += 1
+                                continue
+                            try:
+                                obj = txn._fill_object(items[record["zoid"]], parent)
+                            except ModuleNotFoundError:
+                                data["skipped"] += 1
+                                continue
+                            if IFolder.providedBy(obj):
+                                if depth < MAX_SUBTREE_DEPTH:
+                                    folders[obj.__uuid__] = obj
+                                else:
+                                    roots.append(obj)
+                            pending.append(obj)
+                        await self._reindex_security_batch(pending, data)
+                        if len(records) < data["batch_size"]:
+                            break
+            await tm.commit(txn=data["transaction"])
+        except BaseException:
+            await tm.abort(txn=data["transaction"])
+            raise
+        finally:
+            await tm.abort(txn=walk_txn)
+        if data["skipped"] > 0:
+            logger.warning(f"Skipped {data['skipped']} objects without a loadable parent reindexing security")
+        elapsed = time.time() - data["start"]
+        logger.info(f"Reindexed security of {data['count']} objects in {elapsed:.2f}s")
+
+    async def _reindex_security_batch(self, objs, data):
+        """
+        Write the security information of a batch of objects and commit it
+        """
+        txn = data["transaction"]
+        oids = []
+        values = []
+        for obj in objs:
+            adapter = query_adapter(obj, ISecurityInfo)
+            if adapter is not None:
+                oids.append(obj.__uuid__)
+                values.append(orjson.dumps(await apply_coroutine(adapter)))
+        data["count"] += len(objs)
+        if len(oids) == 0:
+            return
+        update_sql = txn.storage._sql.get("JSONB_MERGE_MANY", data["table_name"])
+        conn = await txn.get_connection()
+        async with txn.lock:
+            await conn.execute(update_sql, oids, values)
+        await data["tm"].commit(txn=txn)
+        data["transaction"] = await data["tm"].begin()
 
-        writer = IWriter(obj)
-        await self._index(uuid, writer, data["transaction"], data["table_name"])
+    async def _reindex_worker(self, folders: asyncio.Queue, data, pending):
+        worker = {"transaction": await data["tm"].begin(), "pending": pending}
+        try:
+            while True:
+                try:
+                    folder = folders.get_nowait()
+                except asyncio.QueueEmpty:
+                    # do not hold objects while waiting for other workers
+                    await self._reindex_flush(worker, data)
+                    folder = await folders.get()
+                if folder is None:
+                    break
+                try:
+                    await self._reindex_children(folder, folders, worker, data)
+                finally:
+                    folders.task_done()
+            await self._reindex_flush(worker, data)
+            await data["tm"].commit(txn=worker["transaction"])
+        except BaseException:
+            await data["tm"].abort(txn=worker["transaction"])
+            raise
+
+    async def _reindex_children(self, folder, folders: asyncio.Queue, worker, data):
+        sql = worker["transaction"].storage._sql.get("REINDEX_CHILDREN_PAGE", data["table_name"])
+        last_id = ""
+        while True:
+            txn = worker["transaction"]
+            conn = await txn.get_connection()
+            async with txn.lock:
+                records = await conn.fetch(sql, folder.__uuid__, last_id, data["batch_size"])
+            for record in records:
+                try:
+                    obj = worker["transaction"]._fill_object(record, folder)
+                except ModuleNotFoundError:
+                    continue
+                if IFolder.providedBy(obj):
+                    folders.put_nowait(obj)
+                worker["pending"].append(obj)
+                if len(worker["pending"]) >= data["batch_size"]:
+                    await self._reindex_flush(worker, data)
+            if len(records) < data["batch_size"]:
+                break
+            last_id = records[-1]["id"]
+
+    async def _reindex_flush(self, worker, data):
+        objs = worker["pending"]
+        if len(objs) == 0:
+            return
+        worker["pending"] = []
 
-        data["count"] += 1
+        txn = worker["transaction"]
+        oids = []
+        values = []
+        for obj in objs:
+            json_dict = await IWriter(obj).get_json()
+            oids.append(obj.__uuid__)
+            values.append(orjson.dumps(json_dict))
 
-        if IFolder.providedBy(obj):
-            await self._process_folder(obj, data)
-        del obj
+        statement_sql = txn.storage._sql.get("JSONB_UPDATE_MANY", data["table_name"])
+        conn = await txn.get_connection()
+        async with txn.lock:
+            await conn.execute(statement_sql, oids, values)
+        await data["tm"].commit(txn=txn)
+        worker["transaction"] = await data["tm"].begin()
+
+        data["count"] += len(objs)
+        elapsed = time.time() - data["start"]
+        logger.info(
+            f"Reindexed {data['count']} objects in {elapsed:.2f}s ({data['count'] / elapsed:.2f} objects/s)"
+        )
 
     async def _index(self, oid, writer, txn: ITransaction, table_name):
         json_dict = await writer.get_json()
-        json_value = orjson.dumps(json_dict).decode("utf-8")
+        json_value = txn.storage.json_parameter(json_dict)
 
         statement_sql = txn.storage._sql.get("JSONB_UPDATE", table_name)
         conn = await txn.get_connection()
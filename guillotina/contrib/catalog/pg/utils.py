@@ -1,4 +1,15 @@
+from guillotina.contrib.catalog.pg import logger
+
+import hashlib
+import orjson
+import typing
+
+
+# number of query shapes tracked, others are reported together
+MAX_QUERY_SHAPES = 500
+
 _sql_replacements = (("'", "''"), ("\\", "\\\\"), ("\x00", ""))
+_query_shapes: typing.Dict[str, str] = {}
 
 
 def sqlq(v):
@@ -13,3 +24,27 @@ def sqlq(v):
     for value, replacement in _sql_replacements:
         v = v.replace(value, replacement)
     return v
+
+
+def load_json(value: typing.Any) -> typing.Any:
+    """
+    Value of a jsonb column, decoded by the jsonb codec of the connections
+    or as text when it is not registered
+    """
+    if isinstance(value, str):
+        return orjson.loads(value)
+    return value
+
+
+def query_shape(sql: str) -> str:
+    """
+    Identifier of a statement, queries only differing on their arguments
+    share it. After `MAX_QUERY_SHAPES` new statements are reported as `other`.
+    """
+    shape = _query_shapes.get(sql)
+    if shape is None:
+        if len(_query_shapes) >= MAX_QUERY_SHAPES:
+            return "other"
+        shape = _query_shapes[sql] = hashlib.sha1(sql.encode("utf-8")).hexdigest()[:12]
+        logger.info(f"New catalog query shape {shape}:\n{sql}")
+    return shape
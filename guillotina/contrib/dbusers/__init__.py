@@ -14,6 +14,15 @@ app_settings = {
         }
     },
     "min_username_length": 3,
+    "load_utilities": {
+        "dbusers_principal_cache": {
+            "provides": "guillotina.contrib.dbusers.interfaces.IPrincipalCache",
+            "factory": "guillotina.contrib.dbusers.cache.PrincipalCache",
+            # seconds users are cached, 0 disables the cache, and maximum
+            # number of cached users
+            "settings": {"ttl": 0, "size": 1000},
+        }
+    },
 }
 
 
@@ -0,0 +1,156 @@
+from guillotina import app_settings
+from guillotina.component import query_utility
+from guillotina.contrib.dbusers.interfaces import IPrincipalCache
+from guillotina.interfaces import IPubSubUtility
+from guillotina.transactions import get_transaction
+from lru import LRU
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+
+import asyncio
+import hashlib
+import logging
+import orjson
+import pickle
+import time
+import uuid
+
+
+logger = logging.getLogger("guillotina.contrib.dbusers")
+
+
+def get_dependency_key(oid: str, variant: Optional[str] = None) -> str:
+    """
+    Key the cache strategy invalidates when the object with this oid
+    changes, or its children with the `keys` variant
+    """
+    txn = get_transaction()
+    key = "{}-{}".format(getattr(getattr(txn, "manager", None), "db_id", "root"), oid)
+    if variant is not None:
+        key += "-" + variant
+    return key
+
+
+def get_record(obj) -> Dict[str, Any]:
+    """
+    Record of an object to cache it apart from the transaction and parents
+    it was loaded with, see `Transaction._fill_object`
+    """
+    return {
+        "zoid": obj.__uuid__,
+        "tid": obj.__serial__,
+        "id": obj.__name__,
+        "state": pickle.dumps(obj, protocol=app_settings.get("pickle_protocol", pickle.HIGHEST_PROTOCOL)),
+    }
+
+
+def invalidate_on_commit(keys: List[str]) -> None:
+    """
+    Drop the cached users depending on these keys once the current
+    transaction is committed
+    """
+    cache = query_utility(IPrincipalCache)
+    txn = get_transaction()
+    if cache is None or txn is None:
+        return
+    txn.add_after_commit_hook(_invalidate_hook, cache, keys)
+
+
+def _invalidate_hook(status, cache, keys):
+    cache.invalidate(keys)
+
+
+class PrincipalCache:
+    """
+    Records of the users, and of their groups, resolved by `DBUserIdentifier`
+    kept `ttl` seconds by container, user id and token claims. Every request
+    gets its own objects built from them.
+
+    Users are dropped once a transaction changing them or their groups
+    is committed by this process, and with the invalidations other
+    processes publish on the cache `updates_channel`. Nothing is cached
+    with a `ttl` of 0, the default.
+    """
+
+    def __init__(self, settings=None, loop=None):
+        settings = settings or {}
+        self._ttl = settings.get("ttl", 0)
+        self._entries = LRU(settings.get("size", 1000), callback=self._evicted)
+        # dependency key -> keys of the users depending on it
+        self._dependencies: Dict[str, Set[str]] = {}
+        self._subscriber: Optional[IPubSubUtility] = None
+        self._uid = uuid.uuid4().hex
+
+    async def initialize(self, app=None):
+        channel = app_settings.get("cache", {}).get("updates_channel")
+        subscriber = query_utility(IPubSubUtility)
+        if channel and subscriber is not None:
+            await subscriber.initialized()
+            await subscriber.subscribe(channel, self._uid, self.receive)
+            self._subscriber = subscriber
+
+    async def finalize(self, app=None):
+        if self._subscriber is not None:
+            try:
+                await self._subscriber.unsubscribe(app_settings["cache"]["updates_channel"], self._uid)
+            except (asyncio.CancelledError, RuntimeError):
+                # task cancelled, let it die
+                pass
+            self._subscriber = None
+        self.clear()
+
+    def get_key(self, container, token: Dict[str, Any]) -> str:
+        claims = hashlib.sha1(orjson.dumps(token, option=orjson.OPT_SORT_KEYS, default=str)).hexdigest()
+        return f"{container.__uuid__}/{token.get('id')}/{claims}"
+
+    def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, records, dependencies = entry
+        if expires < time.time():
+            del self._entries[key]
+            self._forget(key, dependencies)
+            return None
+        return records
+
+    def set(self, key: str, records, dependencies: List[str]) -> None:
+        if self._ttl <= 0:
+            return
+        self._entries[key] = (time.time() + self._ttl, records, dependencies)
+        for dependency in dependencies:
+            self._dependencies.setdefault(dependency, set()).add(key)
+
+    def invalidate(self, keys: List[str]) -> None:
+        for dependency in keys:
+            for key in self._dependencies.pop(dependency, ()):
+                entry = self._entries.get(key)
+                if entry is not None:
+                    del self._entries[key]
+                    self._forget(key, entry[2])
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._dependencies.clear()
+
+    async def receive(self, *, data=None, sender=None):
+        # invalidations published by the cache of other processes
+        if isinstance(data, dict) and isinstance(data.get("keys"), list):
+            self.invalidate(data["keys"])
+
+    def _evicted(self, key, entry):
+        self._forget(key, entry[2])
+
+    def _forget(self, key: str, dependencies: List[str]) -> None:
+        for dependency in dependencies:
+            keys = self._dependencies.get(dependency)
+            if keys is not None:
+                keys.discard(key)
+                if len(keys) == 0:
+                    del self._dependencies[dependency]
+
+    def __len__(self):
+        return len(self._entries)
@@ -2,6 +2,8 @@ from guillotina import configure
 from guillotina import schema
 from guillotina.content import Folder
 from guillotina.contrib.dbusers import _
+from guillotina.contrib.dbusers.cache import get_dependency_key
+from guillotina.contrib.dbusers.cache import invalidate_on_commit
 from guillotina.directives import index_field
 from guillotina.interfaces import IFolder
 from guillotina.interfaces import IPrincipal
@@ -54,6 +56,10 @@ class Group(Folder):
     def properties(self):
         return {}
 
+    def register(self, prefer_local=False):
+        super().register(prefer_local)
+        invalidate_on_commit([get_dependency_key(self.__uuid__)])
+
 
 @implementer(IGroupManager)
 @configure.contenttype(
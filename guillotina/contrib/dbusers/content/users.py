@@ -4,6 +4,8 @@ from guillotina.auth.validators import check_password
 from guillotina.auth.validators import hash_password
 from guillotina.content import Folder
 from guillotina.contrib.dbusers import _
+from guillotina.contrib.dbusers.cache import get_dependency_key
+from guillotina.contrib.dbusers.cache import invalidate_on_commit
 from guillotina.directives import index_field
 from guillotina.directives import read_permission
 from guillotina.directives import write_permission
@@ -88,6 +90,10 @@ class User(Folder):
     def _properties(self):
         return {}
 
+    def register(self, prefer_local=False):
+        super().register(prefer_local)
+        invalidate_on_commit([get_dependency_key(self.__uuid__)])
+
     async def set_password(self, new_password, old_password=None):
         if old_password is not None:
             valid = check_password(self.password, old_password)
@@ -1,5 +1,28 @@
+from guillotina.interfaces import IAsyncUtility
 from zope.interface import Interface
 
 
 class IDBUsersLayer(Interface):
     """Marker interface layer for db users"""
+
+
+class IPrincipalCache(IAsyncUtility):
+    """
+    Records of the users and groups resolved by the db users identifier
+    """
+
+    def get(key):
+        """
+        Cached user records or None
+        """
+
+    def set(key, records, dependencies):
+        """
+        Cache the records of a user and its groups until any of the cache
+        keys of its dependencies is invalidated
+        """
+
+    def invalidate(keys):
+        """
+        Drop the users depending on these cache keys
+        """
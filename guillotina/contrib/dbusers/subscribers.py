@@ -2,6 +2,8 @@ from .content.groups import Group
 from .content.users import User
 from guillotina import configure
 from guillotina.auth.validators import hash_password
+from guillotina.contrib.dbusers.cache import get_dependency_key
+from guillotina.contrib.dbusers.cache import invalidate_on_commit
 from guillotina.contrib.dbusers.content.groups import IGroup
 from guillotina.contrib.dbusers.content.users import IUser
 from guillotina.event import notify
@@ -37,6 +39,7 @@ async def on_user_added(user: User, event) -> None:
 @configure.subscriber(for_=(IUser, IBeforeObjectRemovedEvent))
 async def on_user_removed(user: User, event) -> None:
     await _update_groups(user.id, [], user.groups)
+    invalidate_on_commit([get_dependency_key(user.__uuid__)])
 
 
 @configure.subscriber(for_=(IUser, IBeforeObjectModifiedEvent))
@@ -54,11 +57,15 @@ async def on_user_modified(user: User, event: BeforeObjectModifiedEvent) -> None
 @configure.subscriber(for_=(IGroup, IObjectAddedEvent))
 async def on_group_added(group: Group, event: ObjectAddedEvent) -> None:
     await _update_users(group.id, group.users, [])
+    if group.__parent__ is not None:
+        # users cached before their groups existed
+        invalidate_on_commit([get_dependency_key(group.__parent__.__uuid__, "keys")])
 
 
 @configure.subscriber(for_=(IGroup, IBeforeObjectRemovedEvent))
 async def on_group_removed(group: Group, event: ObjectAddedEvent) -> None:
     await _update_users(group.id, [], group.users)
+    invalidate_on_commit([get_dependency_key(group.__uuid__)])
 
 
 @configure.subscriber(for_=(IGroup, IBeforeObjectModifiedEvent))
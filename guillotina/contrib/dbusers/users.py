@@ -1,6 +1,9 @@
 from .services.utils import NoCatalogException
 from guillotina.component import query_utility
 from guillotina.contrib.catalog.pg.utility import PGSearchUtility
+from guillotina.contrib.dbusers.cache import get_dependency_key
+from guillotina.contrib.dbusers.cache import get_record
+from guillotina.contrib.dbusers.interfaces import IPrincipalCache
 from guillotina.exceptions import ContainerNotFound
 from guillotina.exceptions import TransactionNotFound
 from guillotina.interfaces import IPrincipal
@@ -20,15 +23,30 @@ class DBUserIdentifier:
         """
         try:
             container = get_current_container()
-            users = await container.async_get("users")
-        except (AttributeError, KeyError, ContainerNotFound):
+        except ContainerNotFound:
             return None
 
         user_id = token.get("id", "")
+        try:
+            users = await container.async_get("users")
+        except (AttributeError, KeyError):
+            return None
+
         if not user_id:
             # No user id in the token
             return None
 
+        cache = query_utility(IPrincipalCache)
+        txn = get_transaction()
+        cache_key = None
+        if cache is not None and txn is not None:
+            cache_key = cache.get_key(container, token)
+            records = cache.get(cache_key)
+            if records is not None:
+                user = await self._load_cached(container, users, txn, *records)
+                if user is not None:
+                    return user
+
         if not await users.async_contains(user_id):
             # User id does not correspond to any existing user folder
             return None
@@ -39,12 +57,38 @@ class DBUserIdentifier:
             return None
 
         # Load groups into cache
+        dependencies = [get_dependency_key(user.__uuid__)]
         for ident in user.groups:
             try:
-                user._groups_cache[ident] = await navigate_to(container, f"groups/{ident}")
+                group = user._groups_cache[ident] = await navigate_to(container, f"groups/{ident}")
+                dependencies.append(get_dependency_key(group.__uuid__))
             except KeyError:
+                # until the group is added
+                try:
+                    groups = await container.async_get("groups")
+                    dependencies.append(get_dependency_key(groups.__uuid__, "keys"))
+                except (AttributeError, KeyError):
+                    pass
                 continue
 
+        if cache_key is not None:
+            group_records = [(ident, get_record(group)) for ident, group in user._groups_cache.items()]
+            cache.set(cache_key, (get_record(user), group_records), dependencies)
+        return user
+
+    async def _load_cached(self, container, users, txn, user_record, group_records):
+        """
+        New objects of a cached user and its groups, bound to the current
+        transaction and folders, so requests never share them
+        """
+        user = txn._fill_object(user_record, users)
+        if len(group_records) > 0:
+            try:
+                groups = await container.async_get("groups")
+            except (AttributeError, KeyError):
+                return None
+            for ident, record in group_records:
+                user._groups_cache[ident] = txn._fill_object(record, groups)
         return user
 
 
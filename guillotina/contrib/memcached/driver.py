@@ -11,6 +11,7 @@ from typing import Any
 from typing import Dict
 from typing import List
 from typing import Optional
+from typing import Tuple
 
 import asyncio
 import backoff
@@ -235,6 +236,25 @@ class MemcachedDriver:
                 # cache hit
                 return item.value
 
+    async def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        if len(keys) == 0:
+            return []
+        client = self._get_client()
+        safe_keys = [safe_key(key) for key in keys]
+        with watch("get_many"):
+            items: Dict[bytes, emcache.Item] = await client.get_many(safe_keys)
+        return [items[key].value if key in items else None for key in safe_keys]
+
+    async def set_many(self, items: List[Tuple[str, bytes]], *, expire: Optional[int] = None) -> None:
+        if len(items) == 0:
+            return
+        client = self._get_client()
+        kwargs: Dict[str, int] = {}
+        if expire is not None:
+            kwargs["exptime"] = expire
+        with watch("set_many"):
+            await asyncio.gather(*[client.set(safe_key(key), data, **kwargs) for key, data in items])
+
     async def delete(self, key: str) -> None:
         client = self._get_client()
         with watch("delete"):
@@ -11,6 +11,7 @@ from guillotina.contrib.redis.exceptions import NoRedisConfigured
 from typing import Any
 from typing import List
 from typing import Optional
+from typing import Tuple
 
 import asyncio
 import backoff
@@ -113,6 +114,30 @@ class RedisDriver:
                 w.labels["type"] = "get_miss"
             return val
 
+    async def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        if self._pool is None:
+            raise NoRedisConfigured()
+        if len(keys) == 0:
+            return []
+        with watch("get_many"):
+            return await self._pool.execute(b"MGET", *keys)
+
+    async def set_many(self, items: List[Tuple[str, bytes]], *, expire: Optional[int] = None):
+        if self._pool is None:
+            raise NoRedisConfigured()
+        if len(items) == 0:
+            return
+        args: List[Any] = []
+        if expire is not None:
+            args[:] = [b"EX", expire]
+        with watch("set_many"):
+            # commands are written without waiting for the previous reply
+            # so the pool pipelines them
+            results = await asyncio.gather(
+                *[self._pool.execute(b"SET", key, data, *args) for key, data in items]
+            )
+        assert all(ok == b"OK" for ok in results), results
+
     async def delete(self, key: str):
         if self._pool is None:
             raise NoRedisConfigured()
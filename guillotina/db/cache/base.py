@@ -3,6 +3,7 @@ from guillotina.db.orm.interfaces import IBaseObject
 from typing import Any
 from typing import Dict
 from typing import List
+from typing import Tuple
 
 import typing
 
@@ -79,6 +80,12 @@ class BaseCache:
         """
         raise NotImplemented()
 
+    async def get_many(self, keyset: List[Dict[str, Any]]) -> List[Any]:
+        """
+        Get values for a list of key params, None for the missing ones
+        """
+        return [await self.get(**opts) for opts in keyset]
+
     async def set(
         self, value, keyset: List[Dict[str, Any]] = None, oid=None, container=None, id=None, variant=None
     ):
@@ -87,6 +94,13 @@ class BaseCache:
         """
         raise NotImplemented()
 
+    async def set_many(self, items: List[Tuple[Any, List[Dict[str, Any]]]]):
+        """
+        Set a list of (value, keyset) items
+        """
+        for value, keyset in items:
+            await self.set(value, keyset=keyset)
+
     async def clear(self):
         raise NotImplemented()
 
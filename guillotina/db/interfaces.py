@@ -66,6 +66,16 @@ class ITransaction(Interface):
         Get oid object
         """
 
+    async def get_many(oids: typing.List[str]) -> typing.List[IBaseObject]:
+        """
+        Get objects for a list of oids with one storage query
+        """
+
+    async def prefetch(oids: typing.List[str]) -> None:
+        """
+        Load oids with one storage query to fill the cache
+        """
+
     async def contains(oid: str, key: str) -> bool:
         """
         Does an object container another
@@ -86,6 +96,11 @@ class ITransaction(Interface):
         Get children of object
         """
 
+    async def resolve_path(parent: IBaseObject, path: typing.List[str]) -> typing.List[IBaseObject]:
+        """
+        Get the objects found following the ids of path from parent
+        """
+
     def delete(obj: IBaseObject):
         """
         delete object
@@ -174,11 +189,21 @@ class ITransactionCache(Interface):
         get cached object
         """
 
+    async def get_many(keyset):
+        """
+        get cached objects for a list of key params
+        """
+
     async def set(value, oid=None, container=None, id=None, variant=None):
         """
         set cached data
         """
 
+    async def set_many(items):
+        """
+        set a list of (value, keyset) cached data
+        """
+
     async def delete(key):
         """
         delete cache key
@@ -220,6 +245,16 @@ class IStorage(Interface):
         load ob from oid
         """
 
+    async def load_many(txn, oids):
+        """
+        load records for a list of oids, missing oids are ignored
+        """
+
+    async def load_ancestors(txn, oid):
+        """
+        load the record of oid followed by the records of its parents
+        """
+
     async def store(oid, old_serial, writer, obj, txn):
         """
         store oid with obj
@@ -230,6 +265,16 @@ class IStorage(Interface):
         delete ob by oid
         """
 
+    async def store_many(txn, writes):
+        """
+        store list of (oid, old_serial, writer, obj) tuples
+        """
+
+    async def delete_many(txn, oids):
+        """
+        delete obs by oids
+        """
+
     async def get_next_tid(txn):
         """
         get next transaction id
@@ -270,6 +315,12 @@ class IStorage(Interface):
         get child of parent oid
         """
 
+    async def resolve_path(txn, parent_oid, ids):
+        """
+        get the records found following ids from parent oid, stopping
+        at the first id not found
+        """
+
     async def has_key(txn, parent_oid, id):
         """
         check if key exists
@@ -33,12 +33,40 @@ class BaseStorage:
     async def load(self, txn, oid):
         raise NotImplemented()  # pragma: no cover
 
+    async def load_many(self, txn, oids):
+        results = []
+        for oid in oids:
+            try:
+                results.append(await self.load(txn, oid))
+            except KeyError:
+                pass
+        return results
+
+    async def load_ancestors(self, txn, oid):
+        results = []
+        while oid is not None:
+            try:
+                result = await self.load(txn, oid)
+            except KeyError:
+                break
+            results.append(result)
+            oid = result["parent_id"]
+        return results
+
     async def store(self, oid, old_serial, writer, obj, txn):
         raise NotImplemented()  # pragma: no cover
 
     async def delete(self, txn, oid):
         raise NotImplemented()  # pragma: no cover
 
+    async def store_many(self, txn, writes):
+        for oid, old_serial, writer, obj in writes:
+            await self.store(oid, old_serial, writer, obj, txn)
+
+    async def delete_many(self, txn, oids):
+        for oid in oids:
+            await self.delete(txn, oid)
+
     async def get_next_tid(self, txn):
         raise NotImplemented()  # pragma: no cover
 
@@ -69,6 +97,19 @@ class BaseStorage:
     async def get_child(self, txn, parent_oid, id):
         raise NotImplemented()  # pragma: no cover
 
+    async def resolve_path(self, txn, parent_oid, ids):
+        results = []
+        for id in ids:
+            try:
+                result = await self.get_child(txn, parent_oid, id)
+            except KeyError:
+                break
+            if result is None:
+                break
+            results.append(result)
+            parent_oid = result["zoid"]
+        return results
+
     async def has_key(self, txn, parent_oid, id):
         raise NotImplemented()  # pragma: no cover
 
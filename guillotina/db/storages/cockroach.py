@@ -181,6 +181,10 @@ class CockroachStorage(pg.PostgresqlStorage):
             transaction_strategy = "dbresolve_readcommitted"
         kwargs["transaction_strategy"] = transaction_strategy
         super().__init__(*args, **kwargs)
+        # multi-row writes use postgresql statements, store one object at a time
+        self._store_batch_size = 0
+        # keep the default text codec of jsonb values
+        self._jsonb_codec = False
 
     async def get_current_tid(self, txn):  # pragma: no cover
         raise Exception("cockroach does not support voting")
@@ -23,7 +23,9 @@ import asyncpg
 import asyncpg.connection
 import concurrent
 import orjson
+import re
 import time
+import typing
 
 
 try:
@@ -86,6 +88,38 @@ WHERE zoid = $1::varchar({MAX_UID_LENGTH})
 """,
 )
 
+register_sql(
+    "GET_OIDS",
+    f"""
+SELECT zoid, tid, state_size, resource, of, parent_id, id, type, state
+FROM {{table_name}}
+WHERE zoid = ANY($1::varchar({MAX_UID_LENGTH})[])
+""",
+)
+
+# parents deeper than this are loaded with following queries
+MAX_ANCESTORS_DEPTH = 100
+
+register_sql(
+    "GET_ANCESTORS",
+    f"""
+WITH RECURSIVE ancestors AS (
+    SELECT zoid, tid, state_size, resource, of, parent_id, id, type, state, 0 AS depth
+    FROM {{table_name}}
+    WHERE zoid = $1::varchar({MAX_UID_LENGTH})
+  UNION ALL
+    SELECT o.zoid, o.tid, o.state_size, o.resource, o.of, o.parent_id, o.id, o.type, o.state,
+           a.depth + 1
+    FROM {{table_name}} o
+    JOIN ancestors a ON o.zoid = a.parent_id
+    WHERE a.depth < {MAX_ANCESTORS_DEPTH}
+)
+SELECT zoid, tid, state_size, resource, of, parent_id, id, type, state
+FROM ancestors
+ORDER BY depth
+""",
+)
+
 register_sql(
     "GET_CHILDREN_KEYS",
     f"""
@@ -123,6 +157,26 @@ WHERE parent_id = $1::varchar({MAX_UID_LENGTH}) AND id = ANY($2)
 """,
 )
 
+register_sql(
+    "RESOLVE_PATH",
+    f"""
+WITH RECURSIVE path AS (
+    SELECT zoid, tid, state_size, resource, type, state, id, parent_id, of, 1 AS depth
+    FROM {{table_name}}
+    WHERE parent_id = $1::varchar({MAX_UID_LENGTH}) AND id = ($2::text[])[1]
+  UNION ALL
+    SELECT o.zoid, o.tid, o.state_size, o.resource, o.type, o.state, o.id, o.parent_id, o.of,
+           p.depth + 1
+    FROM {{table_name}} o
+    JOIN path p ON o.parent_id = p.zoid
+    WHERE p.depth < array_length($2::text[], 1) AND o.id = ($2::text[])[p.depth + 1]
+)
+SELECT zoid, tid, state_size, resource, type, state, id, parent_id, of
+FROM path
+ORDER BY depth
+""",
+)
+
 register_sql(
     "EXIST_CHILD",
     f"""
@@ -171,7 +225,7 @@ INSERT INTO {{table_name}}
 (zoid, tid, state_size, part, resource, of, otid, parent_id, id, type, json, state)
 VALUES ($1::varchar({MAX_UID_LENGTH}), $2::bigint, $3::int, $4::int, $5::boolean,
         $6::varchar({MAX_UID_LENGTH}), $7::bigint, $8::varchar({MAX_UID_LENGTH}),
-        $9::text, $10::text, $11::json, $12::bytea)
+        $9::text, $10::text, $11::jsonb, $12::bytea)
 ON CONFLICT (zoid)
 DO UPDATE SET
     tid = EXCLUDED.tid,
@@ -210,7 +264,7 @@ SET
     parent_id = $8::varchar({MAX_UID_LENGTH}),
     id = $9::text,
     type = $10::text,
-    json = $11::json,
+    json = $11::jsonb,
     state = $12::bytea
 WHERE
     zoid = $1::varchar({MAX_UID_LENGTH})"""
@@ -218,6 +272,59 @@ register_sql("UPDATE", _wrap_return_count(NAIVE_UPDATE + """ AND tid = $7::bigin
 register_sql("NAIVE_UPDATE", _wrap_return_count(NAIVE_UPDATE))
 
 
+# multi-row versions of the statements above, every column is provided
+# as an array and the returned zoids tell which rows were written
+BATCH_VALUES = f"""unnest(
+    $2::varchar({MAX_UID_LENGTH})[], $3::int[], $4::int[], $5::boolean[],
+    $6::varchar({MAX_UID_LENGTH})[], $7::bigint[], $8::varchar({MAX_UID_LENGTH})[],
+    $9::text[], $10::text[], $11::bytea[], $12::bytea[]
+) AS v(zoid, state_size, part, resource, of, otid, parent_id, id, type, json, state)"""
+register_sql(
+    "BATCH_UPSERT",
+    f"""
+INSERT INTO {{table_name}}
+(zoid, tid, state_size, part, resource, of, otid, parent_id, id, type, json, state)
+SELECT v.zoid, $1::bigint, v.state_size, v.part, v.resource, v.of, v.otid,
+       v.parent_id, v.id, v.type, convert_from(v.json, 'UTF8')::jsonb, v.state
+FROM {BATCH_VALUES}
+ON CONFLICT (zoid)
+DO UPDATE SET
+    tid = EXCLUDED.tid,
+    state_size = EXCLUDED.state_size,
+    part = EXCLUDED.part,
+    resource = EXCLUDED.resource,
+    of = EXCLUDED.of,
+    otid = EXCLUDED.otid,
+    parent_id = EXCLUDED.parent_id,
+    id = EXCLUDED.id,
+    type = EXCLUDED.type,
+    json = EXCLUDED.json,
+    state = EXCLUDED.state
+RETURNING zoid""",
+)
+register_sql(
+    "BATCH_UPDATE",
+    f"""
+UPDATE {{table_name}} AS o
+SET
+    tid = $1::bigint,
+    state_size = v.state_size,
+    part = v.part,
+    resource = v.resource,
+    of = v.of,
+    otid = v.otid,
+    parent_id = v.parent_id,
+    id = v.id,
+    type = v.type,
+    json = convert_from(v.json, 'UTF8')::jsonb,
+    state = v.state
+FROM {BATCH_VALUES}
+WHERE
+    o.zoid = v.zoid AND o.tid = v.otid
+RETURNING o.zoid""",
+)
+
+
 register_sql(
     "NUM_CHILDREN", f"SELECT count(*) FROM {{table_name}} WHERE parent_id = $1::varchar({MAX_UID_LENGTH})"
 )
@@ -265,6 +372,18 @@ WHERE
 )
 
 
+register_sql(
+    "TRASH_PARENT_IDS",
+    f"""
+UPDATE {{table_name}}
+SET
+    parent_id = '{TRASHED_ID}'
+WHERE
+    zoid = ANY($1::varchar({MAX_UID_LENGTH})[])
+""",
+)
+
+
 register_sql(
     "INSERT_BLOB_CHUNK",
     f"""
@@ -355,6 +474,9 @@ def restart_conn_on_exception(f):
 # how long to wait before trying to recover bad connections
 BAD_CONNECTION_RESTART_DELAY = 0.25
 
+# Key (parent_id)=(<oid>) is not present in table "objects".
+FOREIGN_KEY_VIOLATION_RE = re.compile(r"Key \((?P<column>\w+)\)=\((?P<value>.*)\) is not present")
+
 
 class LightweightConnection(asyncpg.connection.Connection):
     """
@@ -459,6 +581,22 @@ class PGVacuum:
         return self._queue.qsize()
 
 
+def encode_jsonb(value) -> bytes:
+    """
+    Binary jsonb format: a version number followed by the json text,
+    json text is sent as it is, as with the default text codec
+    """
+    if isinstance(value, str):
+        value = value.encode("utf-8")
+    elif not isinstance(value, (bytes, bytearray)):
+        value = orjson.dumps(value)
+    return b"\x01" + value
+
+
+def decode_jsonb(data: bytes):
+    return orjson.loads(memoryview(data)[1:])
+
+
 class PGConnectionManager:
     """
     class to manage pool of connections
@@ -473,6 +611,7 @@ class PGConnectionManager:
         vacuum_class=PGVacuum,
         autovacuum=True,
         db_schema="public",
+        jsonb_codec=True,
     ):
         self._dsn = dsn
         self._pool_size = pool_size
@@ -486,6 +625,7 @@ class PGConnectionManager:
         self._vacuum_class = vacuum_class
         self._autovacuum = autovacuum
         self._db_schema = db_schema
+        self._jsonb_codec = jsonb_codec
 
     @property
     def vacuum(self):
@@ -519,6 +659,18 @@ class PGConnectionManager:
             self._pool.terminate()
             self._pool = None
 
+    async def _initialize_connection(self, conn):
+        if self._jsonb_codec:
+            await conn.set_type_codec(
+                "jsonb", encoder=encode_jsonb, decoder=decode_jsonb, schema="pg_catalog", format="binary"
+            )
+        init = self._connection_options.get("init")
+        if init is not None:
+            await init(conn)
+
+    def _pool_options(self):
+        return dict(self._connection_options, init=self._initialize_connection)
+
     async def _initialize_tid_statements(self, retried=False):
         try:
             async with self.pool.acquire(timeout=self._conn_acquire_timeout) as conn:
@@ -548,7 +700,7 @@ class PGConnectionManager:
                 min_size=1,
                 connection_class=app_settings["pg_connection_class"],
                 loop=loop,
-                **kw,
+                **self._pool_options(),
             )
 
             await self._initialize_tid_statements()
@@ -572,7 +724,7 @@ class PGConnectionManager:
             max_size=self._pool_size,
             min_size=2,
             connection_class=app_settings["pg_connection_class"],
-            **self._connection_options,
+            **self._pool_options(),
         )
 
         await self._initialize_tid_statements()
@@ -653,6 +805,8 @@ class PostgresqlStorage(BaseStorage):
         blobs_table_name="blobs",
         connection_manager=None,
         autovacuum=True,
+        store_batch_size=100,
+        jsonb_codec=True,
         **options,
     ):
         super(PostgresqlStorage, self).__init__(read_only, transaction_strategy=transaction_strategy)
@@ -672,10 +826,22 @@ class PostgresqlStorage(BaseStorage):
         self._sql = SQLStatements()
         self._connection_manager = connection_manager
         self._autovacuum = autovacuum
+        self._store_batch_size = store_batch_size
+        self._jsonb_codec = jsonb_codec
 
     async def finalize(self):
         await self._connection_manager.close()
 
+    def json_parameter(self, value) -> typing.Union[bytes, str]:
+        """
+        Serialized value for `::jsonb` parameters, bytes are taken as they
+        are by the jsonb codec of the connections, text without it
+        """
+        data = orjson.dumps(value)
+        if self._jsonb_codec:
+            return data
+        return data.decode("utf-8")
+
     @property
     def sql(self):
         return self._sql
@@ -778,6 +944,7 @@ WHERE tablename = '{}' AND indexname = '{}_parent_id_id_key';
                 vacuum_class=self._vacuum_class,
                 autovacuum=self._autovacuum,
                 db_schema=self._db_schema,
+                jsonb_codec=self._jsonb_codec,
             )
             await self._connection_manager.initialize(loop, **kw)
 
@@ -840,18 +1007,35 @@ WHERE tablename = '{}' AND indexname = '{}_parent_id_id_key';
             raise KeyError(oid)
         return objects
 
-    @profilable
-    async def store(self, oid, old_serial, writer, obj, txn):
-        assert oid is not None
+    async def load_many(self, txn, oids):
+        conn = await txn.get_connection()
+        sql = self._sql.get("GET_OIDS", self.objects_table_name)
+        async with watch_lock(txn._lock, "load_objects_by_oid"):
+            with watch("load_objects_by_oid"):
+                return await conn.fetch(sql, oids)
 
+    async def load_ancestors(self, txn, oid):
+        conn = await txn.get_connection()
+        sql = self._sql.get("GET_ANCESTORS", self.objects_table_name)
+        async with watch_lock(txn._lock, "load_ancestors"):
+            with watch("load_ancestors"):
+                return await conn.fetch(sql, oid)
+
+    async def _serialize(self, writer, obj):
         pickled = writer.serialize()  # This calls __getstate__ of obj
         if len(pickled) >= self._large_record_size:
             log.info(f"Large object {obj.__class__}: {len(pickled)}")
         if self._store_json:
-            json_dict = await writer.get_json()
-            json = orjson.dumps(json_dict).decode("utf-8")
+            json = self.json_parameter(await writer.get_json())
         else:
             json = None
+        return pickled, json
+
+    @profilable
+    async def store(self, oid, old_serial, writer, obj, txn):
+        assert oid is not None
+
+        pickled, json = await self._serialize(writer, obj)
         part = writer.part
         if part is None:
             part = 0
@@ -923,6 +1107,120 @@ WHERE tablename = '{}' AND indexname = '{}_parent_id_id_key';
                     )
         await txn._cache.store_object(obj, pickled)
 
+    @profilable
+    async def store_many(self, txn, writes):
+        """
+        Store objects with multi-row statements, `store_batch_size` rows at a time.
+
+        Objects are serialized before any statement is sent so the
+        connection is only busy shipping bytes.
+        """
+        if self._store_batch_size < 2 or len(writes) < 2:
+            return await super().store_many(txn, writes)
+
+        upserts = []
+        updates = []
+        for oid, old_serial, writer, obj in writes:
+            assert oid is not None
+            pickled, json = await self._serialize(writer, obj)
+            row = (oid, old_serial, writer, obj, pickled, json)
+            if not obj.__new_marker__ and obj.__serial__ is not None:
+                # we should be confident this is an object update
+                updates.append(row)
+            else:
+                upserts.append(row)
+
+        # new objects go first, modified objects can reference them
+        for rows, sql_name, update in ((upserts, "BATCH_UPSERT", False), (updates, "BATCH_UPDATE", True)):
+            for idx in range(0, len(rows), self._store_batch_size):
+                await self._store_batch(txn, rows[idx : idx + self._store_batch_size], sql_name, update)
+
+    async def _store_batch(self, txn, rows, sql_name, update):
+        statement_sql = self._sql.get(sql_name, self.objects_table_name)
+        values = [
+            (
+                oid,  # The OID of the object
+                len(pickled),  # Len of the object
+                writer.part or 0,  # Partition indicator
+                writer.resource,  # Is a resource ?
+                writer.of,  # It belogs to a main
+                old_serial,  # Old serial
+                writer.parent_id,  # Parent OID
+                writer.id,  # Traversal ID
+                writer.type,  # Guillotina type
+                json,  # JSON catalog
+                pickled,  # Pickle state
+            )
+            for oid, old_serial, writer, _, pickled, json in rows
+        ]
+        # statements receive one array per column
+        arguments = [list(column) for column in zip(*values)]
+
+        conn = await txn.get_connection()
+        async with watch_lock(txn._lock, "store_objects"):
+            try:
+                with watch("store_objects"):
+                    result = await conn.fetch(statement_sql, txn._tid, *arguments)
+            except asyncpg.exceptions.UniqueViolationError as ex:
+                if "Key (parent_id, id)" in ex.detail or "Key (of, id)" in ex.detail:
+                    raise ConflictIdOnContainer(ex)
+                raise
+            except asyncpg.exceptions.ForeignKeyViolationError as ex:
+                # find out which rows referenced the missing object
+                invalid = rows
+                match = FOREIGN_KEY_VIOLATION_RE.search(ex.detail or "")
+                if match is not None:
+                    invalid = [
+                        row
+                        for row in rows
+                        if getattr(row[2], match.group("column"), None) == match.group("value")
+                    ] or rows
+                for _, _, _, obj, _, _ in invalid:
+                    txn.deleted[obj.__uuid__] = obj
+                oid, old_serial, writer = invalid[0][:3]
+                raise TIDConflictError(
+                    "Bad value inserting into database that could be caused "
+                    "by a bad cache value. This should resolve on request retry.",
+                    oid,
+                    txn,
+                    old_serial,
+                    writer,
+                )
+            except asyncpg.exceptions._base.InterfaceError as ex:
+                if "another operation is in progress" in ex.args[0]:
+                    oid, old_serial, writer = rows[0][:3]
+                    raise ConflictError(
+                        "asyncpg error, another operation in progress.", oid, txn, old_serial, writer
+                    )
+                raise
+            except asyncpg.exceptions.DeadlockDetectedError:
+                oid, old_serial, writer = rows[0][:3]
+                raise ConflictError("Deadlock detected.", oid, txn, old_serial, writer)
+
+            if len(result) != len(rows):
+                stored = {record["zoid"] for record in result}
+                for oid, old_serial, writer, _, _, _ in rows:
+                    if oid in stored:
+                        continue
+                    if update:
+                        # raise tid conflict error
+                        raise TIDConflictError(
+                            "Mismatch of tid of object being updated. This is likely "
+                            "caused by a cache invalidation race condition and should "
+                            "be an edge case. This should resolve on request retry.",
+                            oid,
+                            txn,
+                            old_serial,
+                            writer,
+                        )
+                    else:
+                        log.error(
+                            "Incorrect response count from database update. "
+                            "This should not happen. tid: {}, oid: {}".format(txn._tid, oid)
+                        )
+        for _, _, _, obj, pickled, _ in rows:
+            await txn._cache.store_object(obj, pickled)
+
     async def _txn_oid_commit_hook(self, status, oid):
         if self._connection_manager._vacuum is not None:
             await self._connection_manager._vacuum.add_to_queue(oid, self.objects_table_name)
@@ -937,6 +1235,18 @@ WHERE tablename = '{}' AND indexname = '{}_parent_id_id_key';
         if self._autovacuum:
             txn.add_after_commit_hook(self._txn_oid_commit_hook, oid)
 
+    async def delete_many(self, txn, oids):
+        if self._store_batch_size < 2 or len(oids) < 2:
+            return await super().delete_many(txn, oids)
+        conn = await txn.get_connection()
+        sql = self._sql.get("TRASH_PARENT_IDS", self.objects_table_name)
+        async with watch_lock(txn._lock, "delete_objects"):
+            with watch("delete_objects"):
+                await conn.execute(sql, oids)
+        if self._autovacuum:
+            for oid in oids:
+                txn.add_after_commit_hook(self._txn_oid_commit_hook, oid)
+
     async def _check_bad_connection(self, ex):
         # we do not use transaction lock here but a storage lock because
         # a storage object has a shard conn for reads
@@ -1078,6 +1388,13 @@ WHERE tablename = '{}' AND indexname = '{}_parent_id_id_key';
                 result = await self.get_one_row(txn, sql, parent_oid, id)
         return result
 
+    async def resolve_path(self, txn, parent_oid, ids):
+        conn = await txn.get_connection()
+        sql = self._sql.get("RESOLVE_PATH", self.objects_table_name)
+        async with watch_lock(txn._lock, "resolve_path"):
+            with watch("resolve_path"):
+                return await conn.fetch(sql, parent_oid, ids)
+
     async def get_children(self, txn, parent_oid, ids):
         conn = await txn.get_connection()
         sql = self._sql.get("GET_CHILDREN_BATCH", self.objects_table_name)
@@ -4,6 +4,7 @@ from guillotina._settings import app_settings
 from guillotina.component import get_adapter
 from guillotina.component import query_adapter
 from guillotina.const import ROOT_ID
+from guillotina.const import TRASHED_ID
 from guillotina.content import Container
 from guillotina.db.db import Root
 from guillotina.db.interfaces import ITransaction
@@ -20,12 +21,13 @@ from guillotina.exceptions import TransactionObjectRegistrationMismatchException
 from guillotina.profile import profilable
 from guillotina.registry import Registry
 from guillotina.utils import lazy_apply
+from guillotina.utils import run_async
 from typing import Any
-from typing import AsyncIterator
 from typing import Callable
 from typing import Dict
 from typing import List
 from typing import Optional
+from typing import Tuple
 from typing import Union
 from typing_extensions import TypedDict
 from zope.interface import implementer
@@ -49,6 +51,7 @@ class ObjectResultType(TypedDict, total=False):
 
 try:
     import prometheus_client
+    from prometheus_client.utils import INF
 
     CACHE_HITS = prometheus_client.Counter(
         "guillotina_cache_ops_total",
@@ -70,6 +73,16 @@ try:
             result_type += "_roots"
         CACHE_HITS.labels(type=name, result=result_type).inc()
 
+    CHILDREN_BATCH_SIZE = prometheus_client.Histogram(
+        "guillotina_get_children_batch_size",
+        "Histogram of number of keys looked up at each get_children batch",
+        labelnames=["type"],
+        buckets=(1, 15, 50, 100, 250, 500, 1000, 2500, INF),
+    )
+
+    def record_children_batch_size(type_: str, size: int) -> None:
+        CHILDREN_BATCH_SIZE.labels(type=type_).observe(size)
+
 
 except ImportError:
 
@@ -78,6 +91,9 @@ except ImportError:
     ) -> None:
         ...
 
+    def record_children_batch_size(type_: str, size: int) -> None:
+        ...
+
 
 logger = logging.getLogger(__name__)
 
@@ -137,6 +153,11 @@ class cache:
         return _wrapper
 
 
+def _serialize_writers(writers):
+    for writer in writers:
+        writer.serialize()
+
+
 @implementer(ITransaction)
 class Transaction:
     _status = "empty"
@@ -385,6 +406,111 @@ class Transaction:
 
         return obj
 
+    async def _get_many(self, oids: List[str]) -> Dict[str, ObjectResultType]:
+        results: Dict[str, ObjectResultType] = {}
+        to_get: List[str] = []
+        for oid in dict.fromkeys(oids):
+            result = self._manager._hard_cache.get(oid, None)
+            if result is None:
+                to_get.append(oid)
+            else:
+                results[oid] = result
+
+        to_load = []
+        if len(to_get) > 0:
+            keyset = [{"oid": oid} for oid in to_get]
+            for oid, key_args, result in zip(to_get, keyset, await self._cache.get_many(keyset)):
+                if result is None:
+                    to_load.append(oid)
+                    continue
+                record_cache_metric("_get", "hit", result, key_args)
+                results[oid] = result
+
+        if len(to_load) > 0:
+            to_cache = []
+            for result in await self._manager._storage.load_many(self, to_load):
+                key_args = {"oid": result["zoid"]}
+                record_cache_metric("_get", "miss", result, key_args)
+                if len(result["state"]) < self._cache.max_cache_record_size:
+                    to_cache.append(
+                        (result, [key_args, {"container": result["parent_id"], "id": result["id"]}])
+                    )
+                results[result["zoid"]] = result
+            if len(to_cache) > 0:
+                await self._cache.set_many(to_cache)
+        return results
+
+    async def _get_ancestors(self, oid: str) -> List[ObjectResultType]:
+        """
+        Records of an object followed by the ones of its parents. Records
+        not found in cache are loaded with one storage query for the rest
+        of the chain.
+        """
+        results: List[ObjectResultType] = []
+        next_oid: Optional[str] = oid
+        while next_oid and next_oid != TRASHED_ID:
+            result = self._manager._hard_cache.get(next_oid, None)
+            if result is None:
+                key_args = {"oid": next_oid}
+                result = await self._cache.get(**key_args)
+                if result is not None:
+                    record_cache_metric("_get", "hit", result, key_args)
+            if result is not None:
+                results.append(result)
+            else:
+                loaded = await self._manager._storage.load_ancestors(self, next_oid)
+                if len(loaded) == 0:
+                    break
+                to_cache = []
+                for result in loaded:
+                    key_args = {"oid": result["zoid"]}
+                    record_cache_metric("_get", "miss", result, key_args)
+                    if len(result["state"]) < self._cache.max_cache_record_size:
+                        to_cache.append(
+                            (result, [key_args, {"container": result["parent_id"], "id": result["id"]}])
+                        )
+                if len(to_cache) > 0:
+                    await self._cache.set_many(to_cache)
+                results.extend(loaded)
+            next_oid = results[-1]["parent_id"]
+        return results
+
+    @profilable
+    async def get_many(self, oids: List[str], ignore_registered: bool = False) -> List[IBaseObject]:
+        """
+        Get objects for a list of oids, loading the ones not found in
+        cache with a single storage query.
+
+        Objects are returned in the order of the oids provided. Oids
+        that do not exist are skipped.
+        """
+        objects: Dict[str, IBaseObject] = {}
+        to_load = []
+        for oid in oids:
+            obj = None
+            if not ignore_registered:
+                obj = self.modified.get(oid, None)
+            if obj is None:
+                to_load.append(oid)
+            else:
+                objects[oid] = obj
+
+        for oid, result in (await self._get_many(to_load)).items():
+            obj = app_settings["object_reader"](result)
+            obj.__txn__ = self
+            if obj.__immutable_cache__:
+                self._manager._hard_cache[oid] = result
+            objects[oid] = obj
+        return [objects[oid] for oid in oids if oid in objects]
+
+    @profilable
+    async def prefetch(self, oids: List[str]) -> None:
+        """
+        Load the records for a list of oids with a single storage query
+        and fill the cache with them so later `get` calls are cache hits.
+        """
+        await self._get_many(oids)
+
     async def commit(self) -> None:
         restarts = 0
         while True:
@@ -443,32 +569,48 @@ class Transaction:
                 await result
         self._before_commit = []
 
-    @profilable
-    async def _store_object(self, obj, uid, added=False):
-        # There is no serial
-        if added:
-            serial = None
-        else:
-            serial = getattr(obj, "__serial__", None) or 0
-
-        writer = IWriter(obj)
-        await self._manager._storage.store(uid, serial, writer, obj, self)
-        obj.__serial__ = self._tid
-        obj.__uuid__ = uid
-        if obj.__txn__ is None:
-            obj.__txn__ = self
-
     @profilable
     async def tpc_commit(self):
         """Commit changes to an object"""
-        await self._strategy.tpc_commit()
+        writes = []
         for oid, obj in self.added.items():
-            await self._store_object(obj, oid, True)
-            obj.__new_marker__ = False
+            # There is no serial
+            writes.append((oid, None, IWriter(obj), obj))
         for oid, obj in self.modified.items():
-            await self._store_object(obj, oid)
-        for oid, obj in self.deleted.items():
-            await self._manager._storage.delete(self, oid)
+            writes.append((oid, getattr(obj, "__serial__", None) or 0, IWriter(obj), obj))
+        if len(writes) > 0:
+            # serialize before the db transaction is started so cpu work
+            # does not hold the connection or the transaction lock
+            await self._prepare_writers([writer for _, _, writer, _ in writes])
+        await self._strategy.tpc_commit()
+        if len(writes) > 0:
+            await self._manager._storage.store_many(self, writes)
+        for oid, _, _, obj in writes:
+            obj.__serial__ = self._tid
+            obj.__uuid__ = oid
+            if obj.__txn__ is None:
+                obj.__txn__ = self
+        for obj in self.added.values():
+            obj.__new_marker__ = False
+        if len(self.deleted) > 0:
+            await self._manager._storage.delete_many(self, list(self.deleted.keys()))
+
+    @profilable
+    async def _prepare_writers(self, writers):
+        """
+        Pickle and extract json for all the writers of the commit.
+
+        When the number of writers reaches `serialize_executor_threshold`,
+        pickling is done in the application thread pool so big commits do
+        not block the event loop. Json extraction can load data from the
+        database so it always runs on the event loop.
+        """
+        threshold = app_settings.get("serialize_executor_threshold", 0)
+        if threshold and len(writers) >= threshold:
+            await run_async(_serialize_writers, writers)
+        store_json = getattr(self._manager._storage, "_store_json", True)
+        for writer in writers:
+            await writer.prepare(json=store_json)
 
     @profilable
     async def tpc_vote(self):
@@ -531,49 +673,122 @@ class Transaction:
 
         return self._fill_object(result, parent)
 
-    def _fill_object(self, item: dict, parent: IBaseObject) -> IBaseObject:
+    def _fill_object(self, item: Union[dict, ObjectResultType], parent: IBaseObject) -> IBaseObject:
         obj = app_settings["object_reader"](item)
         obj.__parent__ = parent
         obj.__txn__ = self
         return obj
 
-    async def _get_batch_children(self, parent: IBaseObject, keys: List[str]) -> AsyncIterator[IBaseObject]:
+    async def _get_batch_children(self, parent: IBaseObject, keys: List[str]) -> Dict[str, ObjectResultType]:
+        record_children_batch_size("storage", len(keys))
+        results = {}
+        to_cache = []
         for litem in await self._manager._storage.get_children(self, parent.__uuid__, keys):
             if len(litem["state"]) < self._cache.max_cache_record_size:
-                await self._cache.set(litem, container=parent, id=litem["id"])
-            yield self._fill_object(litem, parent)
+                to_cache.append((litem, [{"container": parent, "id": litem["id"]}]))
+            results[litem["id"]] = litem
+        if len(to_cache) > 0:
+            await self._cache.set_many(to_cache)
+        return results
 
     async def get_children(self, parent, keys):
         """
         More performant way to get groups of items.
-        - look at cache
-        - batch get from storage
-        - async for iterate items
+        - look up a batch of keys in cache at once
+        - get all the misses of the batch from storage in one query
+        - async for iterate items in the order of the keys
         - store retrieved values in storage
-        """
-        lookup_group = []  # backlog of object that need to be looked up
-        for key in keys:
-            item = await self._cache.get(container=parent, id=key)
-            if item is None:
-                lookup_group.append(key)
-                if len(lookup_group) > 15:  # limit batch size
-                    async for litem in self._get_batch_children(parent, lookup_group):
-                        yield litem
-                    lookup_group = []
-                continue
 
-            if len(lookup_group) > 0:
-                # we need to clear this buffer first before we can yield this item
-                async for litem in self._get_batch_children(parent, lookup_group):
-                    yield litem
-                lookup_group = []
+        Batches start with `children_batch_size` keys and double in size
+        up to `children_max_batch_size` so consumers that stop early only
+        pay for small lookups while big folders need few queries.
+        """
+        keys = list(keys)
+        batch_size = max(app_settings["children_batch_size"], 1)
+        max_batch_size = max(app_settings["children_max_batch_size"], batch_size)
+        start = 0
+        while start < len(keys):
+            batch = keys[start : start + batch_size]
+            start += len(batch)
+            record_children_batch_size("cache", len(batch))
+            items = await self._cache.get_many([{"container": parent, "id": key} for key in batch])
+            missing = [key for key, item in zip(batch, items) if item is None]
+            loaded = {}
+            if len(missing) > 0:
+                loaded = await self._get_batch_children(parent, missing)
+            for key, item in zip(batch, items):
+                if item is None:
+                    item = loaded.get(key)
+                    if item is None:
+                        continue
+                yield self._fill_object(item, parent)
+            batch_size = min(batch_size * 2, max_batch_size)
+
+    async def _resolve_path(self, parent: IBaseObject, path: List[str]) -> List[ObjectResultType]:
+        """
+        Records found following the ids of path from parent, stopping at
+        the first id not found.
 
-            yield self._fill_object(item, parent)
+        The oids of resolved paths are cached and checked against the
+        records of the objects, which are invalidated as usual, so moved,
+        renamed or deleted objects get the path resolved again.
+        """
+        path_id = "/".join(path)
+        key_args = {"container": parent, "id": path_id, "variant": "path"}
+        oids = await self._cache.get(**key_args)
+        if oids is not None and len(oids) == len(path):
+            records = await self._get_many(oids)
+            results: List[ObjectResultType] = []
+            parent_oid = parent.__uuid__
+            for oid, key in zip(oids, path):
+                record = records.get(oid)
+                if record is None or record.get("parent_id") != parent_oid or record["id"] != key:
+                    break
+                results.append(record)
+                parent_oid = oid
+            if len(results) == len(path):
+                record_cache_metric("_resolve_path", "hit", path_id, key_args)
+                return results
+
+        results = await self._manager._storage.resolve_path(self, parent.__uuid__, path)
+        record_cache_metric("_resolve_path", "miss", path_id, key_args)
+        to_cache: List[Tuple[Any, List[Dict[str, Any]]]] = [
+            (result, [{"oid": result["zoid"]}, {"container": result["parent_id"], "id": result["id"]}])
+            for result in results
+            if len(result["state"]) < self._cache.max_cache_record_size
+        ]
+        if len(results) == len(path):
+            to_cache.append(([result["zoid"] for result in results], [key_args]))
+        if len(to_cache) > 0:
+            await self._cache.set_many(to_cache)
+        return results
 
-        # flush the rest
-        if len(lookup_group) > 0:
-            async for item in self._get_batch_children(parent, lookup_group):
-                yield item
+    @profilable
+    async def resolve_path(self, parent: IBaseObject, path: List[str]) -> List[IBaseObject]:
+        """
+        Get the objects found following the ids of path from parent with
+        one cache lookup or one storage query, stopping at the first id
+        not found.
+        """
+        objects = []
+        if len(self.modified) > 0 or len(self.added) > 0 or len(self.deleted) > 0:
+            # objects registered in the transaction take precedence
+            for key in path:
+                try:
+                    obj = await self.get_child(parent, key)
+                except KeyError:
+                    obj = None
+                if obj is None:
+                    break
+                objects.append(obj)
+                parent = obj
+            return objects
+
+        for record in await self._resolve_path(parent, list(path)):
+            obj = self._fill_object(record, parent)
+            objects.append(obj)
+            parent = obj
+        return objects
 
     @profilable
     async def contains(self, oid: str, key: str) -> bool:
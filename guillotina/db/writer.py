@@ -36,10 +36,21 @@ class Writer(object):
 
     def __init__(self, obj):
         self._obj = obj
+        self._pickled = None
+        self._json = None
 
     async def get_json(self):
         return None
 
+    async def prepare(self, json=True):
+        """
+        Pickle and extract json from the object ahead of storing it.
+        Results are kept so storages only ship the prepared values.
+        """
+        self.serialize()
+        if json:
+            self._json = await self.get_json()
+
     @property
     def of(self):
         return getattr(self._obj, "__of__", None)
@@ -57,8 +68,10 @@ class Writer(object):
         return getattr(self._obj, "__partition_id__", 0)
 
     def serialize(self):
-        protocol = app_settings.get("pickle_protocol", pickle.HIGHEST_PROTOCOL)
-        return pickle.dumps(self._obj, protocol=protocol)
+        if self._pickled is None:
+            protocol = app_settings.get("pickle_protocol", pickle.HIGHEST_PROTOCOL)
+            self._pickled = pickle.dumps(self._obj, protocol=protocol)
+        return self._pickled
 
     @property
     def parent_id(self):
@@ -84,6 +97,8 @@ class ResourceWriter(Writer):
             return get_dotted_name(self._obj)
 
     async def get_json(self):
+        if self._json is not None:
+            return self._json
         if not app_settings.get("store_json", False):
             return {}
         adapter = query_adapter(self._obj, IJSONDBSerializer)
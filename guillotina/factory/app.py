@@ -23,6 +23,7 @@ from guillotina.factory.content import ApplicationRoot
 from guillotina.interfaces import IApplication
 from guillotina.interfaces import IDatabase
 from guillotina.interfaces import IDatabaseConfigurationFactory
+from guillotina.security.policy import clear_decision_cache
 from guillotina.utils import lazy_apply
 from guillotina.utils import list_or_dict_items
 from guillotina.utils import resolve_dotted_name
@@ -193,6 +194,8 @@ async def startup_app(config_file=None, settings=None, loop=None, server_app=Non
     app_settings.clear()
     app_settings.update(startup_vars)
     app_settings.update(deepcopy(default_settings))
+    # decisions were computed with the previous security configuration
+    clear_decision_cache()
 
     if config_file is not None:
         from guillotina.commands import get_settings
@@ -21,6 +21,18 @@ class ICatalogUtility(Interface):
         Search raw query
         """
 
+    async def query_facets(context: IBaseObject, query: typing.Any):
+        """
+        Number of results of the query by value of the `_facets` fields:
+        {field: {"items": {value: count}, "total": <number of values>}}
+        """
+
+    def stream(context: IBaseObject, query: typing.Any) -> typing.AsyncIterator[typing.Dict]:
+        """
+        Async iterator over all the results of a query, not limited
+        to a page of results unless `_size` is set
+        """
+
     async def index(container: IContainer, datas):
         """
         {uid: <dict>}
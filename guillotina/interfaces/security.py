@@ -379,6 +379,12 @@ class ISecurityPolicy(Interface):  # pylint: disable=E0239
         Check if user has permission on object
         """
 
+    def filter_allowed(permission: str, objects: typing.Iterable[IBaseObject]) -> typing.List[IBaseObject]:
+        """
+        Get the objects the user has permission on, checking the permission
+        once for the children of the same parent without local security
+        """
+
     def cached_decision(parent: IBaseObject, principal: str, groups: typing.List[str], permission: str):
         """
         """
@@ -255,6 +255,8 @@ configure.json_schema_definition(
                 "items": {"type": "object", "$ref": "#/components/schemas/SearchResult"},
             },
             "items_total": {"type": "integer"},
+            "_after": {"type": "string"},
+            "facets": {"type": "object"},
         },
         "required": ["items"],
     },
@@ -275,11 +277,15 @@ configure.json_schema_definition(
         "properties": {
             "term": {"type": "string"},
             "_from": {"type": "string"},
+            "_after": {"type": "string"},
+            "_count": {"type": "string", "enum": ["exact", "estimate", "none"]},
             "_size": {"type": "string"},
             "_sort_asc": {"type": "string"},
             "_sort_des": {"type": "string"},
             "_metadata": {"type": "string"},
             "_metadata_not": {"type": "string"},
+            "_facets": {"type": "string"},
+            "_facets_size": {"type": "string"},
             "__eq": {"type": "string"},
             "__not": {"type": "string"},
             "__gt": {"type": "string"},
@@ -183,18 +183,20 @@ class SerializeFolderToJson(SerializeToJson):
             result["items"] = []
         else:
             result["items"] = []
-            async for ident, member in self.context.async_items(suppress_events=True):
-                if not ident.startswith("_") and bool(
-                    security.check_permission("guillotina.AccessContent", member)
-                ):
-                    if fullobjects:
-                        result["items"].append(
-                            await get_multi_adapter((member, self.request), IResourceSerializeToJson)()
-                        )
-                    else:
-                        result["items"].append(
-                            await get_multi_adapter((member, self.request), IResourceSerializeToJsonSummary)()
-                        )
+            members = [
+                member
+                async for ident, member in self.context.async_items(suppress_events=True)
+                if not ident.startswith("_")
+            ]
+            for member in security.filter_allowed("guillotina.AccessContent", members):
+                if fullobjects:
+                    result["items"].append(
+                        await get_multi_adapter((member, self.request), IResourceSerializeToJson)()
+                    )
+                else:
+                    result["items"].append(
+                        await get_multi_adapter((member, self.request), IResourceSerializeToJsonSummary)()
+                    )
         result["length"] = length
 
         return result
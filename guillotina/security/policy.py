@@ -1,3 +1,4 @@
+from guillotina import app_settings
 from guillotina import configure
 from guillotina.auth.users import SystemUser
 from guillotina.component import get_utility
@@ -8,9 +9,11 @@ from guillotina.interfaces import AllowSingle
 from guillotina.interfaces import Deny
 from guillotina.interfaces import IGroups
 from guillotina.interfaces import IInheritPermissionMap
+from guillotina.interfaces import IObjectMovedEvent
 from guillotina.interfaces import IPrincipal
 from guillotina.interfaces import IPrincipalPermissionMap
 from guillotina.interfaces import IPrincipalRoleMap
+from guillotina.interfaces import IResource
 from guillotina.interfaces import IRolePermissionMap
 from guillotina.interfaces import ISecurityPolicy
 from guillotina.interfaces import IView
@@ -20,12 +23,39 @@ from guillotina.profile import profilable
 from guillotina.security.security_code import principal_permission_manager
 from guillotina.security.security_code import principal_role_manager
 from guillotina.security.security_code import role_permission_manager
+from guillotina.transactions import get_transaction
 from lru import LRU
+from typing import Any
 from typing import Dict
 from typing import List
+from typing import MutableMapping
 from typing import Optional
+from typing import Set
+from typing import Tuple
 from typing import Union
 
+import hashlib
+import weakref
+
+
+try:
+    import prometheus_client
+
+    SECURITY_CACHE_OPS = prometheus_client.Counter(
+        "guillotina_security_cache_ops_total",
+        "Total count of lookups of the process wide security decision cache by result",
+        labelnames=["result"],
+    )
+
+    def record_security_cache_metric(result: str) -> None:
+        SECURITY_CACHE_OPS.labels(result=result).inc()
+
+
+except ImportError:
+
+    def record_security_cache_metric(result: str) -> None:
+        ...
+
 
 code_principal_permission_setting = principal_permission_manager.get_setting
 code_roles_for_permission = role_permission_manager.get_roles_for_permission
@@ -50,14 +80,255 @@ class CacheEntry:
     pass
 
 
+_decisions: Optional[LRU] = None
+
+
+def get_decision_cache() -> Optional[LRU]:
+    """
+    Process wide cache of the permission decisions, bounded to
+    `security_cache_size` entries
+    """
+    global _decisions
+    size = app_settings.get("security_cache_size", 0)
+    if not size:
+        return None
+    if _decisions is None or _decisions.get_size() != size:
+        _decisions = LRU(size)
+    return _decisions
+
+
+def clear_decision_cache() -> None:
+    if _decisions is not None:
+        _decisions.clear()
+
+
+def get_serial_chain(obj) -> Optional[Tuple]:
+    """
+    Identify the objects a decision is computed from, None when one of
+    them has changes that are not committed yet
+    """
+    txn = get_transaction()
+    chain = []
+    while obj is not None:
+        if IResource.providedBy(obj):
+            oid = obj.__uuid__
+            serial = obj.__serial__
+            if oid is None or serial is None:
+                return None
+            if txn is not None and (oid in txn.modified or oid in txn.added):  # type: ignore
+                return None
+            chain.append((oid, serial))
+        else:
+            # security of the application and databases is set by adapters
+            # of their class and does not change
+            chain.append(obj.__class__)
+        obj = getattr(obj, "__parent__", None)
+    return tuple(chain)
+
+
+_acl_generation = 0
+
+
+def invalidate_compiled_acls() -> None:
+    """
+    Compile the acls again after local security changes
+    """
+    global _acl_generation
+    _acl_generation += 1
+
+
+@configure.subscriber(for_=(IResource, IObjectMovedEvent))
+def moved_object(obj, event):
+    invalidate_compiled_acls()
+
+
+class CompiledACL:
+    """
+    Effective local security of a resource, computed from the compiled acl
+    of its parent and its own local maps. Checking a permission does not
+    walk the parents anymore.
+
+    Settings of principals are kept with the depth of the resource that
+    sets them so the closest one wins like when walking the parents.
+    """
+
+    __slots__ = (
+        "parent",
+        "depth",
+        "generation",
+        "serial",
+        "parent_ob",
+        "principal_roles",
+        "local",
+        "_prinperm",
+        "_roleperm",
+        "_inherit",
+        "_roles",
+        "_principal_permissions",
+    )
+
+    def __init__(self, obj, parent: Optional["CompiledACL"]):
+        self.parent = parent
+        self.depth: int = parent.depth + 1 if parent is not None else 0
+        self.generation = _acl_generation
+        self.serial = getattr(obj, "__serial__", None)
+        self.parent_ob = getattr(obj, "__parent__", None)
+        self._prinperm = IPrincipalPermissionMap(obj, None)
+        self._roleperm = query_adapter(obj, IRolePermissionMap)
+        self._inherit = query_adapter(obj, IInheritPermissionMap)
+        self._roles: Dict[str, Dict[str, int]] = {}
+        self._principal_permissions: Dict[str, Tuple[Dict[str, Tuple[int, bool]], bool]] = {}
+
+        # principal -> role -> (depth, setting), shared with the parent when
+        # there are no local roles
+        principal_roles: Dict[str, Dict[str, Tuple[int, Any]]] = {}
+        if parent is not None:
+            principal_roles = parent.principal_roles
+        prinrole = IPrincipalRoleMap(obj, None)
+        cells = prinrole.get_principals_and_roles() if prinrole is not None else None
+        if cells:
+            principal_roles = principal_roles.copy()
+            copied: Set[str] = set()
+            for role, principal, setting in cells:
+                if principal not in copied:
+                    principal_roles[principal] = dict(principal_roles.get(principal, {}))
+                    copied.add(principal)
+                principal_roles[principal][role] = (self.depth, setting)
+        self.principal_roles: Dict[str, Dict[str, Tuple[int, Any]]] = principal_roles
+        # whether the resource changes anything of the security of its parent
+        self.local = bool(
+            cells
+            or (self._prinperm is not None and self._prinperm.get_principals_and_permissions())
+            or (self._roleperm is not None and self._roleperm.get_roles_and_permissions())
+            or (self._inherit is not None and self._inherit.get_locked_permissions())
+        )
+
+    def is_current(self, obj) -> bool:
+        return (
+            self.generation == _acl_generation
+            and self.serial == getattr(obj, "__serial__", None)
+            and self.parent_ob is getattr(obj, "__parent__", None)
+        )
+
+    def inherits(self, permission: str) -> bool:
+        return self._inherit is None or self._inherit.get_inheritance(permission) is Allow
+
+    def roles_for_permission(self, permission: str, level: str) -> Dict[str, int]:
+        key = permission + level
+        try:
+            return self._roles[key]
+        except KeyError:
+            pass
+
+        if not self.inherits(permission):
+            # We don't apply global permissions also
+            # Its dangerous as may lead to an object who nobody can see
+            roles: Dict[str, int] = dict()
+        elif self.parent is not None:
+            roles = self.parent.roles_for_permission(permission, "p")
+        else:
+            roles = cached_roles(None, permission, "p")
+
+        if self._roleperm is not None:
+            roles = roles.copy()
+            for role, setting in self._roleperm.get_roles_for_permission(permission):
+                if setting is Allow:
+                    roles[role] = 1
+                elif setting is AllowSingle and level == "o":
+                    roles[role] = 1
+                elif setting is Deny and role in roles:
+                    del roles[role]
+
+        self._roles[key] = roles
+        return roles
+
+    def principal_permissions(self, permission: str, level: str) -> Tuple[Dict[str, Tuple[int, bool]], bool]:
+        """
+        Get the principals with a setting for the permission and if the
+        global settings apply
+        """
+        key = permission + level
+        try:
+            return self._principal_permissions[key]
+        except KeyError:
+            pass
+
+        settings: Dict[str, Tuple[int, bool]] = {}
+        inherit_global = False
+        if self.inherits(permission):
+            if self.parent is not None:
+                settings, inherit_global = self.parent.principal_permissions(permission, "p")
+            else:
+                inherit_global = True
+
+        if self._prinperm is not None:
+            local = {}
+            for principal, setting in self._prinperm.get_principals_for_permission(permission):
+                value = level_setting_as_boolean(level, setting)
+                if value is not None:
+                    local[principal] = (self.depth, value)
+            if local:
+                settings = {**settings, **local}
+
+        result = self._principal_permissions[key] = (settings, inherit_global)
+        return result
+
+
+# compiled acls of the application and databases
+_static_acls: MutableMapping = weakref.WeakKeyDictionary()
+
+
+def get_compiled_acl(obj) -> Optional[CompiledACL]:
+    if obj is None:
+        return None
+    try:
+        volatile = obj.__volatile__
+    except AttributeError:
+        try:
+            volatile = _static_acls.setdefault(obj, {})
+        except TypeError:
+            # static directories and files are not kept
+            volatile = {}
+
+    acl = volatile.get("compiled_acl")
+    if acl is None or not acl.is_current(obj):
+        parent = get_compiled_acl(getattr(obj, "__parent__", None))
+        acl = volatile["compiled_acl"] = CompiledACL(obj, parent)
+    return acl
+
+
 @configure.adapter(for_=IPrincipal, provides=ISecurityPolicy)
 class SecurityPolicy:
     def __init__(self, principal: IPrincipal):
         self.principal = principal
         self._cache = LRU(100)
+        self._principal_key: Optional[str] = None
 
     def invalidate_cache(self):
         self._cache.clear()
+        self._principal_key = None
+
+    def principal_key(self) -> str:
+        """
+        Hash of everything the decisions take from the principal
+        """
+        if self._principal_key is None:
+            principal = self.principal
+            groups = sorted(getattr(principal, "groups", None) or [])
+            values = [
+                principal.id,
+                groups,
+                sorted((k, str(v)) for k, v in (getattr(principal, "roles", None) or {}).items()),
+                sorted((k, str(v)) for k, v in (getattr(principal, "permissions", None) or {}).items()),
+            ]
+            if groups:
+                groups_utility = get_utility(IGroups)
+                for group_id in groups:
+                    group = groups_utility.get_principal(group_id, principal)
+                    values.append(sorted((k, str(v)) for k, v in group.roles.items()))
+                    values.append(sorted((k, str(v)) for k, v in group.permissions.items()))
+            self._principal_key = hashlib.sha256(repr(values).encode("utf-8")).hexdigest()
+        return self._principal_key
 
     @profilable
     def check_permission(self, permission, obj):
@@ -76,13 +347,58 @@ class SecurityPolicy:
             if self.principal is SystemUser:
                 return True
 
-            # Check the permission
-            groups = getattr(self.principal, "groups", None) or []
-            if self.cached_decision(obj, self.principal.id, groups, permission):
-                return True
+            return self.decide(permission, obj, "o")
 
         return False
 
+    def filter_allowed(self, permission, objects):
+        if permission == Public:
+            return list(objects)
+        if self.principal is None:
+            return []
+        if self.principal is SystemUser:
+            return list(objects)
+
+        allowed = []
+        inherited: Dict[int, bool] = {}
+        for obj in objects:
+            parent = getattr(obj, "__parent__", None)
+            if IView.providedBy(obj) or parent is None or get_compiled_acl(obj).local:
+                decision = self.check_permission(permission, obj)
+            else:
+                # Without local security children get the decision of
+                # their parent for its children
+                try:
+                    decision = inherited[id(parent)]
+                except KeyError:
+                    decision = inherited[id(parent)] = self.decide(permission, parent, "p")
+            if decision:
+                allowed.append(obj)
+        return allowed
+
+    def decide(self, permission, obj, level) -> bool:
+        # Check the permission
+        groups = getattr(self.principal, "groups", None) or []
+        decisions = get_decision_cache()
+        if decisions is None:
+            return bool(self.cached_decision(obj, self.principal.id, groups, permission, level))
+
+        chain = get_serial_chain(obj)
+        if chain is None:
+            record_security_cache_metric("skip")
+            return bool(self.cached_decision(obj, self.principal.id, groups, permission, level))
+
+        key = (self.principal_key(), chain, permission, level)
+        decision = decisions.get(key)
+        if decision is not None:
+            record_security_cache_metric("hit")
+            return decision
+        record_security_cache_metric("miss")
+        decision = decisions[key] = bool(
+            self.cached_decision(obj, self.principal.id, groups, permission, level)
+        )
+        return decision
+
     def cache(self, parent, level=""):
         serial = getattr(parent, "__serial__", "")
         oid = getattr(parent, "__uuid__", "")
@@ -94,9 +410,9 @@ class SecurityPolicy:
         return cache
 
     @profilable
-    def cached_decision(self, parent, principal, groups, permission):
+    def cached_decision(self, parent, principal, groups, permission, level="o"):
         # Return the decision for a principal and permission
-        cache = self.cache(parent)
+        cache = self.cache(parent, level)
         try:
             cache_decision = cache.decision
         except AttributeError:
@@ -116,7 +432,7 @@ class SecurityPolicy:
 
         # Check direct permissions
         # First recursive function to get the permissions of a principal
-        decision = self.cached_principal_permission(parent, principal, groups, permission, "o")
+        decision = self.cached_principal_permission(parent, principal, groups, permission, level)
 
         if decision is not None:
             cache_decision_prin[permission] = decision
@@ -124,10 +440,10 @@ class SecurityPolicy:
 
         # Check Roles permission
         # First get the Roles needed
-        roles = cached_roles(parent, permission, "o")
+        roles = cached_roles(parent, permission, level)
         if roles:
             # Get the roles from the user
-            prin_roles = self.cached_principal_roles(parent, principal, groups, "o")
+            prin_roles = self.cached_principal_roles(parent, principal, groups, level)
             for role, setting in prin_roles.items():
                 if setting and (role in roles):
                     cache_decision_prin[permission] = decision = True
@@ -139,19 +455,29 @@ class SecurityPolicy:
     @profilable
     def cached_principal_permission(self, parent, principal, groups, permission, level):
         # Compute the permission, if any, for the principal.
-        cache = self.cache(parent, level)
+        if parent is None:
+            return self.global_principal_permission(principal, groups, permission)
+
+        acl = get_compiled_acl(parent)
+        settings, inherit_global = acl.principal_permissions(permission, level)
+        # The closest setting wins, the principal before its groups
+        found = None
+        for prin in (principal, *groups):
+            setting = settings.get(prin)
+            if setting is not None and (found is None or setting[0] > found[0]):
+                found = setting
+        if found is not None:
+            return found[1]
+        if inherit_global:
+            return self.global_principal_permission(principal, groups, permission)
+        return None
 
+    def global_principal_permission(self, principal, groups, permission):
+        cache = self.cache(None)
         try:
-            # We need to caches for first level and Allow Single
-            if level == "o":
-                cache_prin = cache.prino
-            else:
-                cache_prin = cache.prin
+            cache_prin = cache.prin
         except AttributeError:
-            if level == "o":
-                cache_prin = cache.prino = {}
-            else:
-                cache_prin = cache.prin = {}
+            cache_prin = cache.prin = {}
 
         cache_prin_per = cache_prin.get(principal)
         if not cache_prin_per:
@@ -162,51 +488,22 @@ class SecurityPolicy:
         except KeyError:
             pass
 
-        # We reached the end of the recursive we check global / local
-        if parent is None:
-            # We check the global configuration of the user and groups
-            prinper = self._global_permissions_for(principal, permission)
-            if prinper is not None:
-                cache_prin_per[permission] = prinper
-                return prinper
-
-            # If we did not found the permission for the user look at code
-            prinper = SettingAsBoolean[code_principal_permission_setting(permission, principal, None)]
-            # Now look for the group ids
-            if prinper is None:
-                for group in groups:
-                    prinper = SettingAsBoolean[code_principal_permission_setting(permission, group, None)]
-                    if prinper is not None:
-                        continue
+        # We check the global configuration of the user and groups
+        prinper = self._global_permissions_for(principal, permission)
+        if prinper is not None:
             cache_prin_per[permission] = prinper
             return prinper
 
-        # Get the local map of the permissions
-        # As we want to quit as soon as possible we check first locally
-        prinper_map = IPrincipalPermissionMap(parent, None)
-        if prinper_map is not None:
-            prinper = level_setting_as_boolean(level, prinper_map.get_setting(permission, principal, None))
-            if prinper is None:
-                for group in groups:
-                    prinper = level_setting_as_boolean(
-                        level, prinper_map.get_setting(permission, group, None)
-                    )
-                    if prinper is not None:
-                        # Once we conclude we exit
-                        # May happen that first group Deny and second
-                        # allows which will result on Deny for the first
-                        break
-            if prinper is not None:
-                return prinper
-
-        perminhe = query_adapter(parent, IInheritPermissionMap)
-        if perminhe is None or perminhe.get_inheritance(permission) is Allow:
-            parent = getattr(parent, "__parent__", None)
-            prinper = self.cached_principal_permission(parent, principal, groups, permission, "p")
-            cache_prin_per[permission] = prinper
-            return prinper
-        else:
-            return None
+        # If we did not found the permission for the user look at code
+        prinper = SettingAsBoolean[code_principal_permission_setting(permission, principal, None)]
+        # Now look for the group ids
+        if prinper is None:
+            for group in groups:
+                prinper = SettingAsBoolean[code_principal_permission_setting(permission, group, None)]
+                if prinper is not None:
+                    continue
+        cache_prin_per[permission] = prinper
+        return prinper
 
     def global_principal_roles(self, principal, groups):
         roles = dict(
@@ -242,18 +539,18 @@ class SecurityPolicy:
             cache_principal_roles[principal] = roles
             return roles
 
-        roles = self.cached_principal_roles(getattr(parent, "__parent__", None), principal, groups, "p")
-
-        # We check the local map of roles
-        prinrole = IPrincipalRoleMap(parent, None)
-
-        if prinrole:
+        roles = self.cached_principal_roles(None, principal, groups, "p")
+        acl = get_compiled_acl(parent)
+        # The closest setting wins, the groups after the principal
+        found: Dict[str, Tuple[int, Any]] = {}
+        for prin in (principal, *groups):
+            for role, (depth, setting) in acl.principal_roles.get(prin, {}).items():
+                if role not in found or depth >= found[role][0]:
+                    found[role] = (depth, setting)
+        if found:
             roles = roles.copy()
-            for role, setting in prinrole.get_roles_for_principal(principal):
-                roles[role] = level_setting_as_boolean(level, setting)
-            for group in groups:
-                for role, setting in prinrole.get_roles_for_principal(group):
-                    roles[role] = level_setting_as_boolean(level, setting)
+            for role, (depth, setting) in found.items():
+                roles[role] = level_setting_as_boolean(level if depth == acl.depth else "p", setting)
 
         cache_principal_roles[principal] = roles
         return roles
@@ -297,47 +594,13 @@ def cached_roles(parent: Optional[IBaseObject], permission: str, level: str) ->
     Get the roles for a specific permission.
     Global + Local + Code
     """
-    if parent is None:
+    acl = get_compiled_acl(parent)
+    if acl is None:
         roles = dict(
             [(role, 1) for (role, setting) in code_roles_for_permission(permission) if setting is Allow]
         )
         return roles
-
-    try:
-        cache = parent.__volatile__.setdefault("security_cache", {})
-    except AttributeError:
-        cache = {}
-    try:
-        cache_roles = cache["roles"]
-    except KeyError:
-        cache_roles = cache["roles"] = {}
-    try:
-        return cache_roles[permission + level]
-    except KeyError:
-        pass
-
-    perminhe = query_adapter(parent, IInheritPermissionMap)
-
-    if perminhe is None or perminhe.get_inheritance(permission) is Allow:
-        roles = cached_roles(getattr(parent, "__parent__", None), permission, "p")
-    else:
-        # We don't apply global permissions also
-        # Its dangerous as may lead to an object who nobody can see
-        roles = dict()
-
-    roleper = query_adapter(parent, IRolePermissionMap)
-    if roleper is not None:
-        roles = roles.copy()
-        for role, setting in roleper.get_roles_for_permission(permission):
-            if setting is Allow:
-                roles[role] = 1
-            elif setting is AllowSingle and level == "o":
-                roles[role] = 1
-            elif setting is Deny and role in roles:
-                del roles[role]
-
-    cache_roles[permission + level] = roles
-    return roles
+    return acl.roles_for_permission(permission, level)
 
 
 def cached_principals(
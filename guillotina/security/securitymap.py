@@ -103,7 +103,10 @@ class GuillotinaSecurityMap(SecurityMap):
         self.map = map
 
     def _invalidated_policy_cache(self):
+        from guillotina.security.policy import invalidate_compiled_acls
+
         super()._invalidated_policy_cache()
+        invalidate_compiled_acls()
         try:
             del self.context.__volatile__["security_cache"]
         except KeyError:
@@ -1,4 +1,6 @@
+from guillotina import app_settings
 from guillotina.component import get_utility
+from guillotina.contrib.cache import CACHE_PREFIX
 from guillotina.contrib.cache.strategy import BasicCache
 from guillotina.db.transaction import Transaction
 from guillotina.interfaces import ICacheUtility
@@ -183,3 +185,144 @@ async def test_fill_cache_doesnt_cache_large_objects(guillotina_main, mocked_cac
     await cache.store_object(obj, pickled)
     await cache.fill_cache()
     cache.set.assert_called_once()
+
+
+@pytest.mark.app_settings(DEFAULT_SETTINGS)
+async def test_cache_get_set_many(guillotina_main):
+    util = get_utility(ICacheUtility)
+    trns = mocks.MockTransaction(mocks.MockTransactionManager())
+    trns.added = trns.deleted = {}
+    rcache = BasicCache(trns)
+    await rcache.clear()
+
+    await rcache.set_many(
+        [("bar", [{"oid": "foo"}, {"container": "foo", "id": "bar"}]), ("foo", [{"oid": "bar"}])]
+    )
+    assert util._memory_cache.get("root-foo") == "bar"
+    assert util._memory_cache.get("root-foo/bar") == "bar"
+    assert await rcache.get_many([{"oid": "bar"}, {"oid": "missing"}, {"container": "foo", "id": "bar"}]) == [
+        "foo",
+        None,
+        "bar",
+    ]
+
+
+class _FakeDriver:
+    def __init__(self):
+        self.stored = {}
+        self.calls = []
+
+    async def get(self, key):
+        self.calls.append(("get", key))
+        return self.stored.get(key)
+
+    async def get_many(self, keys):
+        self.calls.append(("get_many", keys))
+        return [self.stored.get(key) for key in keys]
+
+    async def set_many(self, items, *, expire=None):
+        self.calls.append(("set_many", [key for key, _ in items]))
+        self.stored.update(items)
+
+    async def flushall(self):
+        self.stored.clear()
+
+
+@pytest.mark.app_settings(DEFAULT_SETTINGS)
+async def test_cache_get_set_many_uses_one_driver_call(guillotina_main):
+    util = get_utility(ICacheUtility)
+    driver = util._obj_driver = _FakeDriver()
+    try:
+        await util.set_many([(["foo", "foo2"], "bar"), ("bar", "foo")])
+        assert driver.calls == [
+            ("set_many", [CACHE_PREFIX + "foo", CACHE_PREFIX + "foo2", CACHE_PREFIX + "bar"])
+        ]
+
+        util._memory_cache.clear()
+        util._memory_cache.set("bar", "foo", 3)
+        driver.calls.clear()
+        assert await util.get_many(["foo", "bar", "missing"]) == ["bar", "foo", None]
+        assert driver.calls == [("get_many", [CACHE_PREFIX + "foo", CACHE_PREFIX + "missing"])]
+        # values loaded from the network cache are now in memory
+        assert util._memory_cache.get("foo") == "bar"
+    finally:
+        util._obj_driver = None
+
+
+@pytest.mark.app_settings(DEFAULT_SETTINGS)
+async def test_cache_reference_keys(guillotina_main):
+    util = get_utility(ICacheUtility)
+    driver = util._obj_driver = _FakeDriver()
+    record = {"zoid": "foo-oid", "state": b"bar"}
+    try:
+        with mock.patch.dict(app_settings["cache"], {"reference_keys": True}):
+            await util.set(["foo", "foo2"], record)
+            # values of other than objects are stored for every key
+            await util.set(["bar", "bar2"], ["foo"])
+        # only the first key holds the data
+        assert driver.stored[CACHE_PREFIX + "foo2"] == b'gcache-ref:["foo-oid","foo"]'
+        assert driver.stored[CACHE_PREFIX + "bar2"] == driver.stored[CACHE_PREFIX + "bar"]
+
+        util._memory_cache.clear()
+        assert await util.get("foo2") == record
+
+        util._memory_cache.clear()
+        driver.calls.clear()
+        assert await util.get_many(["foo2", "missing", "foo"]) == [record, None, record]
+        assert driver.calls == [
+            ("get_many", [CACHE_PREFIX + "foo2", CACHE_PREFIX + "missing", CACHE_PREFIX + "foo"]),
+            ("get_many", [CACHE_PREFIX + "foo"]),
+        ]
+
+        # references to the data of another object are misses
+        util._memory_cache.clear()
+        driver.stored[CACHE_PREFIX + "foo"] = util._codec.dumps({"zoid": "other-oid", "state": b"baz"})
+        assert await util.get("foo2") is None
+        assert await util.get_many(["foo2"]) == [None]
+        assert "foo2" not in util._memory_cache
+
+        # references to missing keys are misses
+        del driver.stored[CACHE_PREFIX + "foo"]
+        assert await util.get("foo2") is None
+        assert await util.get_many(["foo2"]) == [None]
+    finally:
+        util._obj_driver = None
+
+
+@pytest.mark.app_settings(DEFAULT_SETTINGS)
+async def test_cache_resolved_paths(guillotina_main):
+    tm = mocks.MockTransactionManager()
+    storage = tm._storage
+    txn = Transaction(tm)
+    cache = BasicCache(txn)
+    txn._cache = cache
+    container = create_content()
+    folder = create_content(parent=container, id="folder")
+    item = create_content(parent=folder, id="item")
+    for ob in (container, folder, item):
+        storage.store(None, None, None, ob, txn)
+
+    with mock.patch.object(storage, "resolve_path", wraps=storage.resolve_path) as resolve_path:
+        obs = await txn.resolve_path(container, ["folder", "item"])
+        assert [ob.__uuid__ for ob in obs] == [folder.__uuid__, item.__uuid__]
+        assert obs[1].__parent__ is obs[0]
+        assert obs[0].__parent__ is container
+
+        obs = await txn.resolve_path(container, ["folder", "item"])
+        assert [ob.__uuid__ for ob in obs] == [folder.__uuid__, item.__uuid__]
+        assert resolve_path.call_count == 1
+
+        # move the item, its cache keys get invalidated
+        other = create_content(parent=container, id="other")
+        item.__parent__ = other
+        storage.store(None, None, None, other, txn)
+        storage.store(None, None, None, item, txn)
+        del storage._objects[folder.__uuid__]["children"]["item"]
+        await cache.delete_all(cache.get_cache_keys(item, "modified"))
+
+        obs = await txn.resolve_path(container, ["folder", "item"])
+        assert [ob.__uuid__ for ob in obs] == [folder.__uuid__]
+        assert resolve_path.call_count == 2
+
+        obs = await txn.resolve_path(container, ["other", "item"])
+        assert [ob.__uuid__ for ob in obs] == [other.__uuid__, item.__uuid__]
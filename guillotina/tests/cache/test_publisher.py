@@ -0,0 +1,73 @@
+from guillotina.contrib.cache.publisher import InvalidationPublisher
+
+import asyncio
+import pytest
+
+
+pytestmark = pytest.mark.asyncio
+
+
+DEFAULT_SETTINGS = {
+    "applications": ["guillotina", "guillotina.contrib.cache"],
+    "cache": {"updates_channel": "guillotina", "driver": None},
+}
+
+
+class _FakeSubscriber:
+    def __init__(self):
+        self.published = []
+
+    async def publish(self, channel, rid, data):
+        self.published.append((channel, rid, data))
+
+
+class _FakeUtility:
+    _uid = "foobar"
+
+    def __init__(self):
+        self._subscriber = _FakeSubscriber()
+
+
+@pytest.mark.app_settings(DEFAULT_SETTINGS)
+async def test_coalesce_transactions_in_one_message(dummy_guillotina):
+    utility = _FakeUtility()
+    publisher = InvalidationPublisher(utility)
+    publisher.queue(1, ["a", "b"], {})
+    publisher.queue(2, ["b", "c"], {})
+    assert utility._subscriber.published == []
+
+    await asyncio.sleep(0)
+    assert utility._subscriber.published == [
+        ("guillotina", "foobar", {"tid": 2, "keys": ["a", "b", "c"], "push": {}})
+    ]
+    assert publisher.size == 0
+
+
+@pytest.mark.app_settings(DEFAULT_SETTINGS)
+async def test_drop_stale_pushed_objects(dummy_guillotina):
+    utility = _FakeUtility()
+    publisher = InvalidationPublisher(utility)
+    publisher.queue(1, ["a", "b"], {"a": {"tid": 1}, "b": {"tid": 1}})
+    publisher.queue(2, ["a"], {})
+    publisher.queue(3, ["b"], {"b": {"tid": 3}})
+    await publisher.flush()
+
+    _, _, data = utility._subscriber.published[0]
+    assert data["push"] == {"b": {"tid": 3}}
+    assert data["keys"] == ["a", "b"]
+
+
+@pytest.mark.app_settings(DEFAULT_SETTINGS)
+@pytest.mark.app_settings({"cache": {"invalidation_delay": 10, "invalidation_batch_size": 3}})
+async def test_flush_when_batch_is_full(dummy_guillotina):
+    utility = _FakeUtility()
+    publisher = InvalidationPublisher(utility)
+    publisher.queue(1, ["a", "b"], {})
+    await asyncio.sleep(0)
+    assert utility._subscriber.published == []
+
+    publisher.queue(2, ["c"], {})
+    await asyncio.sleep(0)
+    assert len(utility._subscriber.published) == 1
+    assert utility._subscriber.published[0][2]["keys"] == ["a", "b", "c"]
+    publisher._task.cancel()
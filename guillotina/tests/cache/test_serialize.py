@@ -0,0 +1,86 @@
+from guillotina.component import get_utility
+from guillotina.contrib.cache.serialize import CompactCodec
+from guillotina.contrib.cache.serialize import PickleCodec
+from guillotina.interfaces import ICacheUtility
+from guillotina.tests.utils import create_content
+
+import pickle
+import pytest
+
+
+RECORD = {
+    "zoid": "foobar",
+    "tid": 42,
+    "id": "foobar",
+    "parent_id": None,
+    "of": None,
+    "type": "Item",
+    "state_size": 100,
+    "resource": True,
+    "state": pickle.dumps(create_content()),
+}
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        RECORD,
+        {"state": b"foobar", "zoid": "foobar", "tid": 1, "id": "foobar"},
+        {"zoid": "foobar", "tid": 1, "id": "foobar", "parent_id": "foo", "state": b""},
+        {"state": b"foobar", "zoid": "foobar", "tid": "1", "id": "foobar"},
+        {"state": "foobar", "zoid": "foobar"},
+        {"state": b"foobar", "zoid": "foobar", "other": 1},
+        {"foo": "bar"},
+        ["foo", "bar"],
+        "__<EMPTY VALUE>__",
+        5,
+    ],
+)
+def test_compact_codec_roundtrip(value):
+    for codec in (CompactCodec(compress_threshold=0), CompactCodec(compress_threshold=1)):
+        assert codec.loads(codec.dumps(value)) == value
+
+
+def test_compact_codec_stores_large_states_without_pickling():
+    codec = CompactCodec(compress_threshold=0)
+    record = dict(RECORD, state=b"x" * codec.raw_state_size)
+    data = codec.dumps(record)
+    assert data.endswith(record["state"])
+    assert codec.loads(data) == record
+
+    # smaller records and other values are pickled
+    assert pickle.loads(codec.dumps(RECORD)) == RECORD
+    assert pickle.loads(codec.dumps({"foo": "bar"})) == {"foo": "bar"}
+
+
+def test_compact_codec_compresses_large_state():
+    record = dict(RECORD, state=b"x" * 1000)
+    codec = CompactCodec(compress_threshold=500)
+    data = codec.dumps(record)
+    assert len(data) < 500
+    assert codec.loads(data) == record
+
+    # below threshold it is not compressed
+    assert len(CompactCodec(compress_threshold=2000).dumps(record)) > 1000
+
+
+def test_compact_codec_reads_pickled_values():
+    assert CompactCodec().loads(PickleCodec().dumps(RECORD)) == RECORD
+
+
+@pytest.mark.asyncio
+@pytest.mark.app_settings(
+    {
+        "applications": ["guillotina", "guillotina.contrib.cache"],
+        "cache": {
+            "updates_channel": None,
+            "driver": None,
+            "codec": "guillotina.contrib.cache.serialize.CompactCodec",
+            "compress_threshold": 1024,
+        },
+    }
+)
+async def test_cache_utility_uses_configured_codec(guillotina_main):
+    util = get_utility(ICacheUtility)
+    assert isinstance(util._codec, CompactCodec)
+    assert util._codec.compress_threshold == 1024
@@ -1,18 +1,48 @@
+from guillotina.contrib.cache.lru import LRU
 from guillotina.contrib.cache.utility import CacheUtility
 
 import pytest
+import sys
 
 
 @pytest.mark.asyncio
 async def test_get_size_of_item():
     rcache = CacheUtility()
-    from guillotina.contrib.cache.utility import _default_size
-    import sys
 
-    assert rcache.get_size(dict(a=1)) == _default_size
     assert rcache.get_size(1) == sys.getsizeof(1)
-    assert rcache.get_size(dict(state=b"x" * 10)) == 10
+    assert rcache.get_size(None) == 0
+    assert rcache.get_size(dict(a=1)) == sys.getsizeof(dict(a=1)) + sys.getsizeof("a") + sys.getsizeof(1)
+
+    record = dict(state=b"x" * 10)
+    assert rcache.get_size(record) == (
+        sys.getsizeof(record) + sys.getsizeof("state") + sys.getsizeof(b"x" * 10)
+    )
 
     item = ["x" * 10, "x" * 10, "x" * 10]
+    assert rcache.get_size(item) == sys.getsizeof(item) + sys.getsizeof("x" * 10) * 3
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_budget_accounts_keys():
+    rcache = CacheUtility()
+    rcache._memory_cache = LRU(2048)
+    value = b"x" * 500
+
+    await rcache.set(["foo", "bar"], value)
+    memory = rcache._memory_cache.get_memory()
+    assert memory > rcache.get_size(value)
+
+    # values over the budget are not cached and do not leave stale data around
+    await rcache.set("foo", b"x" * 4096)
+    assert "foo" not in rcache._memory_cache
+    assert rcache._memory_cache.get_memory() < memory
+
+    for idx in range(10):
+        await rcache.set(f"key-{idx}", value)
+    assert rcache._memory_cache.get_memory() <= 2048
 
-    assert rcache.get_size(item) == sys.getsizeof("x" * 10) * 3
+    stats = (await rcache.get_stats())["in-memory"]
+    assert stats["memory"] == rcache._memory_cache.get_memory()
+    assert stats["max_memory"] == 2048
+    assert stats["size"] == len(rcache._memory_cache)
+    assert stats["evictions"] > 0
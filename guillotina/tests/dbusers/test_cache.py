@@ -0,0 +1,124 @@
+from . import settings
+from guillotina.component import query_utility
+from guillotina.contrib.dbusers.cache import PrincipalCache
+from guillotina.contrib.dbusers.interfaces import IPrincipalCache
+from unittest import mock
+
+import base64
+import json
+import pytest
+import time
+
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_principal_cache():
+    cache = PrincipalCache({"ttl": 60, "size": 2})
+    cache.set("foo", "user-foo", ["root-foo", "root-group"])
+    cache.set("bar", "user-bar", ["root-bar", "root-group"])
+    assert cache.get("foo") == "user-foo"
+
+    cache.invalidate(["root-foo"])
+    assert cache.get("foo") is None
+    assert cache.get("bar") == "user-bar"
+
+    await cache.receive(data={"tid": 1, "keys": ["root-group"], "push": {}})
+    assert cache.get("bar") is None
+    assert len(cache) == 0
+    assert cache._dependencies == {}
+
+    # evicted users do not leave their dependencies around
+    for key in ("foo", "bar", "baz"):
+        cache.set(key, f"user-{key}", [f"root-{key}"])
+    assert cache.get("foo") is None
+    assert set(cache._dependencies) == {"root-bar", "root-baz"}
+
+    cache = PrincipalCache({"ttl": 60})
+    cache.set("foo", "user-foo", ["root-foo"])
+    with mock.patch("guillotina.contrib.dbusers.cache.time.time", return_value=time.time() + 61):
+        assert cache.get("foo") is None
+    assert cache._dependencies == {}
+
+    # disabled by default
+    cache = PrincipalCache()
+    cache.set("foo", "user-foo", ["root-foo"])
+    assert cache.get("foo") is None
+    assert len(cache) == 0
+
+
+@pytest.mark.app_settings(settings.DEFAULT_SETTINGS)
+@pytest.mark.app_settings(
+    {
+        "load_utilities": {
+            "dbusers_principal_cache": {
+                "provides": "guillotina.contrib.dbusers.interfaces.IPrincipalCache",
+                "factory": "guillotina.contrib.dbusers.cache.PrincipalCache",
+                "settings": {"ttl": 60},
+            }
+        }
+    }
+)
+async def test_user_cached_until_modified(dbusers_requester):
+    async with dbusers_requester as requester:
+        await requester("POST", "/db/guillotina/users", data=json.dumps(settings.user_data))
+        token = base64.b64encode(b"foobar:password").decode("ascii")
+
+        cache = query_utility(IPrincipalCache)
+        cache.clear()
+        for _ in range(2):
+            _, status = await requester("GET", "/db/guillotina/users/foobar", token=token, auth_type="Basic")
+            assert status == 200
+        assert len(cache) == 1
+        # records are cached, not the objects of the request that loaded them
+        ((_, (user_record, group_records), _),) = cache._entries.values()
+        assert user_record["zoid"] is not None
+        assert isinstance(user_record["state"], bytes)
+        assert group_records == []
+
+        _, status = await requester(
+            "PATCH", "/db/guillotina/users/foobar", data=json.dumps({"disabled": True})
+        )
+        assert status == 204
+        assert len(cache) == 0
+
+        _, status = await requester("GET", "/db/guillotina/users/foobar", token=token, auth_type="Basic")
+        assert status == 401
+
+
+@pytest.mark.app_settings(settings.DEFAULT_SETTINGS)
+@pytest.mark.app_settings(
+    {
+        "load_utilities": {
+            "dbusers_principal_cache": {
+                "provides": "guillotina.contrib.dbusers.interfaces.IPrincipalCache",
+                "factory": "guillotina.contrib.dbusers.cache.PrincipalCache",
+                "settings": {"ttl": 60},
+            }
+        }
+    }
+)
+async def test_cached_user_groups(dbusers_requester):
+    async with dbusers_requester as requester:
+        await requester(
+            "POST",
+            "/db/guillotina/groups",
+            data=json.dumps(dict(settings.group_data, user_roles=["guillotina.Reader"])),
+        )
+        await requester(
+            "POST",
+            "/db/guillotina/users",
+            data=json.dumps(dict(settings.user_data, user_groups=["foobar_group"])),
+        )
+        token = base64.b64encode(b"foobar:password").decode("ascii")
+
+        cache = query_utility(IPrincipalCache)
+        cache.clear()
+        for _ in range(2):
+            # roles of the group are kept by the users built from the cache
+            _, status = await requester(
+                "GET", "/db/guillotina/groups/foobar_group", token=token, auth_type="Basic"
+            )
+            assert status == 200
+        ((_, (_, group_records), _),) = cache._entries.values()
+        assert [ident for ident, _ in group_records] == ["foobar_group"]
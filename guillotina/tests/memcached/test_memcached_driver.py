@@ -101,6 +101,10 @@ async def test_memcached_ops(memcached_container, guillotina_main, dont_probe_me
     result = await driver.get("test4")
     assert result is None
 
+    await driver.set_many([("test6", b"testdata6"), ("test7", b"testdata7")], expire=20)
+    result = await driver.get_many(["test6", "missing", "test7"])
+    assert result == [b"testdata6", None, b"testdata7"]
+
     await driver.flushall()
     result = await driver.get("test5")
     assert result is None
@@ -102,6 +102,10 @@ class MockStorage:  # type: ignore
         self._stored = 0
         self._objects_table_name = "objects"
 
+    @property
+    def objects_table_name(self):
+        return self._objects_table_name
+
     async def get_annotation(self, trns, oid, id):
         return None
 
@@ -121,6 +125,19 @@ class MockStorage:  # type: ignore
     async def load(self, txn, oid):
         return self._objects[oid]
 
+    async def load_many(self, txn, oids):
+        return [self._objects[oid] for oid in oids if oid in self._objects]
+
+    async def resolve_path(self, txn, container_uid, keys):
+        results = []
+        for key in keys:
+            result = await self.get_child(txn, container_uid, key)
+            if result is None:
+                break
+            results.append(result)
+            container_uid = result["zoid"]
+        return results
+
     async def get_child(self, txn, container_uid, key):
         if container_uid not in self._objects:
             return
@@ -137,6 +154,7 @@ class MockStorage:  # type: ignore
             "zoid": ob.__uuid__,
             "tid": 1,
             "id": writer.id,
+            "parent_id": ob.__parent__.__uuid__ if ob.__parent__ else None,
             "children": self._objects.get(ob.__uuid__, {}).get("children", {}),
         }
         if ob.__parent__ and ob.__parent__.__uuid__ in self._objects:
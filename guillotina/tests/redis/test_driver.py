@@ -42,6 +42,10 @@ async def test_redis_ops(redis_container, guillotina_main):
     result = await driver.get("test5")
     assert result is None
 
+    await driver.set_many([("test7", "testdata7"), ("test8", "testdata8")], expire=20)
+    result = await driver.get_many(["test7", "missing", "test8"])
+    assert result == [b"testdata7", None, b"testdata8"]
+
     await driver.flushall()
     result = await driver.get("test6")
     assert result is None
@@ -7,6 +7,7 @@ from guillotina.behaviors.attachment import IAttachment
 from guillotina.behaviors.dublincore import IDublinCore
 from guillotina.configure import contenttype
 from guillotina.content import Item
+from guillotina.db.transaction import Transaction
 from guillotina.fields.patch import PatchField
 from guillotina.interfaces import IAnnotations
 from guillotina.interfaces import IFile
@@ -16,6 +17,7 @@ from guillotina.tests import utils
 from guillotina.tests.dbusers.settings import DEFAULT_SETTINGS as DBUSERS_DEFAULT_SETTINGS
 from guillotina.transactions import transaction
 from guillotina.utils import get_behavior
+from unittest import mock
 from zope.interface import Interface
 
 import base64
@@ -897,6 +899,40 @@ async def test_items(container_requester):
         assert "guillotina.behaviors.dublincore.IDublinCore" not in item
 
 
+async def test_items_not_allowed(container_requester):
+    async with container_requester as requester:
+        for idx in range(3):
+            await requester("POST", "/db/guillotina", data=json.dumps({"@type": "Item", "id": f"item{idx}"}))
+        await requester(
+            "POST",
+            "/db/guillotina/item1/@sharing",
+            data=json.dumps(
+                {
+                    "prinperm": [
+                        {"principal": "root", "permission": "guillotina.AccessContent", "setting": "Deny"}
+                    ]
+                }
+            ),
+        )
+        response, _ = await requester("GET", "/db/guillotina/@items")
+        assert sorted(item["@name"] for item in response["items"]) == ["item0", "item2"]
+        assert response["total"] == 3
+
+        # keys removed after being listed are skipped
+        get_page_of_keys = Transaction.get_page_of_keys
+
+        async def get_page_with_removed_key(self, *args, **kwargs):
+            return await get_page_of_keys(self, *args, **kwargs) + ["removed"]
+
+        with mock.patch.object(Transaction, "get_page_of_keys", get_page_with_removed_key):
+            response, status = await requester("GET", "/db/guillotina/@items")
+        assert status == 200
+        assert sorted(item["@name"] for item in response["items"]) == ["item0", "item2"]
+
+        response, _ = await requester("GET", "/db/guillotina")
+        assert sorted(item["@name"] for item in response["items"]) == ["item0", "item2"]
+
+
 async def test_debug_headers(container_requester):
     async with container_requester as requester:
         _, _, headers = await requester.make_request("GET", "/db/guillotina", headers={"X-Debug": "1"})
@@ -2,9 +2,11 @@ from datetime import datetime
 from datetime import timedelta
 from guillotina._settings import app_settings
 from guillotina.auth import validators
+from unittest import mock
 
 import jwt
 import pytest
+import time
 
 
 pytestmark = pytest.mark.asyncio
@@ -61,3 +63,66 @@ async def test_sha512_hashing(dummy_guillotina):
     hashed = validators.hash_password("foobar", algorithm="sha512")
     assert validators.check_password(hashed, "foobar")
     assert not validators.check_password(hashed, "barfoo")
+
+
+async def test_verified_jwt_is_cached(dummy_guillotina):
+    token = jwt.encode(
+        {"id": "root", "exp": datetime.utcnow() + timedelta(seconds=60)},
+        app_settings["jwt"]["secret"],
+        algorithm=app_settings["jwt"]["algorithm"],
+    )
+    if isinstance(token, bytes):
+        token = token.decode("utf-8")
+    assert validators.decode_jwt(token)["id"] == "root"
+    with mock.patch("guillotina.auth.validators.jwt.decode") as decode:
+        decoded = validators.decode_jwt(token)
+        assert not decode.called
+    assert decoded["id"] == "root"
+    # callers do not modify the cached token
+    decoded["id"] = "foobar"
+    assert validators.decode_jwt(token)["id"] == "root"
+
+
+async def test_expired_jwt_is_not_cached(dummy_guillotina):
+    token = jwt.encode(
+        {"id": "root", "exp": datetime.utcnow() + timedelta(seconds=60)},
+        app_settings["jwt"]["secret"],
+        algorithm=app_settings["jwt"]["algorithm"],
+    )
+    if isinstance(token, bytes):
+        token = token.decode("utf-8")
+    validators.decode_jwt(token)
+    with mock.patch("guillotina.auth.validators.time.time", return_value=time.time() + 120), mock.patch(
+        "guillotina.auth.validators.jwt.decode", side_effect=jwt.ExpiredSignatureError
+    ) as decode:
+        with pytest.raises(jwt.ExpiredSignatureError):
+            validators.decode_jwt(token)
+        assert decode.called
+
+
+class _FakeSessionManager:
+    def __init__(self):
+        self.sessions = {("root", "foobar")}
+        self.checks = 0
+
+    async def exist_session(self, ident, session):
+        self.checks += 1
+        return (ident, session) in self.sessions
+
+
+async def test_session_existence_cache(dummy_guillotina):
+    session_manager = _FakeSessionManager()
+    assert await validators.exist_session(session_manager, "root", "foobar")
+    assert await validators.exist_session(session_manager, "root", "foobar")
+    assert session_manager.checks == 2
+
+    with mock.patch.dict(app_settings["jwt"], {"session_cache_ttl": 60}):
+        assert await validators.exist_session(session_manager, "root", "foobar")
+        assert await validators.exist_session(session_manager, "root", "foobar")
+        assert session_manager.checks == 3
+
+        session_manager.sessions.clear()
+        validators.forget_session("root", "foobar")
+        assert not await validators.exist_session(session_manager, "root", "foobar")
+        assert not await validators.exist_session(session_manager, "root", "foobar")
+        assert session_manager.checks == 5
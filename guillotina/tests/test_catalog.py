@@ -19,7 +19,9 @@ from guillotina.interfaces import IResource
 from guillotina.interfaces import ISecurityInfo
 from guillotina.tests import mocks
 from guillotina.tests import utils as test_utils
+from unittest import mock
 
+import asyncio
 import json
 import os
 import pytest
@@ -204,6 +206,25 @@ async def test_search_endpoint_no_pg(container_requester):
         assert len(response["items"]) == 0
 
 
+@pytest.mark.skipif(not NOT_POSTGRES, reason="Only not PG")
+async def test_search_endpoint_stream_no_pg(container_requester):
+    from guillotina.catalog.catalog import DefaultSearchUtility
+
+    async def search(self, context, query):
+        return {"items": [{"@name": f"item{idx}", "title": "x" * 100} for idx in range(500)]}
+
+    async with container_requester as requester:
+        with mock.patch.object(DefaultSearchUtility, "search", search):
+            response, status, headers = await requester.make_request(
+                "GET", "/db/guillotina/@search", accept="application/x-ndjson"
+            )
+        assert status == 200
+        assert headers["Content-Type"] == "application/x-ndjson"
+        lines = response.decode().splitlines()
+        assert len(lines) == 500
+        assert json.loads(lines[-1])["@name"] == "item499"
+
+
 async def test_search_post_endpoint(container_requester):
     async with container_requester as requester:
         response, status = await requester("POST", "/db/guillotina/@search", data="{}")
@@ -252,8 +273,8 @@ async def test_query_stored_json(container_requester):
             )
             print(f"{result}")
             assert len(result) == 2
-            assert json.loads(result[0]["json"])["id"] == "item1"
-            assert json.loads(result[1]["json"])["id"] == "item2"
+            assert result[0]["json"]["id"] == "item1"
+            assert result[1]["json"]["id"] == "item2"
 
             result = await conn.fetch(
                 """
@@ -266,6 +287,192 @@ async def test_query_stored_json(container_requester):
             assert len(result) == 1
 
 
+@pytest.mark.app_settings(PG_CATALOG_SETTINGS)
+@pytest.mark.app_settings({"catalog_reindex_batch_size": 2, "catalog_reindex_workers": 2})
+@pytest.mark.skipif(NOT_POSTGRES, reason="Only PG")
+async def test_reindex_pg_catalog(container_requester):
+    async with container_requester as requester:
+        await requester("POST", "/db/guillotina/", data=json.dumps({"@type": "Folder", "id": "folder"}))
+        await requester("POST", "/db/guillotina/folder", data=json.dumps({"@type": "Folder", "id": "sub"}))
+        for idx in range(5):
+            await requester(
+                "POST", "/db/guillotina/folder/sub", data=json.dumps({"@type": "Item", "id": f"item{idx}"})
+            )
+        await requester("POST", "/db/guillotina/", data=json.dumps({"@type": "Item", "id": "item"}))
+
+        table_name = requester.db.storage._objects_table_name
+        async with requester.db.storage.pool.acquire() as conn:
+            await conn.execute(f"UPDATE {table_name} SET json = NULL")
+
+        response, status = await requester("POST", "/db/guillotina/@catalog-reindex", data="{}")
+        assert status == 200
+
+        async with requester.db.storage.pool.acquire() as conn:
+            result = await conn.fetch(
+                f"""
+    select json->>'id' as id, json->>'path' as path from {table_name}
+    where json->>'container_id' = 'guillotina' AND json->>'type_name' IN ('Folder', 'Item')
+    """
+            )
+        paths = {record["id"]: record["path"] for record in result}
+        assert len(paths) == 8
+        assert paths["item3"] == "/folder/sub/item3"
+        assert paths["item"] == "/item"
+
+
+@pytest.mark.app_settings(PG_CATALOG_SETTINGS)
+@pytest.mark.app_settings({"catalog_reindex_batch_size": 2})
+@pytest.mark.skipif(NOT_POSTGRES, reason="Only PG")
+async def test_reindex_security_pg_catalog(container_requester):
+    from guillotina.contrib.catalog.pg.utility import PGSearchUtility
+
+    async with container_requester as requester:
+        await requester("POST", "/db/guillotina/", data=json.dumps({"@type": "Folder", "id": "folder"}))
+        await requester("POST", "/db/guillotina/folder", data=json.dumps({"@type": "Folder", "id": "sub"}))
+        for idx in range(3):
+            await requester(
+                "POST",
+                "/db/guillotina/folder/sub",
+                data=json.dumps({"@type": "Item", "id": f"item{idx}", "title": f"Item {idx}"}),
+            )
+
+        table_name = requester.db.storage._objects_table_name
+        async with requester.db.storage.pool.acquire() as conn:
+            await conn.execute(
+                f"""UPDATE {table_name}
+SET json = json || '{{"path": "/old", "access_roles": []}}'::jsonb
+WHERE json->>'container_id' = 'guillotina'"""
+            )
+
+        async with requester.db.get_transaction_manager() as tm, await tm.begin():
+            test_utils.login()
+            root = await tm.get_root()
+            container = await root.async_get("guillotina")
+            folder = await container.async_get("folder")
+            await PGSearchUtility().reindex_all_content(folder, security=True)
+
+        async with requester.db.storage.pool.acquire() as conn:
+            result = await conn.fetch(
+                f"""
+    select json from {table_name}
+    where json->>'container_id' = 'guillotina' AND json->>'type_name' IN ('Folder', 'Item')
+    """
+            )
+        datas = {record["json"]["id"]: record["json"] for record in result}
+        assert datas["folder"]["path"] == "/folder"
+        assert datas["item2"]["path"] == "/folder/sub/item2"
+        assert datas["item2"]["title"] == "Item 2"
+        assert "guillotina.Owner" in datas["item2"]["access_roles"]
+
+
+class _SubtreeCursor:
+    def __init__(self, records):
+        self.records = records
+
+    async def fetch(self, size):
+        records, self.records = self.records[:size], self.records[size:]
+        return records
+
+
+class _SubtreeConnection:
+    def __init__(self, subtrees):
+        self.subtrees = subtrees
+        self.roots = []
+        self.updated = []
+
+    def transaction(self):
+        return mock.MagicMock()
+
+    async def cursor(self, sql, uid):
+        self.roots.append(uid)
+        return _SubtreeCursor(self.subtrees[uid])
+
+    async def execute(self, sql, oids, values):
+        self.updated.extend(oids)
+
+
+@pytest.mark.app_settings(PG_CATALOG_SETTINGS)
+async def test_reindex_security_pg_catalog_subtree(dummy_guillotina, caplog):
+    from guillotina.content import Folder
+    from guillotina.contrib.catalog.pg import utility as pg_utility
+
+    container = test_utils.create_content(Container, "Container", uid="container")
+    folder = test_utils.create_content(Folder, "Folder", uid="folder", parent=container)
+    sub = test_utils.create_content(Folder, "Folder", uid="sub", parent=folder)
+    item = test_utils.create_content(uid="item", parent=sub)
+    conn = _SubtreeConnection(
+        {
+            "folder": [
+                {"zoid": "sub", "parent_id": "folder", "depth": 1},
+                {"zoid": "orphan", "parent_id": "missing", "depth": 1},
+            ],
+            "sub": [{"zoid": "item", "parent_id": "sub", "depth": 1}],
+        }
+    )
+    objects = {"sub": sub, "item": item}
+    txn = mocks.MockTransaction()
+    txn.get_connection = mock.AsyncMock(return_value=conn)
+    txn.lock = asyncio.Lock()
+    txn.storage = mock.MagicMock()
+    txn._get_many = mock.AsyncMock(side_effect=lambda oids: {oid: {"zoid": oid} for oid in oids})
+    txn._fill_object = lambda record, parent: objects[record["zoid"]]
+    tm = mock.MagicMock()
+    tm.begin = mock.AsyncMock(return_value=txn)
+    tm.commit = mock.AsyncMock()
+    tm.abort = mock.AsyncMock()
+    data = {"count": 0, "tm": tm, "table_name": "objects", "batch_size": 1, "start": 0}
+    with mock.patch.object(pg_utility, "MAX_SUBTREE_DEPTH", 1), test_utils.get_mocked_request():
+        test_utils.login()
+        await pg_utility.PGSearchUtility()._reindex_security(folder, data)
+    # the folder at the maximum depth is the root of a second query
+    assert conn.roots == ["folder", "sub"]
+    assert conn.updated == ["folder", "sub", "item"]
+    assert data["count"] == 3
+    assert "Skipped 1 objects" in caplog.text
+    # every batch is committed, the walk is read only
+    assert tm.begin.call_args_list[0] == mock.call(read_only=True)
+    assert tm.commit.call_count == 4
+    assert tm.abort.call_count == 1
+
+
+@pytest.mark.app_settings(PG_CATALOG_SETTINGS)
+@pytest.mark.app_settings({"catalog_columns": ["modification_date", "type_name"]})
+@pytest.mark.skipif(NOT_POSTGRES, reason="Only PG")
+async def test_query_pg_catalog_columns(container_requester):
+    from guillotina.contrib.catalog.pg import indexes as pg_indexes
+    from guillotina.contrib.catalog.pg.utility import PGSearchUtility
+
+    pg_indexes.get_pg_indexes(invalidate=True)
+    try:
+        async with container_requester as requester:
+            for idx in range(3):
+                await requester(
+                    "POST", "/db/guillotina/", data=json.dumps({"@type": "Item", "id": f"item{idx}"})
+                )
+            await requester("POST", "/db/guillotina/", data=json.dumps({"@type": "Folder", "id": "folder"}))
+
+            async with requester.db.get_transaction_manager() as tm, await tm.begin():
+                test_utils.login()
+                root = await tm.get_root()
+                container = await root.async_get("guillotina")
+
+                util = PGSearchUtility()
+                await util.initialize()
+                results = await util.search(
+                    container, {"type_name": "Item", "_sort_des": "modification_date", "_size": "2"}
+                )
+                assert [item["@name"] for item in results["items"]] == ["item2", "item1"]
+                assert results["items_total"] == 3
+
+                results = await util.search(
+                    container,
+                    {"type_name": "Item", "_sort_des": "modification_date", "_after": results["_after"]},
+                )
+                assert [item["@name"] for item in results["items"]] == ["item0"]
+    finally:
+        pg_indexes._cached_indexes.clear()
+
+
 @pytest.mark.app_settings(PG_CATALOG_SETTINGS)
 @pytest.mark.skipif(NOT_POSTGRES, reason="Only PG")
 async def test_query_pg_catalog(container_requester):
@@ -624,3 +831,415 @@ async def test_not_in(container_requester):
             util = query_utility(ICatalogUtility)
             results = await util.search(container, {"type_name__not": "Item"})
             assert len(results["items"]) == 0
+
+
+async def test_parse_count_and_after():
+    from guillotina.catalog.parser import BaseParser
+
+    content = test_utils.create_content(Container)
+    parser = BaseParser(None, content)
+    result = parser({})
+    assert result["count"] == "exact"
+    assert result["after"] is None
+
+    result = parser({"_count": "none", "_after": "foobar"})
+    assert result["count"] == "none"
+    assert result["after"] == "foobar"
+    assert "_count" not in result["params"]
+    assert "_after" not in result["params"]
+
+    assert parser({"_count": "foobar"})["count"] == "exact"
+
+
+async def test_parse_facets():
+    from guillotina.catalog.parser import BaseParser
+
+    content = test_utils.create_content(Container)
+    parser = BaseParser(None, content)
+    result = parser({})
+    assert result["facets"] is None
+    assert result["facets_size"] == 10
+
+    result = parser({"_facets": "type_name,tags", "_facets_size": "5"})
+    assert result["facets"] == ["type_name", "tags"]
+    assert result["facets_size"] == 5
+    assert "_facets" not in result["params"]
+    assert "_facets_size" not in result["params"]
+
+
+@pytest.mark.app_settings(PG_CATALOG_SETTINGS)
+async def test_build_pg_facets_query(dummy_guillotina):
+    from guillotina.contrib.catalog.pg.utility import PGSearchUtility
+
+    util = PGSearchUtility()
+    with mocks.MockTransaction():
+        test_utils.login()
+        content = test_utils.create_content(Container)
+        query = parse_query(
+            content, {"type_name": "Item", "_facets": "type_name,tags", "_facets_size": "5"}, util
+        )
+        sql, arguments = util.build_facets_query(content, query)
+        assert "select json from" in sql
+        assert "select *" not in sql
+        assert sql.count("SELECT ") == 2
+        assert "SELECT 'type_name'::text AS facet, unnest(f_jsonb_text_array(json->'type_name'))" in sql
+        assert " UNION ALL " in sql
+        assert "PARTITION BY facet" in sql
+        assert arguments[0] == "Item"
+        assert arguments[-1] == 5
+        assert f"rank <= ${len(arguments)}::int" in sql
+
+
+@pytest.mark.app_settings(PG_CATALOG_SETTINGS)
+@pytest.mark.app_settings({"catalog_columns": ["type_name"]})
+async def test_build_pg_facets_query_columns(dummy_guillotina):
+    from guillotina.contrib.catalog.pg import indexes as pg_indexes
+    from guillotina.contrib.catalog.pg.utility import PGSearchUtility
+
+    util = PGSearchUtility()
+    pg_indexes.get_pg_indexes(invalidate=True)
+    try:
+        with mocks.MockTransaction():
+            test_utils.login()
+            content = test_utils.create_content(Container)
+            query = parse_query(content, {"_facets": "type_name,tags"}, util)
+            sql, arguments = util.build_facets_query(content, query)
+            assert "select json, catalog_type_name from" in sql
+            assert "unnest(catalog_type_name) AS value" in sql
+            assert "unnest(f_jsonb_text_array(json->'tags')) AS value" in sql
+    finally:
+        pg_indexes._cached_indexes.clear()
+
+
+@pytest.mark.app_settings(PG_CATALOG_SETTINGS)
+async def test_build_pg_query_default_where_clauses(dummy_guillotina):
+    from guillotina.contrib.catalog.pg.utility import PGSearchUtility
+
+    class CustomSearchUtility(PGSearchUtility):
+        def get_default_where_clauses(self, context):
+            return super().get_default_where_clauses(context) + ["json->>'custom' = 'yes'"]
+
+    with mocks.MockTransaction():
+        test_utils.login()
+        content = test_utils.create_content(Container)
+        util = PGSearchUtility()
+        sql, arguments = util.build_query(content, parse_query(content, {}, util), ["zoid"])
+        assert "json->'access_users' ?| $" in sql
+        assert "custom" not in sql
+
+        util = CustomSearchUtility()
+        sql, arguments = util.build_query(content, parse_query(content, {}, util), ["zoid"])
+        assert "json->'access_users' ?| array['" in sql
+        assert "json->>'custom' = 'yes'" in sql
+        assert "type != 'Container'" in sql
+
+
+@pytest.mark.app_settings(PG_CATALOG_SETTINGS)
+async def test_build_pg_query_count_and_after(dummy_guillotina):
+    from guillotina.contrib.catalog.pg.utility import _encode_after
+    from guillotina.contrib.catalog.pg.utility import PGSearchUtility
+
+    util = PGSearchUtility()
+    with mocks.MockTransaction():
+        test_utils.login()
+        content = test_utils.create_content(Container)
+        query = parse_query(content, {"_from": "20"}, util)
+        sql, arguments = util.build_query(content, query, ["zoid"])
+        assert "count(*) OVER() AS full_count" in sql
+        assert f"limit ${len(arguments) - 1}::int offset ${len(arguments)}::int" in sql
+        assert arguments[-2:] == [query["size"], 20]
+        assert sql.strip().startswith("select")
+
+        query = parse_query(content, {"_count": "none"}, util)
+        sql, arguments = util.build_query(content, query, ["zoid"])
+        assert "OVER()" not in sql
+
+        after = _encode_after("foobar", "zoid-1")
+        query = parse_query(content, {"_from": "20", "_after": after, "_sort_des": "title"}, util)
+        sql, arguments = util.build_query(content, query, ["zoid"])
+        assert "OVER()" not in sql
+        assert arguments[-1] == 0
+        assert "zoid DESC" in sql
+        assert arguments[-4:-2] == ["foobar", "zoid-1"]
+        assert f"json->>'title' < ${len(arguments) - 3}::text" in sql
+
+        after = _encode_after(None, "zoid-1")
+        query = parse_query(content, {"_after": after}, util)
+        sql, arguments = util.build_query(content, query, ["zoid"])
+        assert arguments[-3] == "zoid-1"
+        assert f"IS NULL AND zoid > ${len(arguments) - 2}" in sql
+
+        # invalid cursors start from the beginning
+        query = parse_query(content, {"_after": "foobar"}, util)
+        sql, arguments = util.build_query(content, query, ["zoid"])
+        assert "OVER()" in sql
+
+        sql, arguments = util.build_count_query(content, query, estimate=True)
+        assert sql.startswith("EXPLAIN (FORMAT JSON) select zoid")
+
+
+@pytest.mark.app_settings(PG_CATALOG_SETTINGS)
+@pytest.mark.app_settings({"catalog_columns": ["modification_date", "type_name", "depth", "path"]})
+async def test_build_pg_query_columns(dummy_guillotina):
+    from guillotina.contrib.catalog.pg import indexes as pg_indexes
+    from guillotina.contrib.catalog.pg.utility import _encode_after
+    from guillotina.contrib.catalog.pg.utility import PGSearchUtility
+
+    util = PGSearchUtility()
+    indexes = pg_indexes.get_pg_indexes(invalidate=True)
+    try:
+        assert indexes["modification_date"].column
+        assert not indexes["title"].column
+        with mocks.MockTransaction():
+            test_utils.login()
+            content = test_utils.create_content(Container)
+            query = parse_query(
+                content,
+                {
+                    "type_name": "Item",
+                    "depth__gt": "2",
+                    "path__starts": "/foo",
+                    "_sort_des": "modification_date",
+                    "_after": _encode_after("2021-01-01 00:00:00+00", "zoid-1"),
+                },
+                util,
+            )
+            sql, arguments = util.build_query(content, query, ["zoid"])
+            assert "catalog_type_name @> ARRAY[$" in sql
+            assert "catalog_depth > $" in sql
+            assert "substring(catalog_path, 0" in sql
+            assert "(catalog_modification_date)::text AS sort_value" in sql
+            assert "catalog_modification_date < $" in sql
+            assert "::text::timestamptz" in sql
+            assert "order by catalog_modification_date DESC" in sql
+            assert "json->>'modification_date'" not in sql
+
+            storage = mocks.MockStorage()
+            column_sql = indexes["type_name"].get_column_sql(storage)
+            assert "catalog_type_name text[]" in column_sql[0]
+            assert "f_jsonb_text_array(json->'type_name')" in column_sql[0]
+            assert "USING gin (catalog_type_name)" in column_sql[1]
+            column_sql = indexes["modification_date"].get_column_sql(storage)
+            assert "GENERATED ALWAYS AS (f_cast_isots(json->>'modification_date')) STORED" in column_sql[0]
+    finally:
+        pg_indexes._cached_indexes.clear()
+
+
+@pytest.mark.app_settings(PG_CATALOG_SETTINGS)
+async def test_build_pg_query_after_typed_index(dummy_guillotina):
+    from guillotina.contrib.catalog.pg import indexes as pg_indexes
+    from guillotina.contrib.catalog.pg.utility import _encode_after
+    from guillotina.contrib.catalog.pg.utility import PGSearchUtility
+
+    util = PGSearchUtility()
+    indexes = pg_indexes.get_pg_indexes(invalidate=True)
+    try:
+        assert not indexes["modification_date"].column
+        with mocks.MockTransaction():
+            test_utils.login()
+            content = test_utils.create_content(Container)
+            query = parse_query(
+                content,
+                {
+                    "_sort_asc": "modification_date",
+                    "_after": _encode_after("2021-01-01 00:00:00+00", "zoid-1"),
+                },
+                util,
+            )
+            sql, arguments = util.build_query(content, query, ["zoid"])
+            assert "(f_cast_isots(json->>'modification_date'))::text AS sort_value" in sql
+            assert "f_cast_isots(json->>'modification_date') > $" in sql
+            assert "::text::timestamptz" in sql
+            assert "2021-01-01 00:00:00+00" in arguments
+    finally:
+        pg_indexes._cached_indexes.clear()
+
+
+@pytest.mark.app_settings(PG_CATALOG_SETTINGS)
+@pytest.mark.app_settings(
+    {
+        "catalog_columns": ["title"],
+        "catalog_fulltext": {"title": {"config": "english", "weights": {"title": "A", "description": "B"}}},
+    }
+)
+async def test_build_pg_query_fulltext_column(dummy_guillotina):
+    from guillotina.contrib.catalog.pg import indexes as pg_indexes
+    from guillotina.contrib.catalog.pg.utility import PGSearchUtility
+
+    util = PGSearchUtility()
+    indexes = pg_indexes.get_pg_indexes(invalidate=True)
+    try:
+        column_sql = indexes["title"].get_column_sql(mocks.MockStorage())
+        assert "catalog_title tsvector" in column_sql[0]
+        weighted = (
+            "(setweight(to_tsvector('english', coalesce(json->>'title', '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(json->>'description', '')), 'B'))"
+        )
+        assert f"GENERATED ALWAYS AS ({weighted}) STORED" in column_sql[0]
+        assert "USING gin (catalog_title)" in column_sql[1]
+        # without the column, queries use the expression of the index
+        assert f"gin(({weighted}))" in indexes["title"].get_index_sql(mocks.MockStorage())[0]
+        with mock.patch.object(indexes["title"], "column", False):
+            assert f"{weighted} @@ to_tsquery('english', $" in indexes["title"].where("foobar")
+
+        with mocks.MockTransaction():
+            test_utils.login()
+            content = test_utils.create_content(Container)
+            query = parse_query(content, {"title": "foobar"}, util)
+            sql, arguments = util.build_query(content, query, ["zoid"])
+            assert "catalog_title @@ to_tsquery('english', $" in sql
+            assert "ts_rank_cd(catalog_title" in sql
+            assert "to_tsvector" not in sql
+    finally:
+        pg_indexes._cached_indexes.clear()
+
+
+@pytest.mark.app_settings(PG_CATALOG_SETTINGS)
+async def test_build_pg_query_sort_keyword(dummy_guillotina):
+    from guillotina.contrib.catalog.pg import indexes as pg_indexes
+    from guillotina.contrib.catalog.pg.utility import PGSearchUtility
+
+    util = PGSearchUtility()
+    indexes = pg_indexes.get_pg_indexes(invalidate=True)
+    try:
+        assert not indexes["type_name"].column
+        with mocks.MockTransaction():
+            test_utils.login()
+            content = test_utils.create_content(Container)
+            query = parse_query(content, {"_sort_asc": "type_name"}, util)
+            sql, arguments = util.build_query(content, query, ["zoid"])
+            assert "order by json->>'type_name' ASC" in sql
+            assert "f_jsonb_text_array" not in sql
+    finally:
+        pg_indexes._cached_indexes.clear()
+
+
+@pytest.mark.app_settings(PG_CATALOG_SETTINGS)
+async def test_build_pg_query_shape(dummy_guillotina):
+    from guillotina.contrib.catalog.pg.utility import PGSearchUtility
+    from guillotina.contrib.catalog.pg.utils import query_shape
+
+    util = PGSearchUtility()
+    with mocks.MockTransaction():
+        test_utils.login()
+        content = test_utils.create_content(Container)
+        sql, arguments = util.build_query(
+            content, parse_query(content, {"path__starts": "/foo", "_size": "10"}, util), ["zoid"]
+        )
+        other_sql, other_arguments = util.build_query(
+            content, parse_query(content, {"path__starts": "/foo/bar", "_from": "10"}, util), ["zoid"]
+        )
+        # only the arguments change
+        assert sql == other_sql
+        assert query_shape(sql) == query_shape(other_sql)
+        assert arguments != other_arguments
+        assert content.id in arguments
+        assert f"'{content.id}'" not in sql
+        assert ["root", "Managers"] in arguments
+
+        count_sql, count_arguments = util.build_count_query(
+            content, parse_query(content, {"path__starts": "/foo"}, util)
+        )
+        assert f"${len(count_arguments)}::text" in count_sql
+        assert query_shape(count_sql) != query_shape(sql)
+
+
+async def test_load_pg_json():
+    from guillotina.contrib.catalog.pg.utils import load_json
+
+    # decoded by the jsonb codec or text without it
+    assert load_json({"foo": 1}) == {"foo": 1}
+    assert load_json('{"foo": 1}') == {"foo": 1}
+    assert load_json(None) is None
+
+
+@pytest.mark.app_settings(PG_CATALOG_SETTINGS)
+@pytest.mark.skipif(NOT_POSTGRES, reason="Only PG")
+async def test_query_pg_catalog_facets(container_requester):
+    async with container_requester as requester:
+        for idx in range(3):
+            await requester(
+                "POST",
+                "/db/guillotina/",
+                data=json.dumps({"@type": "Item", "id": f"item{idx}", "tags": ["foo", f"tag{idx % 2}"]}),
+            )
+        await requester("POST", "/db/guillotina/", data=json.dumps({"@type": "Folder", "id": "folder"}))
+
+        resp, status = await requester("GET", "/db/guillotina/@search?_facets=type_name,tags&_size=1")
+        assert status == 200
+        assert len(resp["items"]) == 1
+        assert resp["facets"] == {
+            "type_name": {"items": {"Item": 3, "Folder": 1}, "total": 2},
+            "tags": {"items": {"foo": 3, "tag0": 2, "tag1": 1}, "total": 3},
+        }
+
+        resp, status = await requester(
+            "GET", "/db/guillotina/@aggregation?type_name=Item&_facets=tags&_facets_size=1"
+        )
+        assert status == 200
+        assert resp == {"tags": {"items": {"foo": 3}, "total": 3}}
+
+
+@pytest.mark.app_settings(PG_CATALOG_SETTINGS)
+@pytest.mark.app_settings({"catalog_stream_batch_size": 2})
+@pytest.mark.skipif(NOT_POSTGRES, reason="Only PG")
+async def test_query_pg_catalog_stream(container_requester):
+    async with container_requester as requester:
+        for idx in range(5):
+            await requester(
+                "POST",
+                "/db/guillotina/",
+                data=json.dumps({"@type": "Item", "title": f"Item{idx}", "id": f"item{idx}"}),
+            )
+
+        response, status, headers = await requester.make_request(
+            "GET", "/db/guillotina/@search?_sort_asc=title&_metadata=title", accept="application/x-ndjson"
+        )
+        assert status == 200
+        assert [json.loads(line)["title"] for line in response.decode().splitlines()] == [
+            f"Item{idx}" for idx in range(5)
+        ]
+
+        response, status, headers = await requester.make_request(
+            "GET", "/db/guillotina/@search?_sort_asc=title&_size=3", accept="application/x-ndjson"
+        )
+        assert len(response.decode().splitlines()) == 3
+
+
+@pytest.mark.app_settings(PG_CATALOG_SETTINGS)
+@pytest.mark.skipif(NOT_POSTGRES, reason="Only PG")
+async def test_query_pg_catalog_count_and_after(container_requester):
+    from guillotina.contrib.catalog.pg.utility import PGSearchUtility
+
+    async with container_requester as requester:
+        for idx in range(3):
+            await requester(
+                "POST",
+                "/db/guillotina/",
+                data=json.dumps({"@type": "Item", "title": f"Item{idx}", "id": f"item{idx}"}),
+            )
+
+        async with requester.db.get_transaction_manager() as tm, await tm.begin():
+            test_utils.login()
+            root = await tm.get_root()
+            container = await root.async_get("guillotina")
+
+            util = PGSearchUtility()
+            await util.initialize()
+            results = await util.search(container, {"type_name": "Item", "_size": "2", "_sort_asc": "title"})
+            assert [item["title"] for item in results["items"]] == ["Item0", "Item1"]
+            assert results["items_total"] == 3
+
+            results = await util.search(
+                container,
+                {"type_name": "Item", "_size": "2", "_sort_asc": "title", "_after": results["_after"]},
+            )
+            assert [item["title"] for item in results["items"]] == ["Item2"]
+            assert results["items_total"] == 3
+            assert "_after" not in results
+
+            results = await util.search(container, {"type_name": "Item", "_size": "1", "_count": "none"})
+            assert "items_total" not in results
+
+            results = await util.search(container, {"type_name": "Item", "_size": "1", "_count": "estimate"})
+            assert isinstance(results["items_total"], int)
@@ -2,6 +2,7 @@ from asyncmock import AsyncMock
 from guillotina import metrics
 from guillotina.const import ROOT_ID
 from guillotina.content import Container
+from guillotina.contrib.cache.publisher import InvalidationPublisher
 from guillotina.contrib.redis.driver import RedisDriver
 from guillotina.db import transaction
 from guillotina.db.storages.pg import PostgresqlStorage
@@ -91,6 +92,30 @@ class TestRedisMetrics:
             > 0
         )
 
+    async def test_get_many_redis_metric(self, metrics_registry):
+        driver = RedisDriver()
+        driver._pool = AsyncMock()
+        driver._pool.execute.return_value = [b"bar", None]
+        assert await driver.get_many(["foo", "bar"]) == [b"bar", None]
+        assert (
+            metrics_registry.get_sample_value(
+                "guillotina_cache_redis_ops_total", {"type": "get_many", "error": "none"}
+            )
+            == 1.0
+        )
+
+    async def test_set_many_redis_metric(self, metrics_registry):
+        driver = RedisDriver()
+        driver._pool = AsyncMock()
+        driver._pool.execute.return_value = b"OK"
+        await driver.set_many([("foo", "bar"), ("bar", "foo")], expire=10)
+        assert (
+            metrics_registry.get_sample_value(
+                "guillotina_cache_redis_ops_total", {"type": "set_many", "error": "none"}
+            )
+            == 1.0
+        )
+
 
 class TestPGMetrics:
     def _make_txn(self):
@@ -332,3 +357,54 @@ class TestTransactionMetrics:
             )
             == 1.0
         )
+
+    async def test_record_get_children_batch_sizes(self, dummy_guillotina, metrics_registry):
+        def _record(id):
+            return {"state": pickle.dumps(create_content()), "zoid": id, "tid": 1, "id": id}
+
+        storage = AsyncMock()
+        storage.get_children.return_value = [_record("c"), _record("b")]
+        mng = TransactionManager(storage)
+        cache = AsyncMock()
+        cache.max_cache_record_size = 1024
+        cache.get_many.return_value = [_record("a"), None, None]
+        strategy = AsyncMock()
+        txn = Transaction(mng, cache=cache, strategy=strategy)
+
+        ob = create_content(Container)
+        items = [item async for item in txn.get_children(ob, ["a", "b", "c"])]
+
+        assert [item.__uuid__ for item in items] == ["a", "b", "c"]
+        assert (
+            metrics_registry.get_sample_value("guillotina_get_children_batch_size_sum", {"type": "cache"})
+            == 3.0
+        )
+        assert (
+            metrics_registry.get_sample_value("guillotina_get_children_batch_size_sum", {"type": "storage"})
+            == 2.0
+        )
+
+
+class TestCacheInvalidationMetrics:
+    @pytest.mark.app_settings(
+        {
+            "applications": ["guillotina", "guillotina.contrib.cache"],
+            "cache": {"updates_channel": "guillotina", "driver": None},
+        }
+    )
+    async def test_record_invalidation_batch(self, dummy_guillotina, metrics_registry):
+        utility = MagicMock()
+        utility._subscriber.publish = AsyncMock()
+        publisher = InvalidationPublisher(utility)
+        publisher.queue(1, ["a", "b"], {})
+        publisher.queue(2, ["b"], {"b": {"tid": 2}})
+        await publisher.flush()
+
+        assert metrics_registry.get_sample_value("guillotina_cache_invalidation_batch_size_sum", {}) == 3.0
+        assert (
+            metrics_registry.get_sample_value("guillotina_cache_invalidation_batch_transactions_sum", {})
+            == 2.0
+        )
+        assert (
+            metrics_registry.get_sample_value("guillotina_cache_invalidation_delay_seconds_count", {}) == 1.0
+        )
@@ -1,12 +1,18 @@
+from asyncmock import AsyncMock
 from guillotina.api.container import create_container
 from guillotina.component import get_adapter
 from guillotina.content import Folder
 from guillotina.db.interfaces import IVacuumProvider
+from guillotina.db.interfaces import IWriter
 from guillotina.db.storages.cockroach import CockroachStorage
+from guillotina.db.storages.pg import decode_jsonb
+from guillotina.db.storages.pg import encode_jsonb
+from guillotina.db.storages.pg import PGConnectionManager
 from guillotina.db.storages.pg import PostgresqlStorage
 from guillotina.db.transaction_manager import TransactionManager
 from guillotina.exceptions import ConflictError
 from guillotina.exceptions import ConflictIdOnContainer
+from guillotina.exceptions import TIDConflictError
 from guillotina.tests import mocks
 from guillotina.tests.utils import create_content
 from unittest.mock import Mock
@@ -89,6 +95,49 @@ async def test_read_obs(db, dummy_guillotina):
         await cleanup(aps)
 
 
+@pytest.mark.skipif(DATABASE == "DUMMY", reason="Not for dummy db")
+async def test_load_many_obs(db, dummy_guillotina):
+    aps = await get_aps(db)
+    with TransactionManager(aps) as tm, await tm.begin() as txn:
+        obs = [create_content() for _ in range(5)]
+        for ob in obs:
+            txn.register(ob)
+        await tm.commit(txn=txn)
+
+        txn = await tm.begin()
+        oids = [ob.__uuid__ for ob in reversed(obs)] + ["foobar"]
+        records = await aps.load_many(txn, oids)
+        assert sorted(record["zoid"] for record in records) == sorted(ob.__uuid__ for ob in obs)
+
+        loaded = await txn.get_many(oids)
+        assert [ob.__uuid__ for ob in loaded] == oids[:-1]
+        await tm.abort(txn=txn)
+
+        await aps.remove()
+        await cleanup(aps)
+
+
+@pytest.mark.skipif(DATABASE == "DUMMY", reason="Not for dummy db")
+async def test_load_ancestors(db, dummy_guillotina):
+    aps = await get_aps(db)
+    with TransactionManager(aps) as tm, await tm.begin() as txn:
+        obs = [create_content()]
+        for _ in range(3):
+            obs.append(create_content(parent=obs[-1]))
+        for ob in obs:
+            txn.register(ob)
+        await tm.commit(txn=txn)
+
+        txn = await tm.begin()
+        records = await aps.load_ancestors(txn, obs[-1].__uuid__)
+        assert [record["zoid"] for record in records] == [ob.__uuid__ for ob in reversed(obs)]
+        assert await aps.load_ancestors(txn, "foobar") == []
+        await tm.abort(txn=txn)
+
+        await aps.remove()
+        await cleanup(aps)
+
+
 @pytest.mark.skipif(DATABASE == "DUMMY", reason="Not for dummy db")
 async def test_restart_connection(db, dummy_guillotina):
     """Low level test checks that root is not there"""
@@ -564,6 +613,95 @@ async def test_mismatched_tid_causes_conflict_error(db, dummy_guillotina):
         await cleanup(aps)
 
 
+@pytest.mark.skipif(DATABASE in ("cockroachdb", "DUMMY"), reason="Only for postgresql")
+async def test_store_objects_in_batches(db, dummy_guillotina):
+    aps = await get_aps(db)
+    aps._store_batch_size = 10
+    with TransactionManager(aps) as tm, await tm.begin() as txn:
+        parent = create_content(Folder, "Folder")
+        txn.register(parent)
+        items = []
+        for _ in range(25):
+            item = create_content(parent=parent)
+            txn.register(item)
+            items.append(item)
+        await tm.commit(txn=txn)
+
+        txn = await tm.begin()
+        assert await txn.len(parent.__uuid__) == 25
+        loaded = []
+        for item in items:
+            ob = await txn.get(item.__uuid__)
+            assert ob.__serial__ == item.__serial__
+            ob.title = "foobar"
+            txn.register(ob)
+            loaded.append(ob)
+        await tm.commit(txn=txn)
+
+        txn = await tm.begin()
+        for ob in loaded:
+            ob2 = await txn.get(ob.__uuid__)
+            assert ob2.title == "foobar"
+            assert ob2.__serial__ == ob.__serial__
+            txn.delete(ob2)
+        await tm.commit(txn=txn)
+
+        txn = await tm.begin()
+        assert await txn.len(parent.__uuid__) == 0
+        await tm.abort(txn=txn)
+
+        await aps.remove()
+        await cleanup(aps)
+
+
+@pytest.mark.skipif(DATABASE in ("cockroachdb", "DUMMY"), reason="Only for postgresql")
+async def test_mismatched_tid_in_batch_reports_oid(db, dummy_guillotina):
+    aps = await get_aps(db)
+    aps._store_batch_size = 10
+    with TransactionManager(aps) as tm, await tm.begin() as txn:
+        ob1 = create_content()
+        ob2 = create_content()
+        txn.register(ob1)
+        txn.register(ob2)
+        await tm.commit(txn=txn)
+
+        txn = await tm.begin()
+        ob1 = await txn.get(ob1.__uuid__)
+        ob2 = await txn.get(ob2.__uuid__)
+        ob2.__serial__ = 3242432
+        txn.register(ob1)
+        txn.register(ob2)
+
+        with pytest.raises(TIDConflictError) as exc_info:
+            await tm.commit(txn=txn)
+        assert f"Object ID: {ob2.__uuid__}" in str(exc_info.value)
+        await aps.remove()
+        await cleanup(aps)
+
+
+async def test_batch_foreign_key_violation_reports_oid(dummy_guillotina):
+    storage = PostgresqlStorage(store_json=False, store_batch_size=10)
+    parent = create_content()
+    ob1 = create_content(parent=parent)
+    ob2 = create_content(parent=create_content(uid="missing"))
+    for ob in (ob1, ob2):
+        ob.__new_marker__ = True
+    error = asyncpg.exceptions.ForeignKeyViolationError("foreign key violation")
+    error.detail = 'Key (parent_id)=(missing) is not present in table "objects".'
+    txn = Mock()
+    txn._lock = asyncio.Lock()
+    txn.deleted = {}
+    txn.get_connection = AsyncMock()
+    txn.get_connection.return_value.fetch.side_effect = error
+
+    with pytest.raises(TIDConflictError) as exc_info:
+        await storage.store_many(
+            txn, [(ob.__uuid__, None, IWriter(ob), ob) for ob in (ob1, ob2)],
+        )
+    assert f"Object ID: {ob2.__uuid__}" in str(exc_info.value)
+    assert list(txn.deleted.keys()) == [ob2.__uuid__]
+
+
 @pytest.mark.skipif(DATABASE == "DUMMY", reason="Not for dummy db")
 async def test_iterate_keys(db, dummy_guillotina):
 
@@ -695,6 +833,48 @@ async def test_vacuum_objects(db, dummy_guillotina):
     await cleanup(aps)
 
 
+async def test_jsonb_codec():
+    assert encode_jsonb({"foo": [1, "bar"]}) == b'\x01{"foo":[1,"bar"]}'
+    assert encode_jsonb(b'{"foo":1}') == b'\x01{"foo":1}'
+    # text is json, as with the default codec
+    assert encode_jsonb('{"foo":1}') == b'\x01{"foo":1}'
+    assert decode_jsonb(b'\x01{"foo":[1,"bar"]}') == {"foo": [1, "bar"]}
+
+
+async def test_connection_manager_registers_jsonb_codec():
+    calls = []
+
+    class FakeConnection:
+        async def set_type_codec(self, typename, **kwargs):
+            calls.append((typename, kwargs))
+
+    async def init(conn):
+        calls.append(conn)
+
+    manager = PGConnectionManager(connection_options={"init": init, "command_timeout": 10})
+    options = manager._pool_options()
+    assert options["command_timeout"] == 10
+
+    conn = FakeConnection()
+    await options["init"](conn)
+    assert calls == [
+        (
+            "jsonb",
+            {"encoder": encode_jsonb, "decoder": decode_jsonb, "schema": "pg_catalog", "format": "binary"},
+        ),
+        conn,
+    ]
+
+    # disabled with the `jsonb_codec` storage option, cockroach never uses it
+    calls.clear()
+    manager = PGConnectionManager(connection_options={"init": init}, jsonb_codec=False)
+    await manager._pool_options()["init"](conn)
+    assert calls == [conn]
+    assert PostgresqlStorage(jsonb_codec=False).json_parameter({"foo": 1}) == '{"foo":1}'
+    assert PostgresqlStorage().json_parameter({"foo": 1}) == b'{"foo":1}'
+    assert CockroachStorage()._jsonb_codec is False
+
+
 @pytest.mark.skipif(DATABASE in ("DUMMY",), reason="only for rdms")
 async def test_constraint_error_inserting_duplicate_annotations(db, dummy_guillotina):
     aps = await get_aps(db, autovacuum=False)
@@ -1,9 +1,17 @@
 from guillotina.api.container import create_container
+from guillotina.auth.users import AnonymousUser
 from guillotina.auth.users import GuillotinaUser
+from guillotina.component import get_utility
 from guillotina.content import create_content_in_container
 from guillotina.interfaces import Allow
+from guillotina.interfaces import IApplication
+from guillotina.interfaces import IPrincipalRoleManager
 from guillotina.interfaces import IRolePermissionManager
 from guillotina.security.policy import cached_roles
+from guillotina.security.policy import clear_decision_cache
+from guillotina.security.policy import get_compiled_acl
+from guillotina.security.policy import get_decision_cache
+from guillotina.security.policy import SecurityPolicy
 from guillotina.security.utils import get_principals_with_access_content
 from guillotina.security.utils import get_roles_with_access_content
 from guillotina.security.utils import settings_for_object
@@ -13,6 +21,7 @@ from guillotina.transactions import transaction
 from guillotina.utils import get_authenticated_user
 from guillotina.utils import get_roles_principal
 from guillotina.utils import get_security_policy
+from unittest import mock
 
 import json
 import pytest
@@ -585,3 +594,112 @@ async def test_set_owner_field(container_requester):
             "POST", "/db/guillotina/", data=json.dumps({"@type": "Example", "default_factory_test": "text"}),
         )
         assert status == 201
+
+
+async def test_decisions_cached_across_transactions(dummy_guillotina):
+    db = get_db(dummy_guillotina, "db")
+    tm = db.get_transaction_manager()
+    utils.login()
+    async with tm.transaction():
+        root_ob = await tm.get_root()
+        container = await create_container(root_ob, "test-container")
+        await create_content_in_container(container, "Item", "foobar")
+
+    clear_decision_cache()
+    decisions = get_decision_cache()
+    user = GuillotinaUser("foobar-user")
+    async with tm.transaction():
+        root_ob = await tm.get_root()
+        container = await root_ob.async_get("test-container")
+        item = await container.async_get("foobar")
+        assert not SecurityPolicy(user).check_permission("guillotina.ViewContent", item)
+        assert len(decisions) == 1
+
+    async with tm.transaction():
+        root_ob = await tm.get_root()
+        container = await root_ob.async_get("test-container")
+        item = await container.async_get("foobar")
+        with mock.patch.object(SecurityPolicy, "cached_decision") as cached_decision:
+            assert not SecurityPolicy(user).check_permission("guillotina.ViewContent", item)
+            assert not cached_decision.called
+
+        # changes not committed yet are not cached
+        IPrincipalRoleManager(container).assign_role_to_principal("guillotina.Reader", "foobar-user")
+        assert SecurityPolicy(user).check_permission("guillotina.ViewContent", item)
+        assert len(decisions) == 1
+
+    async with tm.transaction():
+        root_ob = await tm.get_root()
+        container = await root_ob.async_get("test-container")
+        item = await container.async_get("foobar")
+        assert SecurityPolicy(user).check_permission("guillotina.ViewContent", item)
+        assert len(decisions) == 2
+
+        # the roles of the principal are part of the key
+        user.roles["guillotina.Reader"] = 0
+        assert SecurityPolicy(user).check_permission("guillotina.ViewContent", item)
+        assert len(decisions) == 3
+
+
+async def test_decisions_cached_by_object_class(dummy_guillotina):
+    clear_decision_cache()
+    root = get_utility(IApplication, name="root")
+    db = root["db"]
+    policy = SecurityPolicy(AnonymousUser())
+    # set only on the application, not inherited
+    assert policy.check_permission("guillotina.AccessContent", root)
+    assert not policy.check_permission("guillotina.AccessContent", db)
+
+
+async def test_compiled_acl(dummy_guillotina):
+    db = get_db(dummy_guillotina, "db")
+    tm = db.get_transaction_manager()
+    utils.login()
+    async with tm.transaction():
+        root_ob = await tm.get_root()
+        container = await create_container(root_ob, "test-container")
+        folder = await create_content_in_container(container, "Folder", "foobar-folder")
+        item = await create_content_in_container(folder, "Item", "foobar")
+        user = GuillotinaUser("foobar-user", groups=["foobar-group"])
+
+        IPrincipalRoleManager(container).assign_role_to_principal("guillotina.Reader", "foobar-group")
+        assert SecurityPolicy(user).check_permission("guillotina.ViewContent", item)
+
+        # the closest setting wins, even if set for one of the groups
+        IPrincipalRoleManager(folder).remove_role_from_principal("guillotina.Reader", "foobar-user")
+        assert not SecurityPolicy(user).check_permission("guillotina.ViewContent", item)
+        IPrincipalRoleManager(item).assign_role_to_principal_no_inherit("guillotina.Reader", "foobar-group")
+        assert SecurityPolicy(user).check_permission("guillotina.ViewContent", item)
+        assert not SecurityPolicy(user).check_permission("guillotina.ViewContent", folder)
+
+        acl = get_compiled_acl(item)
+        assert acl.parent is get_compiled_acl(folder)
+        assert acl.principal_roles["foobar-user"]["guillotina.Reader"][0] == acl.depth - 1
+        with mock.patch("guillotina.security.policy.query_adapter") as query_adapter:
+            assert get_compiled_acl(item) is acl
+            assert not query_adapter.called
+
+        IPrincipalRoleManager(folder).unset_role_for_principal("guillotina.Reader", "foobar-user")
+        assert get_compiled_acl(item) is not acl
+        assert SecurityPolicy(user).check_permission("guillotina.ViewContent", folder)
+
+
+async def test_filter_allowed(dummy_guillotina):
+    db = get_db(dummy_guillotina, "db")
+    tm = db.get_transaction_manager()
+    utils.login()
+    async with tm.transaction():
+        root_ob = await tm.get_root()
+        container = await create_container(root_ob, "test-container")
+        folder = await create_content_in_container(container, "Folder", "foobar-folder")
+        items = [await create_content_in_container(folder, "Item", f"foobar-{idx}") for idx in range(5)]
+        IPrincipalRoleManager(folder).assign_role_to_principal("guillotina.Reader", "foobar-user")
+        IPrincipalRoleManager(items[1]).remove_role_from_principal("guillotina.Reader", "foobar-user")
+
+        policy = SecurityPolicy(GuillotinaUser("foobar-user"))
+        with mock.patch.object(SecurityPolicy, "cached_decision", wraps=policy.cached_decision) as decision:
+            allowed = policy.filter_allowed("guillotina.ViewContent", items)
+            # once for the children without local security, once for the one with
+            assert decision.call_count == 2
+        assert allowed == [items[0]] + items[2:]
+        assert allowed == [item for item in items if policy.check_permission("guillotina.ViewContent", item)]
@@ -1,6 +1,8 @@
 from guillotina import task_vars
+from guillotina._settings import app_settings
 from guillotina.content import create_content_in_container
 from guillotina.db import ROOT_ID
+from guillotina.db.interfaces import IWriter
 from guillotina.db.transaction import Transaction
 from guillotina.exceptions import TransactionClosedException
 from guillotina.exceptions import TransactionNotFound
@@ -10,6 +12,8 @@ from guillotina.tests import utils
 from guillotina.transactions import transaction
 from guillotina.utils import get_database
 from guillotina.utils import get_object_by_uid
+from guillotina.utils import run_async
+from unittest import mock
 
 import pytest
 
@@ -191,3 +195,157 @@ async def test_txn_reuse_add(container_requester):
             obj2 = await container1.async_get("myobj")
             assert obj2 is not None
             assert obj == obj2
+
+
+async def test_objects_pickled_in_executor_before_commit(container_requester):
+    async with container_requester as requester:
+        calls = []
+
+        async def _run_async(func, *args):
+            # db transaction must not be started yet
+            calls.append(txn._db_txn)
+            return await run_async(func, *args)
+
+        with mock.patch.dict(app_settings, {"serialize_executor_threshold": 1}), mock.patch(
+            "guillotina.db.transaction.run_async", _run_async
+        ):
+            async with transaction(db=requester.db) as txn:
+                root = await txn.get(ROOT_ID)
+                container = await root.async_get("guillotina")
+                container.title = "changed title"
+                container.register()
+
+        assert calls == [None]
+        async with transaction(db=requester.db) as txn:
+            root = await txn.get(ROOT_ID)
+            container = await root.async_get("guillotina")
+            assert container.title == "changed title"
+
+
+async def test_prepared_writer_reuses_serialized_values(container_requester):
+    async with container_requester as requester:
+        async with transaction(db=requester.db, abort_when_done=True) as txn:
+            root = await txn.get(ROOT_ID)
+            container = await root.async_get("guillotina")
+            writer = IWriter(container)
+            await writer.prepare()
+            pickled = writer.serialize()
+            assert pickled is writer.serialize()
+            assert await writer.get_json() is await writer.get_json()
+
+
+async def test_get_many_objects(container_requester):
+    async with container_requester as requester:
+        async with transaction(db=requester.db) as txn:
+            root = await txn.get(ROOT_ID)
+            container = await root.async_get("guillotina")
+            for idx in range(3):
+                await create_content_in_container(
+                    container, "Item", f"item{idx}", check_security=False, __uuid__=f"item{idx}"
+                )
+
+        async with transaction(db=requester.db, abort_when_done=True) as txn:
+            obs = await txn.get_many(["item2", "missing", "item0", "item1"])
+            assert [ob.__uuid__ for ob in obs] == ["item2", "item0", "item1"]
+            assert all(ob.__txn__ is txn for ob in obs)
+
+            await txn.prefetch(["item0", "missing"])
+            ob = await txn.get("item0")
+            assert ob.id == "item0"
+
+
+async def test_get_children_in_growing_batches(container_requester):
+    async with container_requester as requester:
+        async with transaction(db=requester.db) as txn:
+            root = await txn.get(ROOT_ID)
+            container = await root.async_get("guillotina")
+            for idx in range(40):
+                await create_content_in_container(container, "Item", f"item{idx}", check_security=False)
+
+        settings = {"children_batch_size": 4, "children_max_batch_size": 16}
+        async with transaction(db=requester.db, abort_when_done=True) as txn:
+            root = await txn.get(ROOT_ID)
+            container = await root.async_get("guillotina")
+            keys = [f"item{idx}" for idx in reversed(range(40))]
+            keys.insert(10, "missing")
+            storage = txn.storage
+            with mock.patch.dict(app_settings, settings), mock.patch.object(
+                storage, "get_children", wraps=storage.get_children
+            ) as get_children:
+                items = [item async for item in txn.get_children(container, keys)]
+
+            assert [item.id for item in items] == [key for key in keys if key != "missing"]
+            assert [len(call[0][2]) for call in get_children.call_args_list] == [4, 8, 16, 13]
+
+
+async def test_get_object_by_uid_loads_ancestors_at_once(container_requester):
+    async with container_requester as requester:
+        async with transaction(db=requester.db) as txn:
+            root = await txn.get(ROOT_ID)
+            container = await root.async_get("guillotina")
+            folder = await create_content_in_container(
+                container, "Folder", "folder", check_security=False, __uuid__="folder"
+            )
+            await create_content_in_container(
+                folder, "Item", "item", check_security=False, __uuid__="item", check_constraints=False
+            )
+
+        async with transaction(db=requester.db, abort_when_done=True) as txn:
+            storage = txn.storage
+            with mock.patch.object(storage, "load_ancestors", wraps=storage.load_ancestors) as load_ancestors:
+                ob = await get_object_by_uid("item", txn)
+                assert load_ancestors.call_count <= 1
+
+            assert ob.__parent__.__uuid__ == "folder"
+            assert ob.__parent__.__parent__.__uuid__ == container.__uuid__
+            assert ob.__parent__.__parent__.__parent__.__uuid__ == ROOT_ID
+
+            with pytest.raises(KeyError):
+                await get_object_by_uid("missing", txn)
+
+
+class _AncestorsStorage:
+    def __init__(self, records):
+        self.records = records
+        self.calls = []
+
+    async def load_ancestors(self, txn, oid):
+        self.calls.append(oid)
+        results = []
+        while oid in self.records:
+            results.append(self.records[oid])
+            oid = self.records[oid]["parent_id"]
+        return results
+
+
+class _AncestorsCache:
+    max_cache_record_size = 1024
+
+    def __init__(self, cached):
+        self.cached = cached
+        self.stored = []
+
+    async def get(self, oid=None, **kwargs):
+        return self.cached.get(oid)
+
+    async def set_many(self, items):
+        self.stored.extend(items)
+
+
+async def test_get_ancestors_loads_cache_misses_with_one_query(dummy_guillotina):
+    from guillotina.db.transaction_manager import TransactionManager
+
+    records = {
+        oid: {"zoid": oid, "parent_id": parent_id, "id": oid, "tid": 1, "state": b""}
+        for oid, parent_id in (("a", None), ("b", "a"), ("c", "b"), ("d", "c"))
+    }
+    storage = _AncestorsStorage(records)
+    cache = _AncestorsCache({"d": records["d"]})
+    txn = Transaction(TransactionManager(storage), cache=cache, strategy=mock.MagicMock())
+
+    results = await txn._get_ancestors("d")
+    assert [result["zoid"] for result in results] == ["d", "c", "b", "a"]
+    assert storage.calls == ["c"]
+    assert [item[1][0] for item in cache.stored] == [{"oid": "c"}, {"oid": "b"}, {"oid": "a"}]
+
+    assert await txn._get_ancestors("missing") == []
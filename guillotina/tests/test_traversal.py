@@ -1,7 +1,13 @@
+from guillotina.content import Container
+from guillotina.content import Folder
 from guillotina.response import Response
+from guillotina.tests import utils as test_utils
 from guillotina.tests.utils import get_mocked_request
+from guillotina.traversal import _resolve_path
 from guillotina.traversal import apply_cors
+from unittest import mock
 
+import json
 import pytest
 
 
@@ -40,3 +46,55 @@ async def test_apply_cors(guillotina_main):
     assert resp.headers["Access-Control-Allow-Credentials"] == "true"
     assert resp.headers["Access-Control-Max-Age"] == "3660"
     assert resp.headers["Location"] == "/test"
+
+
+@pytest.mark.asyncio
+async def test_traverse_nested_path(container_requester):
+    async with container_requester as requester:
+        await requester("POST", "/db/guillotina/", data=json.dumps({"@type": "Folder", "id": "folder"}))
+        await requester("POST", "/db/guillotina/folder", data=json.dumps({"@type": "Folder", "id": "sub"}))
+        await requester("POST", "/db/guillotina/folder/sub", data=json.dumps({"@type": "Item", "id": "item"}))
+
+        storage = requester.db.storage
+        with mock.patch.object(storage, "resolve_path", wraps=storage.resolve_path) as resolve_path:
+            resp, status = await requester("GET", "/db/guillotina/folder/sub/item")
+            assert status == 200
+            assert resolve_path.call_count == 1
+        assert resp["@id"].endswith("/db/guillotina/folder/sub/item")
+        assert resp["parent"]["@id"].endswith("/db/guillotina/folder/sub")
+
+        resp, status = await requester("GET", "/db/guillotina/folder/sub/@sharing")
+        assert status == 200
+
+        _, status = await requester("GET", "/db/guillotina/folder/missing/item")
+        assert status == 404
+
+        _, status = await requester("GET", "/db/guillotina/folder/sub/_foobar")
+        assert status == 400
+
+
+class CustomFolder(Folder):
+    async def async_get(self, key, default=None, suppress_events=False):
+        return await super().async_get(key, default=default, suppress_events=suppress_events)
+
+
+class CustomContainer(Container):
+    async def async_get(self, key, default=None, suppress_events=False):
+        return await super().async_get(key, default=default, suppress_events=suppress_events)
+
+
+@pytest.mark.asyncio
+async def test_resolve_path_only_through_stock_folders(dummy_guillotina):
+    container = test_utils.create_content(Container, "Container")
+    folder = test_utils.create_content(Folder, "Folder", parent=container)
+    custom = test_utils.create_content(CustomFolder, "Folder", parent=folder)
+    item = test_utils.create_content(parent=custom)
+    txn = mock.MagicMock()
+    txn.resolve_path = mock.AsyncMock(return_value=[folder, custom, item])
+    container.__txn__ = txn
+    # children of a folder overriding async_get are looked up with it
+    assert await _resolve_path(container, ("folder", "custom", "item")) == [folder, custom]
+
+    container = test_utils.create_content(CustomContainer, "Container")
+    container.__txn__ = txn
+    assert await _resolve_path(container, ("folder", "custom", "item")) == []
@@ -14,6 +14,7 @@ from guillotina.browser import View
 from guillotina.component import get_utility
 from guillotina.component import query_adapter
 from guillotina.component import query_multi_adapter
+from guillotina.content import Folder
 from guillotina.contentnegotiation import get_acceptable_content_types
 from guillotina.contentnegotiation import get_acceptable_languages
 from guillotina.db.orm.interfaces import IBaseObject
@@ -49,6 +50,7 @@ from guillotina.transactions import commit
 from guillotina.utils import get_registry
 from guillotina.utils import get_security_policy
 from guillotina.utils import import_class
+from typing import List
 from typing import Optional
 from typing import Tuple
 from zope.interface import alsoProvides
@@ -57,6 +59,38 @@ import asyncio
 import traceback
 
 
+async def _resolve_path(container: IBaseObject, path: Tuple[str, ...]) -> List[IBaseObject]:
+    """
+    Objects of the path inside a container that can be traversed without
+    going through the checks of `traverse` on every level. Only folders
+    looking up their children with the stock `async_get` are resolved at
+    once, others are traversed level by level.
+    """
+    if getattr(type(container), "async_get", None) is not Folder.async_get:
+        return []
+    ids = []
+    for id in path:
+        if id[0] in ("_", "@") or id in (".", ".."):
+            break
+        ids.append(id)
+    txn = container.__txn__
+    if len(ids) < 2 or txn is None:
+        return []
+
+    objects = []
+    for obj in await txn.resolve_path(container, ids):
+        if IContainer.providedBy(obj):
+            break
+        objects.append(obj)
+        if (
+            not IAsyncContainer.providedBy(obj)
+            or not ITraversable.providedBy(obj)
+            or getattr(type(obj), "async_get", None) is not Folder.async_get
+        ):
+            break
+    return objects
+
+
 async def traverse(
     request: IRequest, parent: IBaseObject, path: Tuple[str, ...]
 ) -> Tuple[IBaseObject, Tuple[str, ...]]:
@@ -79,6 +113,12 @@ async def traverse(
             # shortcut
             return parent, path
 
+        if IContainer.providedBy(parent):
+            # resolve all the objects of the path at once
+            objects = await _resolve_path(parent, path)
+            if len(objects) > 0:
+                return await traverse(request, objects[-1], path[len(objects) :])
+
         if IAsyncContainer.providedBy(parent):
             context = await parent.async_get(path[0], suppress_events=True)
             if context is None:
@@ -176,21 +176,23 @@ async def get_object_by_uid(uid: str, txn=None) -> IBaseObject:
         from guillotina.transactions import get_transaction
 
         txn = get_transaction()
-    result = txn._manager._hard_cache.get(uid, None)
-    if result is None:
-        result = await txn._get(uid)
-
-    if result["parent_id"] == TRASHED_ID:
+    # load the object and all its parents at once
+    results = await txn._get_ancestors(uid)
+    if len(results) == 0:
         raise KeyError(uid)
-
-    obj = app_settings["object_reader"](result)
-    obj.__txn__ = txn
-    if result["parent_id"]:
-        parent = await get_object_by_uid(result["parent_id"], txn)
-        if parent is not None:
+    for result in results:
+        if result["parent_id"] == TRASHED_ID:
+            raise KeyError(result["zoid"])
+
+    parent = None
+    for result in reversed(results):
+        obj = app_settings["object_reader"](result)
+        obj.__txn__ = txn
+        if result["parent_id"]:
+            if parent is None:
+                raise KeyError(result["parent_id"])
             obj.__parent__ = parent
-        else:
-            raise KeyError(result["parent_id"])
+        parent = obj
     return obj
 
 
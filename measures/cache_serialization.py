@@ -0,0 +1,57 @@
+from guillotina.content import create_content
+from guillotina.contrib.cache.serialize import CompactCodec
+from guillotina.contrib.cache.serialize import PickleCodec
+from guillotina.db.interfaces import IWriter
+
+import time
+
+
+ITERATIONS = 1000
+
+
+# --------------------------------------------------------
+# Measure performance of cache value codecs
+#
+# Lessons:
+#   - pickle is hard to beat for records with small states
+#   - from ~256kb of state, writing the raw state is several times
+#     faster than pickling it again
+#   - compressing the state is slower but values shrink a lot
+# ---------------------------------------------------------
+
+
+async def make_record(size):
+    ob = await create_content("TestContent6", id="foobar")
+    ob.foobar1 = "x" * size
+    state = IWriter(ob).serialize()
+    return {
+        "zoid": "a9f2c8d1e0b44a3c9d7e6f5a4b3c2d1e",
+        "tid": 1234567,
+        "id": "foobar",
+        "parent_id": "f1e2d3c4b5a64798a0b1c2d3e4f5a6b7",
+        "of": None,
+        "type": "TestContent6",
+        "state_size": len(state),
+        "resource": True,
+        "state": state,
+    }
+
+
+def measure(name, codec, record):
+    start = time.time()
+    for _ in range(ITERATIONS):
+        data = codec.dumps(record)
+    dumped = time.time()
+    for _ in range(ITERATIONS):
+        codec.loads(data)
+    end = time.time()
+    print(f"{name}: dumps {dumped - start:.3f}s, loads {end - dumped:.3f}s, {len(data)} bytes")
+
+
+async def run():
+    for size in (1000, 100000, 1000000):
+        record = await make_record(size)
+        print(f"Test {ITERATIONS} record codec operations with {len(record['state'])} bytes of state")
+        measure("pickle", PickleCodec(), record)
+        measure("compact", CompactCodec(compress_threshold=0), record)
+        measure("compact compressed", CompactCodec(compress_threshold=1024), record)